@@ -0,0 +1,123 @@
+"""Setup shared by the benchmark scripts and bench_suite.py.
+
+Importing this module puts the repository root on ``sys.path``, so the
+scripts run from a checkout without installing the package. The input
+generators are seeded from their arguments: every script that builds a
+tree with the same arguments measures the same layout, sizes and bytes.
+"""
+import os
+import random
+import shutil
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+PASSWORD = "benchmark"
+# Keeps the key derivation out of the numbers; scripts that time the KDF
+# itself take an --iterations argument instead.
+ITERATIONS = 1_000
+BLOCK_SIZE = 1 << 20
+FILES_PER_DIR = 1000
+
+
+def random_bytes(size: int, seed: int) -> bytes:
+    """``size`` incompressible bytes, the same for the same ``seed``."""
+    return random.Random(seed).getrandbits(size * 8).to_bytes(size, "little")
+
+
+def write_file(path: Path, size: int, block: Optional[bytes] = None) -> None:
+    """Writes ``size`` bytes, repeating one random block seeded from ``size``."""
+    if block is None:
+        block = random_bytes(BLOCK_SIZE, size)
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            n = min(remaining, len(block))
+            f.write(block[:n])
+            remaining -= n
+
+
+def make_files(root: Path, size_mb: int, files: int) -> None:
+    """``size_mb`` MiB of incompressible data split over ``files`` files."""
+    root.mkdir(parents=True)
+    per_file = (size_mb << 20) // files
+    block = random_bytes(BLOCK_SIZE, size_mb * files)
+    for i in range(files):
+        write_file(root / f"file_{i:04d}.bin", per_file, block)
+
+
+def make_small_files(root: Path, files: int, min_kb: int, max_kb: int, compressible: bool = False) -> int:
+    """A tree of ``files`` files of ``min_kb``-``max_kb`` KiB, 1000 per directory.
+
+    With ``compressible``, every other file holds repetitive text instead
+    of random bytes. Returns the total size.
+    """
+    rng = random.Random(files)
+    noise = random_bytes(max_kb << 10, files)
+    text = (b"small file benchmark line\n" * ((max_kb << 10) // 26 + 1))[:max_kb << 10]
+    total = 0
+    for i in range(files):
+        d = root / f"dir_{i // FILES_PER_DIR:03d}"
+        d.mkdir(parents=True, exist_ok=True)
+        size = rng.randint(min_kb << 10, max_kb << 10)
+        (d / f"file_{i:07d}.dat").write_bytes((text if compressible and not i % 2 else noise)[:size])
+        total += size
+    return total
+
+
+def drop_cache(path: Path) -> None:
+    """Evicts a file or tree from the page cache where posix_fadvise exists."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    if path.is_file():
+        targets = [str(path)]
+    else:
+        targets = [os.path.join(d, name) for d, _dirs, names in os.walk(path) for name in names]
+    for target in targets:
+        fd = os.open(target, os.O_RDONLY)
+        try:
+            # Dirty pages are not dropped; write them back first.
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def timed_call(fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def timed(fn: Callable[..., Any], *args, **kwargs) -> float:
+    return timed_call(fn, *args, **kwargs)[1]
+
+
+def best(repeat: int, fn: Callable[..., Any], *args, before: Optional[Callable[[], None]] = None, **kwargs) -> float:
+    """The shortest of ``repeat`` timed calls; ``before`` runs untimed ahead of each."""
+    times = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        times.append(timed(fn, *args, **kwargs))
+    return min(times)
+
+
+def clear(path: Path) -> Callable[[], None]:
+    """A ``before`` hook that removes an output directory."""
+    return lambda: shutil.rmtree(path, ignore_errors=True)
+
+
+def traced_peak(fn: Callable[..., Any], *args, **kwargs) -> int:
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
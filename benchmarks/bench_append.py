@@ -0,0 +1,68 @@
+"""Cost of append_to_container against the size of the existing container.
+
+Usage:
+    python benchmarks/bench_append.py --sizes-mb 64 256 1024 --add-mb 8
+
+Builds containers of increasing size and appends the same amount of new
+data to each. The append time should stay flat while the size of the
+container grows; a full re-encryption is shown for comparison.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, timed, write_file
+from securearchive.engine import append_to_container, encrypt_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--add-mb", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tmp", default=None, help="Scratch directory (defaults to the system temp dir).")
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-append-", dir=args.tmp))
+    try:
+        added = scratch / "added.bin"
+        write_file(added, args.add_mb << 20)
+
+        print(f"appending {args.add_mb} MiB")
+        print(f"{'container MiB':>14} {'append s':>9} {'re-encrypt s':>13}")
+
+        for size_mb in args.sizes_mb:
+            src = scratch / f"input_{size_mb}"
+            src.mkdir()
+            write_file(src / "existing.bin", size_mb << 20)
+            container = scratch / f"bench_{size_mb}.secarc"
+            encrypt_path(str(src), str(container), PASSWORD, iterations=ITERATIONS, workers=args.workers)
+            # Flush the fresh container first, so the append's fsync does not pay for it.
+            with open(container, "rb+") as f:
+                os.fsync(f.fileno())
+
+            t_append = timed(append_to_container, str(container), [str(added)], PASSWORD, workers=args.workers)
+
+            shutil.copy(added, src / "added.bin")
+            t_full = timed(
+                encrypt_path,
+                str(src),
+                str(container),
+                PASSWORD,
+                iterations=ITERATIONS,
+                overwrite=True,
+                workers=args.workers,
+            )
+
+            print(f"{size_mb:>14} {t_append:>9.3f} {t_full:>13.3f}")
+
+            container.unlink()
+            shutil.rmtree(src)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Deduplication ratio and throughput on synthetic data with known duplication.
+
+Usage:
+    python benchmarks/bench_dedup.py --unique-mb 64 --copies 4 --edits 8
+
+Writes ``--unique-mb`` of random data as a set of base images, then
+``--copies`` variants of each image with ``--edits`` small insertions at
+random positions, so roughly ``copies + 1`` times the unique data is
+archived. Each variant shifts the bytes after every insertion, which a
+fixed-size chunker could not deduplicate. The container is written once
+without and once with ``dedup=True``.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, timed
+from securearchive.engine import decrypt_container, encrypt_path
+
+
+IMAGES = 4
+
+
+def _make_images(root: Path, unique_mb: int, copies: int, edits: int, seed: int) -> int:
+    rng = random.Random(seed)
+    root.mkdir(parents=True)
+    total = 0
+    per_image = (unique_mb << 20) // IMAGES
+    for i in range(IMAGES):
+        base = os.urandom(per_image)
+        (root / f"image_{i}.bin").write_bytes(base)
+        total += len(base)
+        for c in range(copies):
+            variant = bytearray(base)
+            for _ in range(edits):
+                pos = rng.randrange(len(variant))
+                variant[pos:pos] = os.urandom(rng.randint(1, 64))
+            (root / f"image_{i}_copy_{c}.bin").write_bytes(variant)
+            total += len(variant)
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--unique-mb", type=int, default=32)
+    parser.add_argument("--copies", type=int, default=3)
+    parser.add_argument("--edits", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tmp", default=None, help="Scratch directory (defaults to the system temp dir).")
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-dedup-", dir=args.tmp))
+    try:
+        src = scratch / "input"
+        logical = _make_images(src, args.unique_mb, args.copies, args.edits, args.seed)
+        expected = logical / (args.unique_mb << 20)
+        print(f"input: {logical / (1 << 20):.1f} MiB, {args.unique_mb} MiB unique, ideal ratio {expected:.2f}x")
+        print(f"{'mode':>6} {'container MiB':>14} {'ratio':>7} {'encrypt MiB/s':>14} {'decrypt MiB/s':>14}")
+
+        for dedup in (False, True):
+            container = scratch / f"bench_{dedup}.secarc"
+            out_dir = scratch / f"out_{dedup}"
+
+            t_enc = timed(
+                encrypt_path,
+                str(src),
+                str(container),
+                PASSWORD,
+                iterations=ITERATIONS,
+                workers=args.workers,
+                dedup=dedup,
+            )
+            t_dec = timed(decrypt_container, str(container), str(out_dir), PASSWORD, workers=args.workers)
+
+            size = container.stat().st_size
+            mode = "dedup" if dedup else "plain"
+            mib = logical / (1 << 20)
+            print(f"{mode:>6} {size / (1 << 20):>14.1f} {logical / size:>6.2f}x "
+                  f"{mib / t_enc:>14.1f} {mib / t_dec:>14.1f}")
+
+            container.unlink()
+            shutil.rmtree(out_dir)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
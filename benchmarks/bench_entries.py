@@ -0,0 +1,102 @@
+"""Memory held by the in-memory entry list for very large trees.
+
+Usage:
+    python benchmarks/bench_entries.py --entries 1000000 10000000
+
+For each count, synthetic paths are scanned into an EntryTable and filled
+in with stored ranges, as encrypt_path does before writing the manifest.
+The same is done with the previous representation, one dataclass with a
+``Path`` per scanned file plus one dict per manifest entry. Peak traced
+heap is reported per entry. The previous representation needs several
+GB at ten million entries and is skipped above ``--legacy-max``.
+"""
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+import _common  # noqa: F401  (puts the repository root on sys.path)
+from securearchive.entrytable import EntryTable
+
+
+ROOT = "/data/archive"
+FILE_SIZE = 4096
+
+
+@dataclass
+class _LegacyEntry:
+    rel_path: str
+    abs_path: Path
+    size: int
+    mtime: float
+
+
+def _rel_path(i: int) -> str:
+    return f"project_{i // 100_000:03d}/dir_{i // 1000 % 100:02d}/file_{i:08d}.dat"
+
+
+def _table(count: int) -> EntryTable:
+    table = EntryTable()
+    root = table.add_root(ROOT)
+    for i in range(count):
+        table.append(_rel_path(i), FILE_SIZE, 1_700_000_000.0 + i, root=root)
+    for i in range(count):
+        table.set_stored(i, i * FILE_SIZE, FILE_SIZE)
+    return table
+
+
+def _legacy(count: int) -> list:
+    root = Path(ROOT)
+    files = []
+    for i in range(count):
+        rel = _rel_path(i)
+        files.append(_LegacyEntry(rel, root / rel, FILE_SIZE, 1_700_000_000.0 + i))
+    entries = []
+    for i, e in enumerate(files):
+        entries.append(
+            {
+                "path": e.rel_path,
+                "size": e.size,
+                "mtime": e.mtime,
+                "offset": i * FILE_SIZE,
+                "length": FILE_SIZE,
+                "segments": [i * FILE_SIZE >> 20, 1],
+            }
+        )
+    return [files, entries]
+
+
+def _measure(fn, count: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = fn(count)
+        seconds = time.perf_counter() - start
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--legacy-max", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'layout':>8} {'peak MiB':>10} {'bytes/entry':>12} {'build s':>8}")
+    for count in args.entries:
+        layouts = [("table", _table)]
+        if count <= args.legacy_max:
+            layouts.append(("legacy", _legacy))
+        for name, fn in layouts:
+            peak, seconds = _measure(fn, count)
+            print(f"{count:>10} {name:>8} {peak / (1 << 20):>10.1f} {peak / count:>12.1f} {seconds:>8.1f}")
+        if count > args.legacy_max:
+            print(f"{count:>10} {'legacy':>8} {'skipped':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Files per second when extracting trees of many small files.
+
+Usage:
+    python benchmarks/bench_extract.py --files 100000 --out /mnt/nfs/scratch
+
+A container of random 1-16 KiB files is decrypted into ``--out`` with one
+worker and with ``--writers`` workers (writer threads, capped at the CPU
+count, and decryption threads), each the best of
+``--repeat`` runs. Point ``--out`` at the filesystem you restore to: on
+local SSDs and tmpfs the gain comes from less Python work per file, on
+network filesystems mostly from the overlapping open/write/close calls.
+The key derivation is reduced to a negligible iteration count.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, best, clear, make_small_files
+from securearchive.engine import decrypt_container, encrypt_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--min-kb", type=int, default=1)
+    parser.add_argument("--max-kb", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tmp", default=None, help="Scratch directory for input and container.")
+    parser.add_argument("--out", default=None, help="Parent directory to extract into (defaults to the scratch dir).")
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-extract-", dir=args.tmp))
+    out = Path(tempfile.mkdtemp(prefix="secarc-extract-out-", dir=args.out or scratch))
+    try:
+        src = scratch / "input"
+        total = make_small_files(src, args.files, args.min_kb, args.max_kb)
+        container = scratch / "bench.secarc"
+        encrypt_path(str(src), str(container), PASSWORD, iterations=ITERATIONS)
+        print(f"input: {args.files} files, {total / (1 << 20):.0f} MiB, extracting to {out}")
+        print(f"{'writers':>8} {'seconds':>8} {'files/s':>9}")
+        for writers in sorted({1, args.writers}):
+            seconds = best(args.repeat, decrypt_container, str(container), str(out), PASSWORD, workers=writers,
+                           before=clear(out))
+            print(f"{writers:>8} {seconds:>8.2f} {args.files / seconds:>9.0f}")
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
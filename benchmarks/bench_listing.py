@@ -0,0 +1,76 @@
+"""Sort, filter and paging latency of the GUI listing for large containers.
+
+Usage:
+    python benchmarks/bench_listing.py --entries 100000 1000000
+
+For each count, a binary manifest of synthetic entries is decoded as
+``list_container()`` returns it and wrapped in an ``EntryListing``, the
+row order behind the GUI's table model. Reported: the first sort by size
+and by mtime (later sorts by the same key reuse the order), the first
+filter (which builds the lowered path index), a filter matching a few rows
+and one matching every row, and the time to decode one page of rows at a
+random position, as the view does while scrolling. Qt is not needed.
+"""
+import argparse
+import random
+
+from _common import timed
+from securearchive.entrytable import EntryTable
+from securearchive.listing import EntryListing
+from securearchive.manifest import decode_manifest, encode_manifest
+
+
+FILE_SIZE = 4096
+PAGE = 1000
+PAGES = 20
+
+
+def _rel_path(i: int) -> str:
+    return f"project_{i // 100_000:03d}/dir_{i // 1000 % 100:02d}/file_{i:08d}.dat"
+
+
+def _entries(count: int):
+    rng = random.Random(count)
+    table = EntryTable()
+    for i in range(count):
+        table.append(_rel_path(i), rng.randrange(1 << 20), 1_700_000_000.0 + rng.random() * 1e7,
+                     offset=i * FILE_SIZE, length=FILE_SIZE)
+    manifest = {"version": 2, "segment_size": 1 << 20, "extents": [{"offset": 512, "length": count * FILE_SIZE}],
+                "entries": table}
+    return decode_manifest(encode_manifest(manifest))["entries"]
+
+
+def _page(listing: EntryListing, rng: random.Random) -> None:
+    entries = listing.entries
+    first = rng.randrange(max(len(listing) - PAGE, 1))
+    for row in range(first, min(first + PAGE, len(listing))):
+        i = listing.index(row)
+        entries.path(i), entries.sizes[i], entries.mtimes[i]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'size s':>7} {'mtime s':>8} {'index s':>8} {'sparse s':>9} {'dense s':>8} {'page ms':>8}")
+    for count in args.entries:
+        entries = _entries(count)
+        rng = random.Random(count)
+        listing = EntryListing(entries)
+        size_s = timed(listing.sort, "size")
+        mtime_s = timed(listing.sort, "mtime", True)
+        sparse = f"file_{count // 2:08d}"[:-1]
+        index_s = timed(listing.set_filter, sparse)
+        listing.set_filter("")
+        sparse_s = timed(listing.set_filter, sparse)
+        dense_s = timed(listing.set_filter, "file_")
+        listing.set_filter("")
+        page_s = sum(timed(_page, listing, rng) for _ in range(PAGES)) / PAGES
+        print(f"{count:>10} {size_s:>7.2f} {mtime_s:>8.2f} {index_s:>8.2f} {sparse_s:>9.3f} {dense_s:>8.2f} "
+              f"{page_s * 1000:>8.1f}")
+        del entries, listing
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Size, decode time and lookup latency of the binary manifest vs JSON.
+
+Usage:
+    python benchmarks/bench_manifest.py --entries 100000 1000000
+
+For each count, a manifest of synthetic entries is encoded once as JSON
+(the previous on-disk format, with one dict per entry) and once in the
+binary encoding. Reported per format: encoded size, encode and decode
+time, peak traced heap of the decode, the mean latency of looking up one
+random path, and the time to list the first page of 100 entries under a
+directory prefix. Encryption is left out; it costs the same per byte for
+both formats.
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from _common import timed_call
+from securearchive.entrytable import EntryTable
+from securearchive.manifest import decode_manifest, encode_manifest
+
+
+FILE_SIZE = 4096
+SEGMENT_SIZE = 1 << 20
+LOOKUPS = 1000
+PAGE = 100
+
+
+def _rel_path(i: int) -> str:
+    return f"project_{i // 100_000:03d}/dir_{i // 1000 % 100:02d}/file_{i:08d}.dat"
+
+
+def _manifest(count: int) -> dict:
+    table = EntryTable()
+    for i in range(count):
+        table.append(_rel_path(i), FILE_SIZE, 1_700_000_000.0 + i, offset=i * FILE_SIZE, length=FILE_SIZE)
+    return {"version": 2, "segment_size": SEGMENT_SIZE, "extents": [{"offset": 512, "length": count * FILE_SIZE}],
+            "entries": table}
+
+
+def _json_encode(manifest: dict) -> bytes:
+    records = []
+    for e in manifest["entries"]:
+        record = e.to_dict()
+        first = record["offset"] // SEGMENT_SIZE
+        record["segments"] = [first, (record["offset"] + record["length"] - 1) // SEGMENT_SIZE - first + 1]
+        records.append(record)
+    return json.dumps(dict(manifest, entries=records), ensure_ascii=False).encode("utf-8")
+
+
+def _json_decode(data: bytes) -> dict:
+    return json.loads(data.decode("utf-8"))
+
+
+def _json_find(manifest: dict, path: str):
+    for e in manifest["entries"]:
+        if e["path"] == path:
+            return e
+    return None
+
+
+def _json_page(manifest: dict, prefix: str) -> list:
+    return [e for e in manifest["entries"] if e["path"].startswith(prefix)][:PAGE]
+
+
+def _binary_find(manifest: dict, path: str):
+    return manifest["entries"].find(path)
+
+
+def _binary_page(manifest: dict, prefix: str) -> list:
+    entries = manifest["entries"]
+    found = entries.prefix_range(prefix)
+    return [e.to_dict() for e in entries[found.start:min(found.stop, found.start + PAGE)]]
+
+
+def _decode_peak(fn, data: bytes):
+    tracemalloc.start()
+    try:
+        result, seconds = timed_call(fn, data)
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--json-lookups", type=int, default=20, help="Linear JSON lookups are slow; fewer are timed.")
+    args = parser.parse_args()
+
+    formats = [
+        ("json", _json_encode, _json_decode, _json_find, _json_page),
+        ("binary", encode_manifest, decode_manifest, _binary_find, _binary_page),
+    ]
+    print(f"{'entries':>10} {'format':>7} {'MiB':>7} {'encode s':>9} {'decode s':>9} {'decode MiB':>11} "
+          f"{'lookup us':>10} {'page ms':>8}")
+    for count in args.entries:
+        manifest = _manifest(count)
+        rng = random.Random(count)
+        targets = [_rel_path(rng.randrange(count)) for _ in range(LOOKUPS)]
+        prefix = _rel_path(count // 2).rsplit("/", 1)[0] + "/"
+        for name, encode, decode, find, page in formats:
+            data, encode_s = timed_call(encode, manifest)
+            decoded, decode_s, peak = _decode_peak(decode, data)
+            lookups = targets[:args.json_lookups] if name == "json" else targets
+            start = time.perf_counter()
+            for path in lookups:
+                if find(decoded, path) is None:
+                    raise SystemExit(f"{name}: {path} not found")
+            lookup_s = (time.perf_counter() - start) / len(lookups)
+            _rows, page_s = timed_call(page, decoded, prefix)
+            print(f"{count:>10} {name:>7} {len(data) / (1 << 20):>7.1f} {encode_s:>9.2f} {decode_s:>9.2f} "
+                  f"{peak / (1 << 20):>11.1f} {lookup_s * 1e6:>10.0f} {page_s * 1000:>8.1f}")
+            del data, decoded
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Peak Python heap usage of the write paths, measured with tracemalloc.
+
+Usage:
+    python benchmarks/bench_memory.py --size-mb 256
+
+Runs encrypt_path, decrypt_container and change_password (v2) over a
+synthetic payload and exits with status 1 if the traced peak exceeds the
+payload size. Memory mapped container pages are not traced, so the figure
+is the memory the engine itself allocates. A v2 password change only
+rewrites a keyslot; the bounds for the streaming paths and for re-keying
+v1 containers are asserted in tests/test_memory.py.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, make_files, traced_peak
+from securearchive.engine import change_password, decrypt_container, encrypt_path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=128)
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tmp", default=None, help="Scratch directory (defaults to the system temp dir).")
+    args = parser.parse_args()
+
+    payload = args.size_mb << 20
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-mem-", dir=args.tmp))
+    try:
+        src = scratch / "input"
+        make_files(src, args.size_mb, args.files)
+        container = scratch / "bench.secarc"
+
+        results = {
+            "encrypt_path": traced_peak(
+                encrypt_path,
+                str(src),
+                str(container),
+                PASSWORD,
+                iterations=ITERATIONS,
+                workers=args.workers,
+            ),
+            "decrypt_container": traced_peak(
+                decrypt_container,
+                str(container),
+                str(scratch / "output"),
+                PASSWORD,
+                workers=args.workers,
+            ),
+            "change_password": traced_peak(change_password, str(container), PASSWORD, "new", iterations=ITERATIONS),
+        }
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    failed = False
+    print(f"payload: {args.size_mb} MiB")
+    for name, peak in results.items():
+        ok = peak <= payload
+        failed |= not ok
+        status = "ok" if ok else "FAIL"
+        print(f"{name:>17}: peak {peak / (1 << 20):8.2f} MiB ({peak / payload:6.1%} of payload) {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
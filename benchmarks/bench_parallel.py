@@ -0,0 +1,66 @@
+"""Throughput scaling of the segmented engine across worker counts.
+
+Usage:
+    python benchmarks/bench_parallel.py --size-mb 512 --workers 1 2 4 8 16 32
+
+The KDF is run with a minimal iteration count so that the numbers reflect
+AES-GCM and I/O throughput only.
+"""
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, make_files, timed
+from securearchive.engine import (
+    DEFAULT_SEGMENT_SIZE,
+    decrypt_container,
+    encrypt_path,
+    verify_container,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--segment-size", type=int, default=DEFAULT_SEGMENT_SIZE)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--tmp", default=None, help="Scratch directory (defaults to the system temp dir).")
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-bench-", dir=args.tmp))
+    try:
+        src = scratch / "input"
+        make_files(src, args.size_mb, args.files)
+        total_mb = args.size_mb
+
+        print(f"payload: {total_mb} MiB in {args.files} files, segment size {args.segment_size} bytes")
+        print(f"{'workers':>8} {'encrypt MiB/s':>14} {'decrypt MiB/s':>14} {'verify MiB/s':>13}")
+
+        for workers in args.workers:
+            container = scratch / f"bench_{workers}.secarc"
+            out_dir = scratch / f"out_{workers}"
+
+            t_enc = timed(
+                encrypt_path,
+                str(src),
+                str(container),
+                PASSWORD,
+                iterations=ITERATIONS,
+                segment_size=args.segment_size,
+                workers=workers,
+            )
+            t_dec = timed(decrypt_container, str(container), str(out_dir), PASSWORD, workers=workers)
+            t_ver = timed(verify_container, str(container), PASSWORD, workers=workers)
+
+            print(f"{workers:>8} {total_mb / t_enc:>14.1f} {total_mb / t_dec:>14.1f} {total_mb / t_ver:>13.1f}")
+
+            container.unlink()
+            shutil.rmtree(out_dir)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Files per second when encrypting trees of many small files.
+
+Usage:
+    python benchmarks/bench_small_files.py --files 50000 --min-kb 1 --max-kb 16
+
+A tree of random 1-16 KiB files is encrypted with the batched small-file
+reader and once more with every file stored through the per-file path
+(``open`` / ``readinto`` / ``close`` in the writer thread), each the best
+of ``--repeat`` runs. With ``--cold`` the page cache for the tree is
+dropped before every run (``posix_fadvise(DONTNEED)``), which is where
+reading many files at once pays off most. The key derivation is reduced
+to a negligible iteration count so that only scan, reads, compression
+and encryption are timed. Every other file holds repetitive text, so
+compression has work to skip as well as work to do.
+"""
+import argparse
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, best, drop_cache, make_small_files
+from securearchive import engine
+from securearchive.engine import encrypt_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--min-kb", type=int, default=1)
+    parser.add_argument("--max-kb", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--compression", default=None)
+    parser.add_argument("--cold", action="store_true", help="Drop the page cache for the tree before each run.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tmp", default=None, help="Scratch directory (defaults to the system temp dir).")
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-small-", dir=args.tmp))
+    try:
+        src = scratch / "input"
+        total = make_small_files(src, args.files, args.min_kb, args.max_kb, compressible=True)
+        container = scratch / "bench.secarc"
+        options = {
+            "iterations": ITERATIONS,
+            "overwrite": True,
+            "workers": args.workers,
+            "compression": args.compression,
+            "before": (lambda: drop_cache(src)) if args.cold else None,
+        }
+        run = (encrypt_path, str(src), str(container), PASSWORD)
+        print(f"input: {args.files} files, {total / (1 << 20):.0f} MiB, "
+              f"compression {args.compression or 'none'}, {'cold' if args.cold else 'warm'} cache")
+        print(f"{'reader':>9} {'seconds':>8} {'files/s':>9} {'MiB/s':>7}")
+
+        batched = best(args.repeat, *run, **options)
+        small_file_size = engine.SMALL_FILE_SIZE
+        engine.SMALL_FILE_SIZE = -1
+        try:
+            per_file = best(args.repeat, *run, **options)
+        finally:
+            engine.SMALL_FILE_SIZE = small_file_size
+
+        for name, seconds in (("batched", batched), ("per-file", per_file)):
+            print(f"{name:>9} {seconds:>8.2f} {args.files / seconds:>9.0f} {total / (1 << 20) / seconds:>7.1f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
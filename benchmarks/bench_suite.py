@@ -0,0 +1,331 @@
+"""Reproducible benchmark suite over synthetic trees, with baseline comparison.
+
+Usage:
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --baseline results.json --output new.json
+    python benchmarks/bench_suite.py --scale 0.1 --datasets tiny deep
+
+Each dataset is generated from a fixed seed, so every run (and every
+machine) sees the same bytes:
+
+    tiny          many files of 0-4 KiB
+    huge          a few files of hundreds of MiB
+    deep          small files in a hierarchy 16 directories deep
+    compressible  text-like log files, encrypted with zlib compression
+    random        incompressible files of 64 KiB - 2 MiB
+
+``--scale`` multiplies the file counts and sizes. For every dataset,
+``encrypt_path``, ``list_container``, ``verify_container``,
+``decrypt_container`` and ``change_password`` run ``--repeat`` times, each
+run in a fresh process so that its peak RSS is its own. Reported per
+operation: the median wall time (the latency of list and passwd), CPU
+time, throughput over the input bytes, files per second, the peak RSS of
+the process, and the engine's per-phase timings (see OperationStats).
+The key derivation is reduced to ``--iterations`` so that the container
+work dominates; ``list`` and ``passwd`` still include it.
+
+``--output`` writes the results as JSON. With ``--baseline``, a previous
+results file is compared row by row and the run exits with status 1 if
+the median wall time or peak RSS of any operation grew by more than
+``--tolerance``, so the suite can gate a CI job.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from _common import ITERATIONS, PASSWORD
+from securearchive.engine import (
+    change_password,
+    decrypt_container,
+    encrypt_path,
+    list_container,
+    verify_container,
+)
+from securearchive.stats import OperationStats
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+SEED = 20251113
+RESULTS_VERSION = 1
+OPERATIONS = ("encrypt", "list", "verify", "decrypt", "passwd")
+# Differences below these are noise, whatever the ratio.
+MIN_WALL_DELTA = 0.005
+MIN_RSS_DELTA = 4 << 20
+WORDS = (
+    "archive", "segment", "manifest", "keyslot", "extent", "chunk", "worker", "request", "server",
+    "client", "timeout", "retry", "upload", "checksum", "latency", "cache", "error", "ok",
+)
+
+
+def _write_random(path: Path, size: int, rng: random.Random) -> None:
+    path.write_bytes(rng.randbytes(size))
+
+
+def _make_tiny(root: Path, scale: float, rng: random.Random) -> None:
+    for i in range(max(1, int(20_000 * scale))):
+        d = root / f"dir_{i // 500:03d}"
+        d.mkdir(parents=True, exist_ok=True)
+        _write_random(d / f"f_{i:06d}.bin", rng.randint(0, 4096), rng)
+
+
+def _make_huge(root: Path, scale: float, rng: random.Random) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(2):
+        with open(root / f"huge_{i}.bin", "wb") as f:
+            for _ in range(max(1, int(192 * scale))):
+                f.write(rng.randbytes(1 << 20))
+
+
+def _make_deep(root: Path, scale: float, rng: random.Random) -> None:
+    # Path digits in base 4, most significant first: the first levels form
+    # a single chain, the last ones fan out.
+    for i in range(max(1, int(5_000 * scale))):
+        d = root.joinpath(*(f"d{i // 4 ** k % 4}" for k in reversed(range(16))))
+        d.mkdir(parents=True, exist_ok=True)
+        _write_random(d / f"f_{i:05d}.bin", rng.randint(0, 2048), rng)
+
+
+def _make_compressible(root: Path, scale: float, rng: random.Random) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(max(1, int(200 * scale))):
+        lines = []
+        size = 0
+        while size < 256 << 10:
+            line = f"{1_700_000_000 + size} {' '.join(rng.choices(WORDS, k=8))} id={rng.randrange(10 ** 6)}\n"
+            lines.append(line)
+            size += len(line)
+        (root / f"log_{i:04d}.txt").write_text("".join(lines), encoding="ascii")
+
+
+def _make_random(root: Path, scale: float, rng: random.Random) -> None:
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(max(1, int(300 * scale))):
+        _write_random(root / f"r_{i:04d}.bin", rng.randint(64 << 10, 2 << 20), rng)
+
+
+# Name -> (generator, compression used by encrypt).
+DATASETS: Dict[str, Tuple[Callable[[Path, float, random.Random], None], Optional[str]]] = {
+    "tiny": (_make_tiny, None),
+    "huge": (_make_huge, None),
+    "deep": (_make_deep, None),
+    "compressible": (_make_compressible, "zlib"),
+    "random": (_make_random, None),
+}
+
+
+def _tree_size(root: Path) -> Tuple[int, int]:
+    files = total = 0
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            files += 1
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return files, total
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_once(operation: str, src: str, container: str, out: str, compression: Optional[str],
+              iterations: int, workers: int) -> Dict[str, Any]:
+    # Runs in a child process of its own.
+    stats = OperationStats()
+    base_rss = _peak_rss()
+    start = time.perf_counter()
+    if operation == "encrypt":
+        encrypt_path(src, container, PASSWORD, iterations=iterations, overwrite=True, workers=workers,
+                     compression=compression, stats=stats)
+    elif operation == "list":
+        entries = list_container(container, PASSWORD, stats=stats)
+        # Touch every row, as a full listing would.
+        sum(1 for _ in entries)
+    elif operation == "verify":
+        if not verify_container(container, PASSWORD, workers=workers, stats=stats):
+            raise RuntimeError("Verification failed")
+    elif operation == "decrypt":
+        decrypt_container(container, out, PASSWORD, workers=workers, stats=stats)
+    elif operation == "passwd":
+        # Same password, new keyslot: the container stays usable for the next run.
+        change_password(container, PASSWORD, PASSWORD, iterations=iterations, stats=stats)
+    else:
+        raise ValueError(f"Unknown operation: {operation}")
+    wall = time.perf_counter() - start
+    return {"wall": wall, "stats": stats.to_dict(), "peak_rss": _peak_rss(), "base_rss": base_rss}
+
+
+def _measure(operation: str, src: Path, container: Path, scratch: Path, compression: Optional[str],
+             args: argparse.Namespace) -> Dict[str, Any]:
+    runs = []
+    ctx = get_context("spawn")
+    for _ in range(args.repeat):
+        out = scratch / "extracted"
+        shutil.rmtree(out, ignore_errors=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            runs.append(pool.submit(_run_once, operation, str(src), str(container), str(out), compression,
+                                    args.iterations, args.jobs).result())
+        shutil.rmtree(out, ignore_errors=True)
+
+    runs.sort(key=lambda r: r["wall"])
+    median = runs[len(runs) // 2]
+    wall = statistics.median(r["wall"] for r in runs)
+    files, total = _tree_size(src)
+    rss = [r["peak_rss"] for r in runs if r["peak_rss"] is not None]
+    return {
+        "operation": operation,
+        "runs": len(runs),
+        "wall": wall,
+        "wall_min": runs[0]["wall"],
+        "wall_max": runs[-1]["wall"],
+        "cpu": statistics.median(r["stats"]["cpu"] for r in runs),
+        "bytes": total,
+        "entries": files,
+        "throughput": total / wall if wall > 0 else 0.0,
+        "files_per_s": files / wall if wall > 0 else 0.0,
+        "peak_rss": max(rss) if rss else None,
+        "base_rss": min(r["base_rss"] for r in runs) if rss else None,
+        "phases": median["stats"]["phases"],
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "iterations": args.iterations,
+        "jobs": args.jobs,
+    }
+
+
+def _print_row(result: Dict[str, Any], verdict: str = "") -> None:
+    rss = "-" if result["peak_rss"] is None else f"{result['peak_rss'] / (1 << 20):.0f}"
+    print(f"{result['dataset']:<13} {result['operation']:<8} {result['wall']:>9.3f} {result['cpu']:>8.3f} "
+          f"{result['throughput'] / (1 << 20):>9.1f} {result['files_per_s']:>10.0f} {rss:>8} {verdict}")
+
+
+def _compare(result: Dict[str, Any], base: Optional[Dict[str, Any]], tolerance: float) -> Tuple[str, bool]:
+    # Returns the text for the comparison column and whether it is a regression.
+    if base is None:
+        return "(new)", False
+    notes = []
+    regressed = False
+    change = result["wall"] / base["wall"] - 1 if base["wall"] > 0 else 0.0
+    notes.append(f"wall {change:+.1%}")
+    if change > tolerance and result["wall"] - base["wall"] > MIN_WALL_DELTA:
+        regressed = True
+    if result["peak_rss"] and base.get("peak_rss"):
+        rss_change = result["peak_rss"] / base["peak_rss"] - 1
+        notes.append(f"rss {rss_change:+.1%}")
+        if rss_change > tolerance and result["peak_rss"] - base["peak_rss"] > MIN_RSS_DELTA:
+            regressed = True
+    if regressed:
+        notes.append("REGRESSION")
+    return " ".join(notes), regressed
+
+
+def _load_baseline(path: str, meta: Dict[str, Any]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("meta", {}).get("version") != RESULTS_VERSION:
+        raise SystemExit(f"{path}: unsupported results version")
+    for key in ("scale", "iterations", "jobs"):
+        if data["meta"].get(key) != meta[key]:
+            print(f"warning: baseline was run with {key}={data['meta'].get(key)}, this run uses {meta[key]}",
+                  file=sys.stderr)
+    return {(r["dataset"], r["operation"]): r for r in data["results"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", nargs="+", choices=sorted(DATASETS), default=list(DATASETS))
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for file counts and sizes.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS, help="PBKDF2 iterations of the test containers.")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Worker threads (0 = all cores).")
+    parser.add_argument("--output", "-o", default=None, help="Write the results as JSON to this file.")
+    parser.add_argument("--baseline", "-b", default=None, help="Results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown/growth (0.15 = 15%%).")
+    parser.add_argument("--tmp", default=None, help="Scratch directory for trees and containers.")
+    args = parser.parse_args()
+
+    meta = _metadata(args)
+    baseline = _load_baseline(args.baseline, meta) if args.baseline else {}
+    operations = [op for op in OPERATIONS if op in args.operations]
+
+    print(f"revision {meta['revision']}, Python {meta['python']}, {meta['cpus']} CPUs, scale {args.scale}")
+    print(f"{'dataset':<13} {'op':<8} {'seconds':>9} {'cpu s':>8} {'MiB/s':>9} {'files/s':>10} {'rss MiB':>8}")
+    results: List[Dict[str, Any]] = []
+    regressions = 0
+    for name in args.datasets:
+        make, compression = DATASETS[name]
+        scratch = Path(tempfile.mkdtemp(prefix=f"secarc-suite-{name}-", dir=args.tmp))
+        try:
+            src = scratch / "input"
+            make(src, args.scale, random.Random(f"{SEED}-{name}"))
+            container = scratch / "bench.secarc"
+            if operations[0] != "encrypt":
+                # The other operations need a container even if encrypt is not measured.
+                encrypt_path(str(src), str(container), PASSWORD, iterations=args.iterations, workers=args.jobs,
+                             compression=compression)
+            for operation in operations:
+                result = {"dataset": name, **_measure(operation, src, container, scratch, compression, args)}
+                verdict, regressed = "", False
+                if args.baseline:
+                    verdict, regressed = _compare(result, baseline.get((name, operation)), args.tolerance)
+                regressions += regressed
+                _print_row(result, verdict)
+                results.append(result)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+            f.write("\n")
+    if regressions:
+        print(f"{regressions} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
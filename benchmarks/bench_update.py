@@ -0,0 +1,67 @@
+"""Incremental update versus full re-encryption of a mostly unchanged tree.
+
+Usage:
+    python benchmarks/bench_update.py --files 2000 --file-kb 256 --changed 0.001
+
+Encrypts a tree, modifies the given fraction of its files (at least one),
+deletes one file and adds one, then times encrypt_path(update=True)
+against a full encrypt_path run over the same tree.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+from _common import ITERATIONS, PASSWORD, timed
+from securearchive.engine import encrypt_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--file-kb", type=int, default=256)
+    parser.add_argument("--changed", type=float, default=0.001, help="Fraction of files to modify.")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tmp", default=None, help="Scratch directory (defaults to the system temp dir).")
+    args = parser.parse_args()
+
+    scratch = Path(tempfile.mkdtemp(prefix="secarc-update-", dir=args.tmp))
+    try:
+        src = scratch / "input"
+        src.mkdir()
+        for i in range(args.files):
+            (src / f"file_{i:06d}.bin").write_bytes(os.urandom(args.file_kb << 10))
+        container = scratch / "bench.secarc"
+        encrypt_path(str(src), str(container), PASSWORD, iterations=ITERATIONS, workers=args.workers)
+        with open(container, "rb+") as f:
+            os.fsync(f.fileno())
+
+        names = sorted(p.name for p in src.iterdir())
+        changed = random.sample(names, max(1, int(len(names) * args.changed)))
+        for name in changed:
+            (src / name).write_bytes(os.urandom(args.file_kb << 10))
+        (src / names[0]).unlink()
+        (src / "added.bin").write_bytes(os.urandom(args.file_kb << 10))
+
+        t_update = timed(encrypt_path, str(src), str(container), PASSWORD, workers=args.workers, update=True)
+        t_full = timed(
+            encrypt_path,
+            str(src),
+            str(scratch / "full.secarc"),
+            PASSWORD,
+            iterations=ITERATIONS,
+            workers=args.workers,
+        )
+
+        total_mb = args.files * args.file_kb / 1024
+        print(f"tree: {args.files} files, {total_mb:.1f} MiB; {len(changed)} modified, 1 added, 1 deleted")
+        print(f"update:      {t_update:8.3f} s")
+        print(f"full encrypt:{t_full:8.3f} s")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,65 @@
 from .engine import (
     encrypt_path,
+    append_to_container,
     decrypt_container,
+    extract_entry,
     list_container,
     verify_container,
     change_password,
+    add_password,
+    remove_password,
     SecureArchiveError,
     InvalidContainerError,
     WrongPasswordError,
+    EntryNotFoundError,
+    OperationCancelledError,
+    DedupReport,
+    SpaceReport,
+    container_space,
+)
+from .entrytable import EntryTable, EntryView
+from .manifest import PackedEntries
+from .listing import EntryListing
+from .progress import CancelToken, Progress
+from .crypto import calibrate_kdf
+from .stats import OperationStats, PhaseStats, set_stats_hook
+from .keycache import (
+    KeyCache,
+    enable_key_cache,
+    disable_key_cache,
+    wipe_key_cache,
 )
 
 __all__ = [
     "encrypt_path",
+    "append_to_container",
     "decrypt_container",
+    "extract_entry",
     "list_container",
     "verify_container",
     "change_password",
+    "add_password",
+    "remove_password",
     "SecureArchiveError",
     "InvalidContainerError",
     "WrongPasswordError",
+    "EntryNotFoundError",
+    "OperationCancelledError",
+    "DedupReport",
+    "SpaceReport",
+    "container_space",
+    "EntryTable",
+    "EntryView",
+    "PackedEntries",
+    "EntryListing",
+    "CancelToken",
+    "Progress",
+    "OperationStats",
+    "PhaseStats",
+    "set_stats_hook",
+    "calibrate_kdf",
+    "KeyCache",
+    "enable_key_cache",
+    "disable_key_cache",
+    "wipe_key_cache",
 ]
\ No newline at end of file
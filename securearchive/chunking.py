@@ -0,0 +1,122 @@
+import hashlib
+from typing import Any, BinaryIO, Dict, Iterator
+
+try:
+    import numpy
+except ImportError:  # optional; chunking falls back to a pure-Python loop
+    numpy = None
+
+
+MIN_CHUNK_SIZE = 16 * 1024
+AVG_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+READ_SIZE = 1 << 20
+# Bytes covered by the gear hash; older bytes are shifted out.
+WINDOW = 64
+# Positions hashed at a time by the numpy path.
+SCAN_BLOCK = 32 * 1024
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def _gear_table() -> list:
+    # Fixed pseudo-random table derived from SHA-256. Chunk boundaries
+    # depend on it, so changing it breaks deduplication against chunks
+    # already stored in existing containers.
+    return [int.from_bytes(hashlib.sha256(b"secarc-gear" + bytes([i])).digest()[:8], "big") for i in range(256)]
+
+
+def _top_bits_mask(bits: int) -> int:
+    # The high bits of the gear hash cover the last 64 bytes; the low bits
+    # only the last few, so boundaries are decided by the high bits.
+    return ((1 << bits) - 1) << (64 - bits)
+
+
+GEAR = _gear_table()
+_AVG_BITS = AVG_CHUNK_SIZE.bit_length() - 1
+# Normalized chunking: a stricter mask before the average size and a looser
+# one after it keep chunk sizes close to AVG_CHUNK_SIZE.
+MASK_SMALL = _top_bits_mask(_AVG_BITS + 2)
+MASK_LARGE = _top_bits_mask(_AVG_BITS - 2)
+_GEAR_ARRAY = numpy.array(GEAR, dtype=numpy.uint64) if numpy is not None else None
+
+
+def chunking_params() -> Dict[str, Any]:
+    return {
+        "type": "gear-cdc",
+        "min": MIN_CHUNK_SIZE,
+        "avg": AVG_CHUNK_SIZE,
+        "max": MAX_CHUNK_SIZE,
+    }
+
+
+def cut_point(data: bytes | bytearray | memoryview) -> int:
+    """Returns the length of the first content-defined chunk of ``data``.
+
+    A gear rolling hash is updated byte by byte from ``MIN_CHUNK_SIZE`` on;
+    the chunk ends where the hash matches the mask, and at ``MAX_CHUNK_SIZE``
+    at the latest. Boundaries only depend on the preceding 64 bytes, so an
+    insertion early in a file does not shift the chunks after it.
+    """
+    n = len(data)
+    if n <= MIN_CHUNK_SIZE:
+        return n
+    end = min(n, MAX_CHUNK_SIZE)
+    normal = min(AVG_CHUNK_SIZE, end)
+    with memoryview(data) as view:
+        if _GEAR_ARRAY is not None:
+            return _cut_point_numpy(view, normal, end)
+        return _cut_point_python(view, normal, end)
+
+
+def _cut_point_python(view: memoryview, normal: int, end: int) -> int:
+    gear = GEAR
+    h = 0
+    i = MIN_CHUNK_SIZE
+    for mask, stop in ((MASK_SMALL, normal), (MASK_LARGE, end)):
+        for b in view[i:stop]:
+            h = ((h << 1) + gear[b]) & _HASH_MASK
+            i += 1
+            if not h & mask:
+                return i
+    return end
+
+
+def _cut_point_numpy(view: memoryview, normal: int, end: int) -> int:
+    # The hash at position i is sum(GEAR[b[i - k]] << k for k < WINDOW),
+    # modulo 2**64, with bytes before MIN_CHUNK_SIZE counting as zero. Each
+    # block is hashed for all positions at once by doubling the window six
+    # times, starting WINDOW - 1 bytes early so the first positions see
+    # their full window. uint64 arithmetic wraps like the Python loop.
+    for mask, start, stop in ((MASK_SMALL, MIN_CHUNK_SIZE, normal), (MASK_LARGE, normal, end)):
+        bits = numpy.uint64(mask)
+        for lo in range(start, stop, SCAN_BLOCK):
+            hi = min(lo + SCAN_BLOCK, stop)
+            context = max(MIN_CHUNK_SIZE, lo - WINDOW + 1)
+            h = _GEAR_ARRAY[numpy.frombuffer(view[context:hi], dtype=numpy.uint8)]
+            width = 1
+            while width < WINDOW:
+                h[width:] += h[:-width] << numpy.uint64(width)
+                width *= 2
+            hits = numpy.flatnonzero((h[lo - context:] & bits) == 0)
+            if hits.size:
+                return lo + int(hits[0]) + 1
+    return end
+
+
+def iter_chunks(f: BinaryIO) -> Iterator[bytes]:
+    """Splits the remainder of ``f`` into content-defined chunks."""
+    buf = bytearray()
+    eof = False
+    while True:
+        while not eof and len(buf) < MAX_CHUNK_SIZE:
+            block = f.read(READ_SIZE)
+            if block:
+                buf += block
+            else:
+                eof = True
+        if not buf:
+            return
+        n = cut_point(buf)
+        yield bytes(buf[:n])
+        del buf[:n]
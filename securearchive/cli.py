@@ -1,19 +1,40 @@
 import argparse
+import json
 import sys
 from getpass import getpass
 from typing import List
 
 from .engine import (
     encrypt_path,
+    append_to_container,
     decrypt_container,
+    extract_entry,
     list_container as engine_list_container,
     verify_container as engine_verify_container,
     change_password as engine_change_password,
+    add_password as engine_add_password,
+    remove_password as engine_remove_password,
+    container_space as engine_container_space,
     SecureArchiveError,
     InvalidContainerError,
     WrongPasswordError,
+    EntryNotFoundError,
+)
+from .compression import parse_compression
+from .crypto import (
+    CALIBRATION_MAX_MEMORY,
+    CALIBRATION_TARGET,
+    KDF_NAMES,
+    MIN_ITERATIONS,
+    SCRYPT,
+    KdfParams,
+    calibrate_kdf,
+    check_kdf_cost,
+    parse_kdf,
 )
 from .i18n import tr
+from .keycache import disable_key_cache, enable_key_cache
+from .stats import OperationStats
 
 
 def _resolve_lang(lang: str | None) -> str:
@@ -35,7 +56,7 @@ def _prompt_password(lang: str, confirm: bool = False) -> str:
     return pw
 
 
-def _handle_encrypt(args, lang: str):
+def _handle_encrypt(args, lang: str, stats: OperationStats | None = None):
     from pathlib import Path
 
     input_path = args.input
@@ -49,15 +70,44 @@ def _handle_encrypt(args, lang: str):
         sys.exit(1)
 
     dst = Path(output_path)
-    if dst.exists() and not force:
+    updating = args.update and dst.exists()
+    if dst.exists() and not force and not updating:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'encrypt.overwrite_blocked')}", file=sys.stderr)
         sys.exit(1)
 
+    try:
+        parse_compression(args.compression)
+        if args.iterations is not None:
+            check_kdf_cost(parse_kdf(args.kdf), args.iterations)
+    except ValueError as ex:
+        print(f"{tr(lang, 'common.error')}: {ex}", file=sys.stderr)
+        sys.exit(1)
+
     print(tr(lang, "encrypt.start"))
-    password = _prompt_password(lang, confirm=True)
+    password = _prompt_password(lang, confirm=not updating)
 
     try:
-        encrypt_path(input_path, output_path, password, iterations=iterations, overwrite=force)
+        report = encrypt_path(
+            input_path,
+            output_path,
+            password,
+            iterations=iterations,
+            overwrite=force,
+            workers=args.jobs,
+            compression=args.compression,
+            dedup=args.dedup,
+            update=args.update,
+            include=args.include,
+            exclude=args.exclude,
+            kdf=args.kdf,
+            stats=stats,
+        )
+    except InvalidContainerError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.invalid_container')}", file=sys.stderr)
+        sys.exit(1)
+    except WrongPasswordError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.wrong_password')}", file=sys.stderr)
+        sys.exit(1)
     except SecureArchiveError as ex:
         print(f"{tr(lang, 'common.error')}: {ex}", file=sys.stderr)
         sys.exit(1)
@@ -69,14 +119,88 @@ def _handle_encrypt(args, lang: str):
         sys.exit(1)
 
     print(tr(lang, "encrypt.success"))
+    _print_dedup_report(report, lang)
+
+
+def _print_dedup_report(report, lang: str) -> None:
+    if report is None:
+        return
+    print(
+        tr(
+            lang,
+            "encrypt.dedup_report",
+            ratio=report.ratio,
+            logical=report.logical_bytes / (1 << 20),
+            stored=report.stored_bytes / (1 << 20),
+            chunks=report.chunks,
+            unique=report.unique_chunks,
+            throughput=report.throughput / (1 << 20),
+        )
+    )
 
 
-def _handle_decrypt(args, lang: str):
+def _handle_add(args, lang: str, stats: OperationStats | None = None):
+    from pathlib import Path
+
+    if not all(Path(p).exists() for p in args.paths):
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'encrypt.source_missing')}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        parse_compression(args.compression)
+    except ValueError as ex:
+        print(f"{tr(lang, 'common.error')}: {ex}", file=sys.stderr)
+        sys.exit(1)
+
+    print(tr(lang, "add.start"))
+    password = _prompt_password(lang, confirm=False)
+
+    try:
+        report = append_to_container(
+            args.container,
+            args.paths,
+            password,
+            workers=args.jobs,
+            compression=args.compression,
+            include=args.include,
+            exclude=args.exclude,
+            stats=stats,
+        )
+    except InvalidContainerError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.invalid_container')}", file=sys.stderr)
+        sys.exit(1)
+    except WrongPasswordError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.wrong_password')}", file=sys.stderr)
+        sys.exit(1)
+    except FileNotFoundError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'encrypt.source_missing')}", file=sys.stderr)
+        sys.exit(1)
+    except OSError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.io')}", file=sys.stderr)
+        sys.exit(1)
+    except SecureArchiveError as ex:
+        print(f"{tr(lang, 'common.error')}: {ex}", file=sys.stderr)
+        sys.exit(1)
+    except Exception:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.generic')}", file=sys.stderr)
+        sys.exit(1)
+
+    print(tr(lang, "add.success"))
+    _print_dedup_report(report, lang)
+
+
+def _handle_decrypt(args, lang: str, stats: OperationStats | None = None):
     print(tr(lang, "decrypt.start"))
     password = _prompt_password(lang, confirm=False)
 
     try:
-        decrypt_container(args.container, args.output_dir, password)
+        if args.only:
+            extract_entry(args.container, args.only, args.output_dir, password, stats=stats)
+        else:
+            decrypt_container(args.container, args.output_dir, password, workers=args.jobs, stats=stats)
+    except EntryNotFoundError:
+        print(f"{tr(lang, 'common.error')}: {tr(lang, 'decrypt.entry_missing', path=args.only)}", file=sys.stderr)
+        sys.exit(1)
     except InvalidContainerError:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.invalid_container')}", file=sys.stderr)
         sys.exit(1)
@@ -96,12 +220,15 @@ def _handle_decrypt(args, lang: str):
     print(tr(lang, "decrypt.success"))
 
 
-def _handle_list(args, lang: str):
+def _handle_list(args, lang: str, stats: OperationStats | None = None):
     print(tr(lang, "list.start"))
     password = _prompt_password(lang, confirm=False)
 
+    # The key derived for the listing is reused for the space report.
+    enable_key_cache()
     try:
-        entries = engine_list_container(args.container, password)
+        entries = engine_list_container(args.container, password, prefix=args.prefix, stats=stats)
+        space = engine_container_space(args.container, password, stats=stats)
     except InvalidContainerError:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.invalid_container')}", file=sys.stderr)
         sys.exit(1)
@@ -114,54 +241,172 @@ def _handle_list(args, lang: str):
     except Exception:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.generic')}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        disable_key_cache()
 
     print(tr(lang, "list.header"))
-    for e in entries:
+    end = None if args.limit is None else args.offset + args.limit
+    for e in entries[args.offset:end]:
         line = tr(lang, "list.entry", path=e["path"], size=e["size"])
         print(f" - {line}")
+    _print_space(space, lang)
+
+
+def _print_space(space, lang: str):
+    print(tr(lang, "space.dead", dead=space.dead_bytes, size=space.file_size, percent=100 * space.dead_fraction))
 
 
-def _handle_verify(args, lang: str):
+def _handle_verify(args, lang: str, stats: OperationStats | None = None):
     print(tr(lang, "verify.start"))
     password = _prompt_password(lang, confirm=False)
 
+    enable_key_cache()
     try:
-        ok = engine_verify_container(args.container, password)
+        ok = engine_verify_container(args.container, password, workers=args.jobs, stats=stats)
+        space = engine_container_space(args.container, password, stats=stats) if ok else None
     except Exception:
         ok = False
+    finally:
+        disable_key_cache()
 
     if ok:
         print(tr(lang, "verify.success"))
+        _print_space(space, lang)
         sys.exit(0)
     else:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'verify.failure')}", file=sys.stderr)
         sys.exit(1)
 
 
-def _handle_passwd(args, lang: str):
+def _handle_passwd(args, lang: str, stats: OperationStats | None = None):
+    if args.kdf is not None and args.iterations is not None:
+        try:
+            check_kdf_cost(parse_kdf(args.kdf), args.iterations)
+        except ValueError as ex:
+            print(f"{tr(lang, 'common.error')}: {ex}", file=sys.stderr)
+            sys.exit(1)
+
     current_pw = getpass(tr(lang, "password.current"))
-    new_pw = getpass(tr(lang, "password.new"))
-    new_pw_confirm = getpass(tr(lang, "password.new_confirm"))
-    if new_pw != new_pw_confirm:
-        print(f"{tr(lang, 'common.error')}: {tr(lang, 'password.mismatch')}", file=sys.stderr)
-        sys.exit(1)
+    new_pw = None
+    if not args.remove:
+        new_pw = getpass(tr(lang, "password.new"))
+        new_pw_confirm = getpass(tr(lang, "password.new_confirm"))
+        if new_pw != new_pw_confirm:
+            print(f"{tr(lang, 'common.error')}: {tr(lang, 'password.mismatch')}", file=sys.stderr)
+            sys.exit(1)
 
     try:
-        engine_change_password(args.container, current_pw, new_pw, iterations=args.iterations)
+        if args.remove:
+            engine_remove_password(args.container, current_pw, stats=stats)
+        elif args.add:
+            engine_add_password(
+                args.container, current_pw, new_pw, iterations=args.iterations, kdf=args.kdf, stats=stats
+            )
+        else:
+            engine_change_password(
+                args.container, current_pw, new_pw, iterations=args.iterations, kdf=args.kdf, stats=stats
+            )
     except InvalidContainerError:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.invalid_container')}", file=sys.stderr)
         sys.exit(1)
     except WrongPasswordError:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.wrong_password')}", file=sys.stderr)
         sys.exit(1)
-    except SecureArchiveError as ex:
+    except (SecureArchiveError, ValueError) as ex:
         print(f"{tr(lang, 'common.error')}: {ex}", file=sys.stderr)
         sys.exit(1)
     except Exception:
         print(f"{tr(lang, 'common.error')}: {tr(lang, 'error.generic')}", file=sys.stderr)
         sys.exit(1)
 
-    print(tr(lang, "passwd.success"))
+    if args.remove:
+        print(tr(lang, "passwd.removed"))
+    elif args.add:
+        print(tr(lang, "passwd.added"))
+    else:
+        print(tr(lang, "passwd.success"))
+
+
+def _handle_calibrate(args, lang: str):
+    print(tr(lang, "calibrate.start"))
+    target = args.target_ms / 1000
+    for name in args.kdf or KDF_NAMES:
+        algorithm = KDF_NAMES[name]
+        iterations, seconds = calibrate_kdf(algorithm, target, args.max_memory << 20)
+        if algorithm == SCRYPT:
+            mib = KdfParams(iterations, b"", algorithm).memory / (1 << 20)
+            print(tr(lang, "calibrate.scrypt", ms=seconds * 1000, mib=mib, iterations=iterations))
+        else:
+            print(tr(lang, "calibrate.pbkdf2", ms=seconds * 1000, iterations=iterations))
+        if iterations == MIN_ITERATIONS[algorithm] and seconds > target:
+            print(tr(lang, "calibrate.minimum"))
+
+
+def _add_kdf_argument(parser: argparse.ArgumentParser, lang: str) -> None:
+    parser.add_argument("--kdf", choices=sorted(KDF_NAMES), default=None, help=tr(lang, "cli.arg.kdf"))
+
+
+def _add_jobs_argument(parser: argparse.ArgumentParser, lang: str) -> None:
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        metavar="N",
+        help=tr(lang, "cli.arg.jobs"),
+    )
+
+
+def _add_filter_arguments(parser: argparse.ArgumentParser, lang: str) -> None:
+    parser.add_argument("--include", action="append", metavar="GLOB", help=tr(lang, "cli.arg.include"))
+    parser.add_argument("--exclude", action="append", metavar="GLOB", help=tr(lang, "cli.arg.exclude"))
+
+
+def _add_stats_arguments(parser: argparse.ArgumentParser, lang: str) -> None:
+    parser.add_argument("--stats", action="store_true", help=tr(lang, "cli.arg.stats"))
+    parser.add_argument(
+        "--stats-format", choices=("text", "json"), default="text", help=tr(lang, "cli.arg.stats_format")
+    )
+    parser.add_argument("--profile", action="store_true", help=tr(lang, "cli.arg.profile"))
+    parser.add_argument("--trace-memory", action="store_true", help=tr(lang, "cli.arg.trace_memory"))
+
+
+def _print_stats(stats: OperationStats, args, lang: str) -> None:
+    # Goes to stderr, so the regular output of e.g. ``list`` stays clean.
+    if not stats.operation:
+        # The command stopped before the engine was called.
+        return
+    mib = 1 << 20
+    if args.stats and args.stats_format == "json":
+        print(json.dumps(stats.to_dict()), file=sys.stderr)
+    else:
+        if args.stats:
+            summary = tr(
+                lang,
+                "stats.summary",
+                operation=stats.operation,
+                wall=stats.wall,
+                cpu=stats.cpu,
+                mib=stats.bytes / mib,
+                entries=stats.entries,
+                rate=stats.throughput / mib,
+            )
+            print(summary, file=sys.stderr)
+            for name, phase in stats.ordered_phases():
+                line = tr(
+                    lang,
+                    "stats.phase",
+                    phase=name,
+                    wall=phase.wall,
+                    cpu=phase.cpu,
+                    mib=phase.bytes / mib,
+                    rate=phase.throughput / mib,
+                )
+                print(line, file=sys.stderr)
+        if stats.peak_memory is not None:
+            print(tr(lang, "stats.peak_memory", mib=stats.peak_memory / mib), file=sys.stderr)
+    if stats.profile_report:
+        print(stats.profile_report, file=sys.stderr)
 
 
 def main(argv: List[str] | None = None) -> None:
@@ -197,15 +442,53 @@ def main(argv: List[str] | None = None) -> None:
     encrypt_parser.add_argument(
         "--iterations",
         type=int,
-        default=300_000,
+        default=None,
         help=tr(lang, "cli.arg.iterations"),
     )
+    _add_kdf_argument(encrypt_parser, lang)
     encrypt_parser.add_argument(
         "--force",
         "-f",
         action="store_true",
         help=tr(lang, "cli.arg.force"),
     )
+    encrypt_parser.add_argument(
+        "--compression",
+        "-c",
+        metavar="CODEC[:LEVEL]",
+        default=None,
+        help=tr(lang, "cli.arg.compression"),
+    )
+    encrypt_parser.add_argument("--dedup", action="store_true", help=tr(lang, "cli.arg.dedup"))
+    encrypt_parser.add_argument("--update", "-u", action="store_true", help=tr(lang, "cli.arg.update"))
+    _add_filter_arguments(encrypt_parser, lang)
+    _add_jobs_argument(encrypt_parser, lang)
+    _add_stats_arguments(encrypt_parser, lang)
+
+    add_parser = subparsers.add_parser(
+        "add",
+        help=tr(lang, "cli.cmd.add"),
+    )
+    add_parser.add_argument(
+        "container",
+        help=tr(lang, "cli.arg.container"),
+    )
+    add_parser.add_argument(
+        "paths",
+        nargs="+",
+        metavar="PATH",
+        help=tr(lang, "cli.arg.paths"),
+    )
+    add_parser.add_argument(
+        "--compression",
+        "-c",
+        metavar="CODEC[:LEVEL]",
+        default=None,
+        help=tr(lang, "cli.arg.compression"),
+    )
+    _add_filter_arguments(add_parser, lang)
+    _add_jobs_argument(add_parser, lang)
+    _add_stats_arguments(add_parser, lang)
 
     decrypt_parser = subparsers.add_parser(
         "decrypt",
@@ -219,6 +502,14 @@ def main(argv: List[str] | None = None) -> None:
         "output_dir",
         help=tr(lang, "cli.arg.output_dir"),
     )
+    decrypt_parser.add_argument(
+        "--only",
+        metavar="PATH",
+        default=None,
+        help=tr(lang, "cli.arg.only"),
+    )
+    _add_jobs_argument(decrypt_parser, lang)
+    _add_stats_arguments(decrypt_parser, lang)
 
     list_parser = subparsers.add_parser(
         "list",
@@ -228,6 +519,10 @@ def main(argv: List[str] | None = None) -> None:
         "container",
         help=tr(lang, "cli.arg.container"),
     )
+    list_parser.add_argument("--prefix", default=None, metavar="PATH", help=tr(lang, "cli.arg.prefix"))
+    list_parser.add_argument("--offset", type=int, default=0, metavar="N", help=tr(lang, "cli.arg.offset"))
+    list_parser.add_argument("--limit", type=int, default=None, metavar="N", help=tr(lang, "cli.arg.limit"))
+    _add_stats_arguments(list_parser, lang)
 
     verify_parser = subparsers.add_parser(
         "verify",
@@ -237,6 +532,8 @@ def main(argv: List[str] | None = None) -> None:
         "container",
         help=tr(lang, "cli.arg.container"),
     )
+    _add_jobs_argument(verify_parser, lang)
+    _add_stats_arguments(verify_parser, lang)
 
     passwd_parser = subparsers.add_parser(
         "passwd",
@@ -252,20 +549,60 @@ def main(argv: List[str] | None = None) -> None:
         default=None,
         help=tr(lang, "cli.arg.iterations"),
     )
+    passwd_mode = passwd_parser.add_mutually_exclusive_group()
+    passwd_mode.add_argument("--add", action="store_true", help=tr(lang, "cli.arg.add_password"))
+    passwd_mode.add_argument("--remove", action="store_true", help=tr(lang, "cli.arg.remove_password"))
+    _add_kdf_argument(passwd_parser, lang)
+    _add_stats_arguments(passwd_parser, lang)
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate",
+        help=tr(lang, "cli.cmd.calibrate"),
+    )
+    calibrate_parser.add_argument(
+        "--target-ms",
+        type=int,
+        default=int(CALIBRATION_TARGET * 1000),
+        metavar="MS",
+        help=tr(lang, "cli.arg.target_ms"),
+    )
+    calibrate_parser.add_argument("--kdf", choices=sorted(KDF_NAMES), action="append", help=tr(lang, "cli.arg.kdf"))
+    calibrate_parser.add_argument(
+        "--max-memory",
+        type=int,
+        default=CALIBRATION_MAX_MEMORY >> 20,
+        metavar="MIB",
+        help=tr(lang, "cli.arg.max_memory"),
+    )
+    # No engine operation, nothing to time.
+    calibrate_parser.set_defaults(stats=False, profile=False, trace_memory=False)
 
     args = parser.parse_args(argv)
     lang = _resolve_lang(args.lang)
 
-    if args.command == "encrypt":
-        _handle_encrypt(args, lang)
-    elif args.command == "decrypt":
-        _handle_decrypt(args, lang)
-    elif args.command == "list":
-        _handle_list(args, lang)
-    elif args.command == "verify":
-        _handle_verify(args, lang)
-    elif args.command == "passwd":
-        _handle_passwd(args, lang)
-    else:
-        parser.print_help()
-        sys.exit(1)
\ No newline at end of file
+    stats = None
+    if args.stats or args.profile or args.trace_memory:
+        stats = OperationStats(profile=args.profile, trace_memory=args.trace_memory)
+
+    # Handlers leave through sys.exit(); the stats are printed either way.
+    try:
+        if args.command == "encrypt":
+            _handle_encrypt(args, lang, stats)
+        elif args.command == "add":
+            _handle_add(args, lang, stats)
+        elif args.command == "decrypt":
+            _handle_decrypt(args, lang, stats)
+        elif args.command == "list":
+            _handle_list(args, lang, stats)
+        elif args.command == "verify":
+            _handle_verify(args, lang, stats)
+        elif args.command == "passwd":
+            _handle_passwd(args, lang, stats)
+        elif args.command == "calibrate":
+            _handle_calibrate(args, lang)
+        else:
+            parser.print_help()
+            sys.exit(1)
+    finally:
+        if stats is not None:
+            _print_stats(stats, args, lang)
\ No newline at end of file
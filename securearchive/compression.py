@@ -0,0 +1,104 @@
+import bz2
+import lzma
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+CODECS = ("zlib", "lzma", "bz2")
+DEFAULT_LEVELS: Dict[str, int] = {"zlib": 6, "lzma": 6, "bz2": 9}
+LEVEL_RANGES: Dict[str, Tuple[int, int]] = {"zlib": (0, 9), "lzma": (0, 9), "bz2": (1, 9)}
+
+SAMPLE_SIZE = 64 * 1024
+MIN_SAVING = 0.10
+OUTPUT_CHUNK = 1 << 20
+
+
+def parse_compression(spec: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Parses ``"codec"`` or ``"codec:level"``; ``None``/``"none"`` disables compression."""
+    if spec is None:
+        return None
+    codec, _, level_text = spec.strip().lower().partition(":")
+    if codec in ("", "none"):
+        return None
+    if codec not in CODECS:
+        raise ValueError(f"Unknown compression codec: {codec}")
+
+    if not level_text:
+        return codec, DEFAULT_LEVELS[codec]
+    try:
+        level = int(level_text)
+    except ValueError as ex:
+        raise ValueError(f"Invalid compression level: {level_text}") from ex
+    low, high = LEVEL_RANGES[codec]
+    if not low <= level <= high:
+        raise ValueError(f"Compression level for {codec} must be between {low} and {high}")
+    return codec, level
+
+
+def compressor(codec: str, level: int) -> Any:
+    if codec == "zlib":
+        return zlib.compressobj(level)
+    if codec == "lzma":
+        return lzma.LZMACompressor(preset=level)
+    if codec == "bz2":
+        return bz2.BZ2Compressor(level)
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def decompressor(codec: str) -> Any:
+    if codec == "zlib":
+        return zlib.decompressobj()
+    if codec == "lzma":
+        return lzma.LZMADecompressor()
+    if codec == "bz2":
+        return bz2.BZ2Decompressor()
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def try_compress(data: bytes, codec: str, level: int) -> Optional[bytes]:
+    """Compresses ``data`` in one piece; returns ``None`` unless it shrinks by at least ``MIN_SAVING``."""
+    if not data:
+        return None
+    c = compressor(codec, level)
+    compressed = c.compress(data) + c.flush()
+    if len(compressed) > len(data) * (1 - MIN_SAVING):
+        return None
+    return compressed
+
+
+def is_compressible(sample: bytes, codec: str, level: int) -> bool:
+    """Compresses a leading sample of a file and checks that it shrinks by at least ``MIN_SAVING``.
+
+    Already-compressed media, archives and random data fail this test and
+    are stored as-is, so they do not pay the compression cost.
+    """
+    return try_compress(sample, codec, level) is not None
+
+
+def _decompress_chunks(codec: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    d = decompressor(codec)
+    for chunk in chunks:
+        if codec == "zlib":
+            data = chunk
+            while data and not d.eof:
+                yield d.decompress(data, OUTPUT_CHUNK)
+                data = d.unconsumed_tail
+        else:
+            if d.eof:
+                break
+            yield d.decompress(chunk, OUTPUT_CHUNK)
+            while not d.eof and not d.needs_input:
+                yield d.decompress(b"", OUTPUT_CHUNK)
+    if not d.eof:
+        raise ValueError("Compressed stream truncated")
+
+
+def decompress_stream(codec: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decompresses ``chunks`` with output bounded to ``OUTPUT_CHUNK`` bytes per step.
+
+    Codec errors are raised as ``ValueError``.
+    """
+    try:
+        yield from _decompress_chunks(codec, chunks)
+    except (zlib.error, lzma.LZMAError, OSError, EOFError) as ex:
+        raise ValueError(f"Corrupt {codec} stream") from ex
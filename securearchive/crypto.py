@@ -1,34 +1,153 @@
 import os
+import time
 from dataclasses import dataclass
-from typing import Tuple
+from typing import BinaryIO, Iterable, Tuple
 
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 
 
+PBKDF2_SHA512 = "PBKDF2-SHA512"
+SCRYPT = "scrypt"
+# Names accepted by parse_kdf() (CLI --kdf).
+KDF_NAMES = {"pbkdf2": PBKDF2_SHA512, "scrypt": SCRYPT}
+DEFAULT_ITERATIONS = {PBKDF2_SHA512: 300_000, SCRYPT: 1 << 17}
+# calibrate_kdf() never goes below these, however slow the machine.
+MIN_ITERATIONS = {PBKDF2_SHA512: 100_000, SCRYPT: 1 << 14}
+SCRYPT_R = 8
+SCRYPT_P = 1
+# Ceiling for the memory of one scrypt derivation, 128 * r * N * p. Applies
+# to new keyslots and to those read from a container header, which is not
+# authenticated before the key is derived.
+MAX_KDF_MEMORY = 1 << 30
+MAX_SCRYPT_P = 16
+CALIBRATION_TARGET = 0.25
+CALIBRATION_MAX_MEMORY = 256 << 20
+
+
 @dataclass
 class KdfParams:
+    """Key derivation parameters.
+
+    For scrypt, ``iterations`` is the cost parameter N (a power of two) and
+    ``r`` and ``p`` are its block size and parallelism; PBKDF2 ignores them.
+    """
+
     iterations: int
     salt: bytes
+    algorithm: str = PBKDF2_SHA512
+    r: int = SCRYPT_R
+    p: int = SCRYPT_P
+
+    @property
+    def memory(self) -> int:
+        """Bytes of memory one derivation needs (0 for PBKDF2)."""
+        return 128 * self.r * self.iterations * self.p if self.algorithm == SCRYPT else 0
+
+
+def parse_kdf(name: str | None) -> str:
+    """Maps a --kdf name (``pbkdf2``, ``scrypt``) to the algorithm; None is PBKDF2."""
+    if name is None:
+        return PBKDF2_SHA512
+    algorithm = KDF_NAMES.get(name.lower())
+    if algorithm is None:
+        raise ValueError(f"Unknown KDF: {name}")
+    return algorithm
+
+
+def check_kdf_cost(algorithm: str, iterations: int, r: int = SCRYPT_R, p: int = SCRYPT_P) -> None:
+    if iterations <= 0 or iterations >= 1 << 32:
+        raise ValueError("Invalid KDF cost")
+    if algorithm != SCRYPT:
+        return
+    if iterations < 2 or iterations & (iterations - 1):
+        raise ValueError("scrypt N must be a power of two")
+    if not 0 < r <= 0xFF or not 0 < p <= MAX_SCRYPT_P:
+        raise ValueError("Invalid scrypt parameters")
+    if 128 * r * iterations * p > MAX_KDF_MEMORY:
+        raise ValueError(f"scrypt would need more than {MAX_KDF_MEMORY >> 20} MiB")
 
 
 def derive_key(password: str, params: KdfParams, length: int = 32) -> bytes:
-    kdf = PBKDF2HMAC(
-        algorithm=hashes.SHA512(),
-        length=length,
-        salt=params.salt,
-        iterations=params.iterations,
-        backend=default_backend(),
-    )
+    if params.algorithm == SCRYPT:
+        kdf = Scrypt(
+            salt=params.salt,
+            length=length,
+            n=params.iterations,
+            r=params.r,
+            p=params.p,
+            backend=default_backend(),
+        )
+    else:
+        kdf = PBKDF2HMAC(
+            algorithm=hashes.SHA512(),
+            length=length,
+            salt=params.salt,
+            iterations=params.iterations,
+            backend=default_backend(),
+        )
     return kdf.derive(password.encode("utf-8"))
 
 
+def _time_kdf(algorithm: str, iterations: int) -> float:
+    params = KdfParams(iterations=iterations, salt=generate_salt(16), algorithm=algorithm)
+    start = time.perf_counter()
+    derive_key("calibration", params)
+    return time.perf_counter() - start
+
+
+def calibrate_kdf(
+    algorithm: str = PBKDF2_SHA512,
+    target: float = CALIBRATION_TARGET,
+    max_memory: int = CALIBRATION_MAX_MEMORY,
+) -> Tuple[int, float]:
+    """Picks the cost at which one derivation takes about ``target`` seconds here.
+
+    Returns the PBKDF2 iteration count or scrypt N, and the time one
+    derivation took with it. PBKDF2 scales linearly, so the count is
+    extrapolated from a short run and measured again. scrypt's N is doubled
+    as long as a derivation stays within ``target`` and needs at most
+    ``max_memory`` bytes (at most MAX_KDF_MEMORY). The cost never drops
+    below MIN_ITERATIONS, so on a slow machine the time can exceed the
+    target.
+    """
+    floor = MIN_ITERATIONS[algorithm]
+    max_memory = min(max_memory, MAX_KDF_MEMORY)
+    if algorithm == SCRYPT:
+        n = floor
+        elapsed = _time_kdf(SCRYPT, n)
+        while 128 * SCRYPT_R * SCRYPT_P * 2 * n <= max_memory:
+            doubled = _time_kdf(SCRYPT, 2 * n)
+            if doubled > target:
+                break
+            n, elapsed = 2 * n, doubled
+        return n, elapsed
+
+    probe = floor // 10
+    iterations = probe
+    elapsed = _time_kdf(PBKDF2_SHA512, probe)
+    for _ in range(2):
+        iterations = max(floor, int(round(iterations * target / elapsed, -3)))
+        elapsed = _time_kdf(PBKDF2_SHA512, iterations)
+    return iterations, elapsed
+
+
 def generate_salt(size: int = 16) -> bytes:
     return os.urandom(size)
 
 
+DATA_KEY_SIZE = 32
+
+
+def generate_data_key() -> bytes:
+    return os.urandom(DATA_KEY_SIZE)
+
+
 def encrypt_aes_gcm(key: bytes, plaintext: bytes, aad: bytes = b"") -> Tuple[bytes, bytes]:
     nonce = os.urandom(12)
     aesgcm = AESGCM(key)
@@ -38,4 +157,90 @@ def encrypt_aes_gcm(key: bytes, plaintext: bytes, aad: bytes = b"") -> Tuple[byt
 
 def decrypt_aes_gcm(key: bytes, nonce: bytes, ciphertext: bytes, aad: bytes = b"") -> bytes:
     aesgcm = AESGCM(key)
-    return aesgcm.decrypt(nonce, ciphertext, aad)
\ No newline at end of file
+    return aesgcm.decrypt(nonce, ciphertext, aad)
+
+
+def encrypt_aes_gcm_to(
+    key: bytes,
+    nonce: bytes,
+    chunks: Iterable[bytes],
+    out: BinaryIO,
+    aad: bytes = b"",
+) -> None:
+    """Writes ``ciphertext || tag`` exactly as encrypt_aes_gcm() would produce it, chunk by chunk."""
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(nonce)).encryptor()
+    encryptor.authenticate_additional_data(aad)
+    for chunk in chunks:
+        out.write(encryptor.update(chunk))
+    out.write(encryptor.finalize())
+    out.write(encryptor.tag)
+
+
+NONCE_PREFIX_SIZE = 7
+TAG_SIZE = 16
+SUBKEY_SALT_SIZE = 16
+
+# AESGCM.encrypt_into() is only available in newer cryptography releases.
+_HAS_ENCRYPT_INTO = hasattr(AESGCM, "encrypt_into")
+
+SEGMENT_FLAG_DATA = 0x00
+SEGMENT_FLAG_LAST = 0x01
+SEGMENT_FLAG_MANIFEST = 0x02
+
+
+def generate_nonce_prefix(size: int = NONCE_PREFIX_SIZE) -> bytes:
+    return os.urandom(size)
+
+
+class SegmentCipher:
+    """AES-GCM for segmented payloads.
+
+    Each nonce is ``prefix || counter (4 bytes) || flag (1 byte)``. Data
+    segments cannot be reordered, dropped from the end or marked final
+    without failing authentication, and the flag keeps manifest blocks in
+    a nonce space of their own.
+    """
+
+    def __init__(self, key: bytes, nonce_prefix: bytes, aad: bytes = b"") -> None:
+        if len(nonce_prefix) != NONCE_PREFIX_SIZE:
+            raise ValueError("Invalid nonce prefix length")
+        self._key = key
+        self._aesgcm = AESGCM(key)
+        self._prefix = nonce_prefix
+        self._aad = aad
+
+    def subcipher(self, salt: bytes) -> "SegmentCipher":
+        """Same nonces and AAD under a key derived from this one and ``salt``.
+
+        Data written after the container was created uses a fresh random
+        salt, so its counters never repeat a nonce under the same key, even
+        when an earlier attempt left ciphertext behind.
+        """
+        if len(salt) != SUBKEY_SALT_SIZE:
+            raise ValueError("Invalid subkey salt length")
+        hkdf = HKDF(algorithm=hashes.SHA256(), length=len(self._key), salt=salt, info=b"secarc subkey")
+        return SegmentCipher(hkdf.derive(self._key), self._prefix, self._aad)
+
+    def nonce(self, counter: int, flag: int = SEGMENT_FLAG_DATA) -> bytes:
+        return self._prefix + counter.to_bytes(4, "big") + bytes((flag,))
+
+    def encrypt(self, counter: int, plaintext: bytes, flag: int = SEGMENT_FLAG_DATA, aad: bytes = b"") -> bytes:
+        return self._aesgcm.encrypt(self.nonce(counter, flag), plaintext, self._aad + aad)
+
+    def encrypt_into(
+        self,
+        counter: int,
+        plaintext: bytes,
+        buf: bytearray,
+        flag: int = SEGMENT_FLAG_DATA,
+        aad: bytes = b"",
+    ) -> int:
+        nonce = self.nonce(counter, flag)
+        size = len(plaintext) + TAG_SIZE
+        if _HAS_ENCRYPT_INTO:
+            return self._aesgcm.encrypt_into(nonce, plaintext, self._aad + aad, memoryview(buf)[:size])
+        buf[:size] = self._aesgcm.encrypt(nonce, plaintext, self._aad + aad)
+        return size
+
+    def decrypt(self, counter: int, ciphertext: bytes, flag: int = SEGMENT_FLAG_DATA, aad: bytes = b"") -> bytes:
+        return self._aesgcm.decrypt(self.nonce(counter, flag), ciphertext, self._aad + aad)
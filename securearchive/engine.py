@@ -1,24 +1,111 @@
+import errno
+import functools
+import hashlib
+import inspect
+import io
 import json
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, Any, List, Tuple
+import mmap
+import os
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path, PurePath, PureWindowsPath
+from typing import Callable, Deque, Dict, Any, BinaryIO, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from cryptography.exceptions import InvalidTag
 
 from .crypto import (
+    DEFAULT_ITERATIONS,
+    PBKDF2_SHA512,
+    SCRYPT,
+    SCRYPT_P,
+    SCRYPT_R,
     KdfParams,
+    SegmentCipher,
+    check_kdf_cost,
     derive_key,
+    parse_kdf,
     generate_salt,
+    generate_data_key,
     encrypt_aes_gcm,
+    generate_nonce_prefix,
+    encrypt_aes_gcm_to,
     decrypt_aes_gcm,
+    NONCE_PREFIX_SIZE,
+    SUBKEY_SALT_SIZE,
+    TAG_SIZE,
+    DATA_KEY_SIZE,
+    SEGMENT_FLAG_DATA,
+    SEGMENT_FLAG_LAST,
+    SEGMENT_FLAG_MANIFEST,
 )
-from .fsutil import collect_entries, FileEntry
+from .chunking import chunking_params, iter_chunks
+from .keycache import cached_key, derive_key_cached, remember_key
+from .compression import (
+    CODECS,
+    SAMPLE_SIZE,
+    compressor,
+    decompress_stream,
+    is_compressible,
+    parse_compression,
+    try_compress,
+)
+from .entrytable import EntryTable, EntryView
+from .manifest import PackedEntries, decode_manifest, encode_manifest, is_binary_manifest
+from .fsutil import collect_entries
+from .progress import CancelToken, Progress, ProgressCallback
+from .stats import OperationStats, clock
 
 
 MAGIC = b"SECARC01"
-VERSION = 1
+VERSION_V1 = 1
+VERSION_V2 = 2
+VERSION = VERSION_V2
+SUPPORTED_VERSIONS = (VERSION_V1, VERSION_V2)
 PAYLOAD_SEPARATOR = b"\n---PAYLOAD---\n"
 
+DEFAULT_SEGMENT_SIZE = 1 << 20
+MAX_SEGMENT_SIZE = 64 << 20
+MANIFEST_POINTER_SIZE = 20
+MAX_MANIFEST_GENERATION = 0xFFFFFFFF
+
+KDF_EMPTY = 0
+KDF_PBKDF2_SHA512 = 1
+KDF_SCRYPT = 2
+# Keyslot KDF byte by algorithm.
+KDF_IDS = {PBKDF2_SHA512: KDF_PBKDF2_SHA512, SCRYPT: KDF_SCRYPT}
+KEYSLOT_SALT_SIZE = 16
+KEYSLOT_NONCE_SIZE = 12
+KEYSLOT_SIZE = 1 + 4 + KEYSLOT_SALT_SIZE + KEYSLOT_NONCE_SIZE + DATA_KEY_SIZE + TAG_SIZE
+DEFAULT_KEYSLOTS = 8
+MAX_KEYSLOTS = 16
+PREFETCH_SIZE = 4 << 20
+# Worker threads when the caller does not choose: AES-GCM throughput stops
+# scaling after a few threads, and more only add memory (two segments each).
+DEFAULT_WORKERS = 4
+# Files up to SMALL_FILE_SIZE are read in batches of up to SMALL_BATCH_SIZE
+# bytes, on as many threads as the operation has workers.
+SMALL_FILE_SIZE = SAMPLE_SIZE
+SMALL_BATCH_SIZE = 8 << 20
+# Extracted entries up to LARGE_ENTRY_SIZE stored bytes are handed to
+# writer threads (one per worker) in batches of EXTRACT_BATCH_SIZE bytes or
+# EXTRACT_BATCH_FILES files, at most EXTRACT_WINDOW bytes behind the
+# decryption; larger ones are streamed by the caller.
+LARGE_ENTRY_SIZE = 16 << 20
+EXTRACT_BATCH_SIZE = 1 << 20
+EXTRACT_BATCH_FILES = 256
+EXTRACT_WINDOW = 64 << 20
+# Minimum interval between two progress callbacks, in seconds.
+PROGRESS_INTERVAL = 0.1
+
+MAX_HEADER_SIZE = max(
+    8 + 1 + 1 + 255 + 4 + 1 + 255,
+    8 + 1 + 1 + NONCE_PREFIX_SIZE + 4 + 1 + MAX_KEYSLOTS * KEYSLOT_SIZE + MANIFEST_POINTER_SIZE,
+)
+
 
 class SecureArchiveError(Exception):
     """Base exception for all SecureArchive-related errors."""
@@ -35,29 +122,324 @@ class WrongPasswordError(SecureArchiveError):
     pass
 
 
+class EntryNotFoundError(SecureArchiveError):
+    """Raised when a requested path is not part of the container."""
+    pass
+
+
+class OperationCancelledError(SecureArchiveError):
+    """Raised when an operation was stopped through its CancelToken."""
+    pass
+
+
+class _Tracker:
+    """Counts the bytes and entries of one operation for its progress callback.
+
+    Callbacks are rate-limited to one per PROGRESS_INTERVAL and run on the
+    thread that does the work. check() is the cancellation point.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[ProgressCallback] = None,
+        cancel: Optional[CancelToken] = None,
+        stats: Optional[OperationStats] = None,
+    ) -> None:
+        self._callback = callback
+        self._cancel = cancel
+        # The operation's timings travel with the tracker to the writers.
+        self.stats = stats if stats is not None else OperationStats()
+        self._started = time.monotonic()
+        self._reported = 0.0
+        self._phase = "scan"
+        self._bytes_done = self._bytes_total = 0
+        self._entries_done = self._entries_total = 0
+
+    def start(self, phase: str, bytes_total: int = 0, entries_total: int = 0) -> None:
+        self.check()
+        self._phase = phase
+        self._bytes_done, self._bytes_total = 0, bytes_total
+        self._entries_done, self._entries_total = 0, entries_total
+        self._report(force=True)
+        # A cancel from the phase's first report stops it before any work.
+        self.check()
+
+    def check(self) -> None:
+        if self._cancel is not None and self._cancel.cancelled:
+            raise OperationCancelledError("Operation cancelled")
+
+    def advance(self, nbytes: int, entries: int = 0) -> None:
+        self._bytes_done += nbytes
+        self._entries_done += entries
+        self.check()
+        self._report()
+
+    def finish(self) -> None:
+        self.stats.bytes = self._bytes_done
+        self.stats.entries = self._entries_done
+        self._report(force=True)
+
+    def _report(self, force: bool = False) -> None:
+        if self._callback is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._reported < PROGRESS_INTERVAL:
+            return
+        self._reported = now
+        self._callback(Progress(
+            phase=self._phase,
+            bytes_done=self._bytes_done,
+            bytes_total=self._bytes_total,
+            entries_done=self._entries_done,
+            entries_total=self._entries_total,
+            elapsed=now - self._started,
+        ))
+
+
+def _timed(operation: str) -> Callable:
+    # Runs a public engine function inside OperationStats.measure(). The
+    # function always receives a stats object: the caller's, or a fresh one
+    # whose numbers only reach the stats hook. ``stats`` must be keyword-only,
+    # so that a caller cannot pass it where the wrapper does not look.
+    def decorate(fn: Callable) -> Callable:
+        if inspect.signature(fn).parameters["stats"].kind is not inspect.Parameter.KEYWORD_ONLY:
+            raise TypeError(f"{fn.__name__}: stats must be a keyword-only parameter")
+
+        @functools.wraps(fn)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            stats = kwargs.get("stats")
+            if stats is None:
+                kwargs["stats"] = stats = OperationStats()
+            with stats.measure(operation):
+                return fn(*args, **kwargs)
+        return run
+    return decorate
+
+
+@dataclass
+class Keyslot:
+    kdf: int
+    # PBKDF2 iterations or scrypt N; ``r`` and ``p`` are used by scrypt only.
+    iterations: int
+    salt: bytes
+    nonce: bytes
+    wrapped_key: bytes
+    r: int = 0
+    p: int = 0
+
+    @property
+    def algorithm(self) -> str:
+        return SCRYPT if self.kdf == KDF_SCRYPT else PBKDF2_SHA512
+
+    def kdf_params(self) -> KdfParams:
+        if self.kdf == KDF_SCRYPT:
+            return KdfParams(iterations=self.iterations, salt=self.salt, algorithm=SCRYPT, r=self.r, p=self.p)
+        return KdfParams(iterations=self.iterations, salt=self.salt)
+
+
+def _empty_keyslot() -> Keyslot:
+    return Keyslot(
+        kdf=KDF_EMPTY,
+        iterations=0,
+        salt=bytes(KEYSLOT_SALT_SIZE),
+        nonce=bytes(KEYSLOT_NONCE_SIZE),
+        wrapped_key=bytes(DATA_KEY_SIZE + TAG_SIZE),
+    )
+
+
 @dataclass
 class ContainerHeader:
     version: int
     salt: bytes
     iterations: int
     nonce: bytes
+    segment_size: int = 0
+    manifest_offset: int = 0
+    manifest_length: int = 0
+    manifest_generation: int = 0
+    keyslots: List[Keyslot] = field(default_factory=list)
 
 
-def _build_header_bytes(header: ContainerHeader) -> bytes:
-    salt_len = len(header.salt)
-    nonce_len = len(header.nonce)
+@dataclass
+class DedupReport:
+    files: int
+    logical_bytes: int
+    stored_bytes: int
+    chunks: int
+    unique_chunks: int
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.logical_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+    @property
+    def throughput(self) -> float:
+        """Input bytes processed per second."""
+        return self.logical_bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class SpaceReport:
+    """How much of a container file the current manifest generation uses.
+
+    ``dead_bytes`` are held by earlier manifests and by entries and chunks
+    that later generations replaced or dropped. Appends never reuse them;
+    re-encrypting the files into a new container reclaims them.
+    """
+
+    file_size: int
+    dead_bytes: int
+    generations: int
+
+    @property
+    def live_bytes(self) -> int:
+        return self.file_size - self.dead_bytes
+
+    @property
+    def dead_fraction(self) -> float:
+        return self.dead_bytes / self.file_size if self.file_size else 0.0
+
+
+def _static_header_bytes(header: ContainerHeader) -> bytes:
     data = bytearray()
     data.extend(MAGIC)
     data.append(header.version & 0xFF)
-    data.append(salt_len & 0xFF)
+    if header.version >= VERSION_V2:
+        # Keyslots and manifest pointer change over the container's life;
+        # everything before them is fixed and authenticated by every segment.
+        data.append(len(header.nonce) & 0xFF)
+        data.extend(header.nonce)
+        data.extend(header.segment_size.to_bytes(4, "big"))
+        data.append(len(header.keyslots) & 0xFF)
+        return bytes(data)
+
+    data.append(len(header.salt) & 0xFF)
     data.extend(header.salt)
     data.extend(header.iterations.to_bytes(4, "big"))
-    data.append(nonce_len & 0xFF)
+    data.append(len(header.nonce) & 0xFF)
     data.extend(header.nonce)
     return bytes(data)
 
 
-def _parse_header_bytes(data: bytes) -> Tuple[ContainerHeader, bytes]:
+def _kdf_cost_bytes(slot: Keyslot) -> bytes:
+    if slot.kdf == KDF_SCRYPT:
+        # log2(N), r, p
+        return bytes((slot.iterations.bit_length() - 1, slot.r)) + slot.p.to_bytes(2, "big")
+    return slot.iterations.to_bytes(4, "big")
+
+
+def _keyslot_bytes(slot: Keyslot) -> bytes:
+    return (
+        bytes([slot.kdf])
+        + _kdf_cost_bytes(slot)
+        + slot.salt
+        + slot.nonce
+        + slot.wrapped_key
+    )
+
+
+def _build_header_bytes(header: ContainerHeader) -> bytes:
+    data = bytearray(_static_header_bytes(header))
+    if header.version >= VERSION_V2:
+        for slot in header.keyslots:
+            data.extend(_keyslot_bytes(slot))
+        data.extend(_manifest_pointer_bytes(header))
+    return bytes(data)
+
+
+def _manifest_pointer_bytes(header: ContainerHeader) -> bytes:
+    return (
+        header.manifest_offset.to_bytes(8, "big")
+        + header.manifest_length.to_bytes(8, "big")
+        + header.manifest_generation.to_bytes(4, "big")
+    )
+
+
+def _parse_keyslot(data: bytes) -> Keyslot:
+    kdf = data[0]
+    iterations = int.from_bytes(data[1:5], "big")
+    r = p = 0
+    if kdf == KDF_SCRYPT:
+        log_n, r, p = data[1], data[2], int.from_bytes(data[3:5], "big")
+        if not 1 <= log_n <= 31:
+            raise InvalidContainerError("Header corrupt (keyslot)")
+        iterations = 1 << log_n
+        # The header is only authenticated once a key has been derived, so
+        # a crafted cost must not get that far.
+        try:
+            check_kdf_cost(SCRYPT, iterations, r, p)
+        except ValueError as ex:
+            raise InvalidContainerError("Header corrupt (keyslot)") from ex
+    elif kdf not in (KDF_EMPTY, KDF_PBKDF2_SHA512) or (kdf != KDF_EMPTY and iterations <= 0):
+        raise InvalidContainerError("Header corrupt (keyslot)")
+
+    offset = 5
+    salt = data[offset:offset + KEYSLOT_SALT_SIZE]
+    offset += KEYSLOT_SALT_SIZE
+    nonce = data[offset:offset + KEYSLOT_NONCE_SIZE]
+    offset += KEYSLOT_NONCE_SIZE
+    wrapped_key = data[offset:KEYSLOT_SIZE]
+    return Keyslot(
+        kdf=kdf,
+        iterations=iterations,
+        salt=bytes(salt),
+        nonce=bytes(nonce),
+        wrapped_key=bytes(wrapped_key),
+        r=r,
+        p=p,
+    )
+
+
+def _parse_header_v2(data: bytes, offset: int) -> Tuple[ContainerHeader, int]:
+    if len(data) < offset + 1 + NONCE_PREFIX_SIZE + 4 + 1:
+        raise InvalidContainerError("Header too short")
+
+    nonce_len = data[offset]
+    offset += 1
+    if nonce_len != NONCE_PREFIX_SIZE:
+        raise InvalidContainerError("Header corrupt (nonce prefix)")
+    nonce = data[offset:offset + nonce_len]
+    offset += nonce_len
+
+    segment_size = int.from_bytes(data[offset:offset + 4], "big")
+    offset += 4
+    if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+        raise InvalidContainerError("Header corrupt (segment size)")
+
+    slot_count = data[offset]
+    offset += 1
+    if not 0 < slot_count <= MAX_KEYSLOTS:
+        raise InvalidContainerError("Header corrupt (keyslots)")
+    if len(data) < offset + slot_count * KEYSLOT_SIZE + MANIFEST_POINTER_SIZE:
+        raise InvalidContainerError("Header corrupt (keyslots)")
+    keyslots = []
+    for _ in range(slot_count):
+        keyslots.append(_parse_keyslot(data[offset:offset + KEYSLOT_SIZE]))
+        offset += KEYSLOT_SIZE
+
+    manifest_offset = int.from_bytes(data[offset:offset + 8], "big")
+    manifest_length = int.from_bytes(data[offset + 8:offset + 16], "big")
+    manifest_generation = int.from_bytes(data[offset + 16:offset + 20], "big")
+    offset += MANIFEST_POINTER_SIZE
+    if manifest_offset < offset or manifest_length < TAG_SIZE:
+        raise InvalidContainerError("Header corrupt (manifest pointer)")
+
+    header = ContainerHeader(
+        version=VERSION_V2,
+        salt=b"",
+        iterations=0,
+        nonce=bytes(nonce),
+        segment_size=segment_size,
+        manifest_offset=manifest_offset,
+        manifest_length=manifest_length,
+        manifest_generation=manifest_generation,
+        keyslots=keyslots,
+    )
+    return header, offset
+
+
+def _parse_header_bytes(data: bytes) -> Tuple[ContainerHeader, int]:
     if len(data) < 8 + 1 + 1 + 4 + 1:
         raise InvalidContainerError("Header too short")
 
@@ -69,8 +451,10 @@ def _parse_header_bytes(data: bytes) -> Tuple[ContainerHeader, bytes]:
 
     version = data[offset]
     offset += 1
-    if version != VERSION:
+    if version not in SUPPORTED_VERSIONS:
         raise InvalidContainerError("Unsupported version")
+    if version >= VERSION_V2:
+        return _parse_header_v2(data, offset)
 
     salt_len = data[offset]
     offset += 1
@@ -92,202 +476,1843 @@ def _parse_header_bytes(data: bytes) -> Tuple[ContainerHeader, bytes]:
 
     header = ContainerHeader(
         version=version,
-        salt=salt,
+        salt=bytes(salt),
         iterations=iterations,
-        nonce=nonce,
+        nonce=bytes(nonce),
     )
-    remaining = data[offset:]
-    return header, remaining
+    return header, offset
+
+
+def _resolve_workers(workers: int | None) -> int:
+    if workers is None:
+        return min(os.cpu_count() or 1, DEFAULT_WORKERS)
+    if workers == 0:
+        return os.cpu_count() or 1
+    if workers < 0:
+        raise ValueError("workers must not be negative")
+    return workers
+
+
+def _io_workers(workers: int | None) -> int:
+    # File reads and writes follow the operation's worker count, but never
+    # use more threads than there are CPUs.
+    return min(_resolve_workers(workers), os.cpu_count() or 1)
+
+
+class _WorkerPool(ThreadPoolExecutor):
+    def __init__(self, workers: int) -> None:
+        super().__init__(max_workers=workers, thread_name_prefix="securearchive")
+        # Segments in flight at most; bounds memory to a few segments per worker.
+        self.window = max(2 * workers, 4)
+
+
+@contextmanager
+def _worker_pool(workers: int | None, background: bool = False) -> Iterator[Optional[_WorkerPool]]:
+    # AES-GCM runs in native code, so a thread pool is enough to spread
+    # segments over several cores and to overlap them with file I/O.
+    # With ``background`` a single worker is still started, so that
+    # decryption runs ahead of the caller's disk writes.
+    count = _resolve_workers(workers)
+    if count <= 1 and not background:
+        yield None
+        return
+    pool = _WorkerPool(count)
+    try:
+        yield pool
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+@contextmanager
+def _in_background(fn: Any, *args: Any) -> Iterator[Future]:
+    # Runs a key derivation on its own thread. PBKDF2 runs in native code
+    # without holding the GIL, so the caller's scan and I/O proceed
+    # alongside it.
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="secarc-kdf")
+    try:
+        yield executor.submit(fn, *args)
+    finally:
+        executor.shutdown(wait=True)
+
+
+def _prefault(view: memoryview, start: int, end: int) -> None:
+    # Touching one byte per page makes the kernel read the range now, while
+    # the key is still being derived, instead of on first use.
+    for i in range(start, min(end, len(view)), mmap.PAGESIZE):
+        view[i]
+
+
+class _SegmentWriter:
+    def __init__(
+        self,
+        out: BinaryIO,
+        cipher: SegmentCipher,
+        segment_size: int,
+        pool: Optional[_WorkerPool] = None,
+        first_index: int = 0,
+        tracker: Optional[_Tracker] = None,
+    ) -> None:
+        self._out = out
+        self._cipher = cipher
+        self._segment_size = segment_size
+        self._pool = pool
+        self._tracker = tracker
+        self._stats = tracker.stats if tracker is not None else OperationStats()
+        self._pending: Deque[Tuple[Future, Tuple[bytearray, bytearray]]] = deque()
+        self._free: List[Tuple[bytearray, bytearray]] = []
+        self._take_buffers()
+        self._index = first_index
+        self.position = 0
+
+    def _take_buffers(self) -> None:
+        # Plaintext and ciphertext buffers are preallocated once per segment
+        # slot and recycled, so steady-state writing allocates nothing.
+        if self._free:
+            self._buffers = self._free.pop()
+        else:
+            self._buffers = (bytearray(self._segment_size), bytearray(self._segment_size + TAG_SIZE))
+        self._view = memoryview(self._buffers[0])
+        self._fill = 0
+
+    def _encrypt(self, index: int, buffers: Tuple[bytearray, bytearray], fill: int, flag: int) -> memoryview:
+        since = clock()
+        plain, sealed = buffers
+        n = self._cipher.encrypt_into(index, memoryview(plain)[:fill], sealed, flag=flag)
+        self._stats.record("encrypt", since, fill)
+        return memoryview(sealed)[:n]
+
+    def _write_out(self, sealed: memoryview) -> None:
+        since = clock()
+        self._out.write(sealed)
+        self._stats.record("write", since, len(sealed))
+
+    def _drain(self, keep: int) -> None:
+        while len(self._pending) > keep:
+            future, buffers = self._pending.popleft()
+            self._write_out(future.result())
+            self._free.append(buffers)
+
+    def _emit(self, last: bool) -> None:
+        if self._tracker is not None:
+            # Large files are cancelled between segments, not only at the end.
+            self._tracker.check()
+        flag = SEGMENT_FLAG_LAST if last else SEGMENT_FLAG_DATA
+        if self._pool is None:
+            self._write_out(self._encrypt(self._index, self._buffers, self._fill, flag))
+            self._fill = 0
+        else:
+            # The buffers are handed over to the worker; segments are written
+            # back in submission order to keep the file layout sequential.
+            future = self._pool.submit(self._encrypt, self._index, self._buffers, self._fill, flag)
+            self._pending.append((future, self._buffers))
+            self._drain(self._pool.window - 1)
+            self._take_buffers()
+        self._index += 1
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            # A full segment is only flushed once more data arrives, so the
+            # final segment can always be marked as such in close().
+            if self._fill == self._segment_size:
+                self._emit(last=False)
+            n = min(self._segment_size - self._fill, len(view))
+            self._view[self._fill:self._fill + n] = view[:n]
+            self._fill += n
+            self.position += n
+            view = view[n:]
+
+    def write_from(self, f: BinaryIO) -> int:
+        # One "read" record per file: the segments sealed on the way are
+        # timed on their own and taken out.
+        total = 0
+        since = clock()
+        emit_wall = emit_cpu = 0.0
+        while True:
+            if self._fill == self._segment_size:
+                started = clock()
+                self._emit(last=False)
+                done = clock()
+                emit_wall += done[0] - started[0]
+                emit_cpu += done[1] - started[1]
+            n = f.readinto(self._view[self._fill:])
+            if not n:
+                break
+            self._fill += n
+            self.position += n
+            total += n
+        wall, cpu = clock()
+        self._stats.add("read", wall - since[0] - emit_wall, cpu - since[1] - emit_cpu, total, 1)
+        return total
+
+    def close(self) -> None:
+        self._emit(last=True)
+        self._drain(0)
+
+
+def _extent_segments(length: int, segment_size: int) -> Tuple[int, int]:
+    # Returns the segment count of a run of ``length`` ciphertext bytes and
+    # the ciphertext length of its final segment.
+    full = segment_size + TAG_SIZE
+    count = max(1, -(-length // full))
+    last_len = length - (count - 1) * full
+    if last_len < TAG_SIZE:
+        raise InvalidContainerError("Payload truncated")
+    return count, last_len
+
+
+def _extent_cipher(cipher: SegmentCipher, extent: Dict[str, Any]) -> SegmentCipher:
+    # Extents written by appends carry the salt of their subkey.
+    if "salt" not in extent:
+        return cipher
+    try:
+        return cipher.subcipher(bytes.fromhex(extent["salt"]))
+    except (TypeError, ValueError) as ex:
+        raise InvalidContainerError("Extent salt invalid") from ex
+
+
+class _SegmentReader:
+    def __init__(
+        self,
+        view: memoryview,
+        cipher: SegmentCipher,
+        extents: List[Dict[str, int]],
+        segment_size: int,
+        pool: Optional[_WorkerPool] = None,
+        stats: Optional[OperationStats] = None,
+    ) -> None:
+        # Each extent is a run of segments written in one go and closed by a
+        # final segment. Counters continue across extents, so segment ``i``
+        # always holds plaintext offset ``i * segment_size``.
+        self._firsts: List[int] = []
+        self._extents: List[Tuple[int, int, int]] = []
+        self._ciphers: List[SegmentCipher] = []
+        first = 0
+        for extent in extents:
+            count, last_len = _extent_segments(extent["length"], segment_size)
+            self._firsts.append(first)
+            self._extents.append((extent["offset"], extent["offset"] + extent["length"], first + count - 1))
+            self._ciphers.append(_extent_cipher(cipher, extent))
+            first += count
+        if not self._extents:
+            raise InvalidContainerError("Payload truncated")
+
+        self._view = view
+        self._segment_size = segment_size
+        self._full = segment_size + TAG_SIZE
+        self._pool = pool
+        self._stats = stats if stats is not None else OperationStats()
+        self._ahead: Dict[int, Future] = {}
+        self.segment_count = first
+        self.read_ahead_end = first
+        self.plain_length = (first - 1) * segment_size + last_len - TAG_SIZE
+        self._cache_index = -1
+        self._cache = b""
+
+    def _decrypt_segment(self, index: int) -> bytes:
+        k = bisect_right(self._firsts, index) - 1
+        extent_start, extent_end, last_index = self._extents[k]
+        start = extent_start + (index - self._firsts[k]) * self._full
+        end = min(start + self._full, extent_end)
+        flag = SEGMENT_FLAG_LAST if index == last_index else SEGMENT_FLAG_DATA
+        # The ciphertext is read straight from the mapping; the slice is
+        # released right away so the map can be closed afterwards.
+        since = clock()
+        with self._view[start:end] as ciphertext:
+            try:
+                plain = self._ciphers[k].decrypt(index, ciphertext, flag=flag)
+            except InvalidTag as ex:
+                # The data key came out of a keyslot, so the password was
+                # right and the segment itself is damaged.
+                raise InvalidContainerError("Segment authentication failed") from ex
+        self._stats.record("decrypt", since, len(plain))
+        return plain
+
+    def _read_ahead(self, index: int) -> bytes:
+        # Sequential access keeps the next segments in flight on the pool;
+        # a jump elsewhere discards the outstanding read-ahead.
+        end = min(index + self._pool.window, max(self.read_ahead_end, index + 1))
+        for stale in [i for i in self._ahead if not index <= i < end]:
+            self._ahead.pop(stale).cancel()
+        for i in range(index, end):
+            if i not in self._ahead:
+                self._ahead[i] = self._pool.submit(self._decrypt_segment, i)
+        return self._ahead.pop(index).result()
+
+    def read_segment(self, index: int) -> bytes:
+        if index == self._cache_index:
+            return self._cache
+        if not 0 <= index < self.segment_count:
+            raise InvalidContainerError("Segment out of range")
+
+        if self._pool is None:
+            plain = self._decrypt_segment(index)
+        else:
+            plain = self._read_ahead(index)
+
+        self._cache_index = index
+        self._cache = plain
+        return plain
+
+    def iter_range(self, start: int, length: int) -> Iterator[memoryview]:
+        end = start + length
+        if start < 0 or length < 0 or end > self.plain_length:
+            raise InvalidContainerError("Entry out of range")
+        while start < end:
+            index = start // self._segment_size
+            base = index * self._segment_size
+            plain = self.read_segment(index)
+            hi = min(len(plain), end - base)
+            if hi <= start - base:
+                # The range runs into the unused tail of an extent's final segment.
+                raise InvalidContainerError("Entry out of range")
+            yield memoryview(plain)[start - base:hi]
+            start = base + hi
+
+    def read_range(self, start: int, length: int) -> bytes:
+        return b"".join(self.iter_range(start, length))
+
+    def verify_all(self, tracker: _Tracker) -> None:
+        tracker.start("verify", self.plain_length, 0)
+        for index in range(self.segment_count):
+            tracker.advance(len(self.read_segment(index)))
+        tracker.finish()
+
+
+class _LegacyPayload:
+    def __init__(self, data: bytes) -> None:
+        self._data = memoryview(data)
+        self.plain_length = len(data)
+
+    def iter_range(self, start: int, length: int) -> Iterator[memoryview]:
+        if start < 0 or length < 0 or start + length > self.plain_length:
+            raise InvalidContainerError("Entry out of range")
+        yield self._data[start:start + length]
+
+    def verify_all(self, tracker: _Tracker) -> None:
+        # The v1 payload was authenticated as a whole when it was opened.
+        tracker.start("verify", self.plain_length, 0)
+        tracker.advance(self.plain_length)
+        tracker.finish()
+
+
+@contextmanager
+def _replace_atomically(path: Path) -> Iterator[Path]:
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
 
+@contextmanager
+def _atomic_write(path: Path) -> Iterator[BinaryIO]:
+    with _replace_atomically(path) as tmp:
+        with open(tmp, "wb") as out:
+            yield out
 
+
+def _keyslot_aad(header: ContainerHeader, slot: Keyslot) -> bytes:
+    # Binds the wrapped key to this container and to the slot's KDF settings.
+    return _static_header_bytes(header) + _keyslot_bytes(slot)[:1 + 4 + KEYSLOT_SALT_SIZE]
+
+
+def _derive_key(password: str, params: KdfParams, stats: OperationStats) -> bytes:
+    with stats.phase("kdf"):
+        return derive_key(password, params)
+
+
+def _seal_keyslot(
+    header: ContainerHeader,
+    data_key: bytes,
+    password: str,
+    algorithm: str,
+    iterations: int,
+    stats: OperationStats,
+) -> Keyslot:
+    salt = generate_salt(KEYSLOT_SALT_SIZE)
+    with stats.phase("kdf"):
+        kek = derive_key_cached(password, KdfParams(iterations=iterations, salt=salt, algorithm=algorithm))
+    slot = _empty_keyslot()
+    slot.kdf = KDF_IDS[algorithm]
+    slot.iterations = iterations
+    if algorithm == SCRYPT:
+        slot.r, slot.p = SCRYPT_R, SCRYPT_P
+    slot.salt = salt
+    slot.nonce, slot.wrapped_key = encrypt_aes_gcm(kek, data_key, aad=_keyslot_aad(header, slot))
+    return slot
+
+
+def _open_keyslots(header: ContainerHeader, password: str, stats: OperationStats) -> Tuple[bytes, int]:
+    # Each active slot costs one key derivation; the first slot whose
+    # wrapped key authenticates yields the data key. The wrapped keys double
+    # as the password check: a wrong password is rejected here, before any
+    # part of the payload or the manifest is read.
+    for index, slot in enumerate(header.keyslots):
+        if slot.kdf == KDF_EMPTY:
+            continue
+        params = slot.kdf_params()
+        kek = cached_key(password, params) or _derive_key(password, params, stats)
+        try:
+            data_key = decrypt_aes_gcm(kek, slot.nonce, slot.wrapped_key, aad=_keyslot_aad(header, slot))
+        except InvalidTag:
+            continue
+        # Only keys that opened a slot are cached, not the misses of a
+        # password that belongs to another slot.
+        remember_key(password, params, kek)
+        return data_key, index
+    raise WrongPasswordError("Wrong password")
+
+
+def _write_keyslot(container_path: str, header: ContainerHeader, index: int, stats: OperationStats) -> None:
+    offset = len(_static_header_bytes(header)) + index * KEYSLOT_SIZE
+    with stats.phase("write", KEYSLOT_SIZE), open(container_path, "r+b") as f:
+        f.seek(offset)
+        f.write(_keyslot_bytes(header.keyslots[index]))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _kdf_block(iterations: int, salt: bytes) -> Dict[str, Any]:
+    return {
+        "type": PBKDF2_SHA512,
+        "iterations": iterations,
+        "salt_hex": salt.hex(),
+    }
+
+
+def _keyslot_kdf_block(algorithm: str, iterations: int) -> Dict[str, Any]:
+    # The v2 manifest records the KDF the container was created with; the
+    # salts live in the keyslots.
+    if algorithm == SCRYPT:
+        return {"type": SCRYPT, "n": iterations, "r": SCRYPT_R, "p": SCRYPT_P, "keyslots": DEFAULT_KEYSLOTS}
+    return {"type": PBKDF2_SHA512, "iterations": iterations, "keyslots": DEFAULT_KEYSLOTS}
+
+
+def _keyslot_kdf(slot: Keyslot, kdf: Optional[str], iterations: Optional[int]) -> Tuple[str, int]:
+    # KDF for a new keyslot: by default the same as ``slot``'s; a different
+    # algorithm starts from its default cost.
+    algorithm = slot.algorithm if kdf is None else parse_kdf(kdf)
+    if iterations is None:
+        iterations = slot.iterations if algorithm == slot.algorithm else DEFAULT_ITERATIONS[algorithm]
+    check_kdf_cost(algorithm, iterations)
+    return algorithm, iterations
+
+
+def _segment_span(offset: int, length: int, segment_size: int) -> List[int]:
+    first = offset // segment_size
+    if length == 0:
+        return [first, 0]
+    last = (offset + length - 1) // segment_size
+    return [first, last - first + 1]
+
+
+class _ContainerWriter:
+    def __init__(
+        self,
+        out: BinaryIO,
+        header: ContainerHeader,
+        key: bytes,
+        pool: Optional[_WorkerPool] = None,
+        extents: Optional[List[Dict[str, int]]] = None,
+        tracker: Optional[_Tracker] = None,
+    ) -> None:
+        self._out = out
+        self._header = header
+        self._header_bytes = _build_header_bytes(header)
+        self._cipher = SegmentCipher(key, header.nonce, aad=_static_header_bytes(header))
+        self._pool = pool
+        self.tracker = tracker or _Tracker()
+        self._salt: Optional[bytes] = None
+        if extents is None:
+            out.write(self._header_bytes)
+            extents = []
+        else:
+            # Appending: earlier extents and manifests are left untouched and
+            # the new run of segments starts at the end of the file. Counters
+            # continue from the committed extents only, so an append that
+            # died before its commit may have used them already; the new
+            # extent and manifest are sealed under a subkey of a fresh salt.
+            out.seek(0, os.SEEK_END)
+            self._salt = generate_salt(SUBKEY_SALT_SIZE)
+            self._cipher = self._cipher.subcipher(self._salt)
+        self._extents = extents
+        first = sum(_extent_segments(e["length"], header.segment_size)[0] for e in extents)
+        self._start_extent(first)
+
+    def _start_extent(self, first_index: int) -> None:
+        self._base = first_index * self._header.segment_size
+        self._extent_offset = self._out.tell()
+        self._segments = _SegmentWriter(
+            self._out,
+            self._cipher,
+            self._header.segment_size,
+            self._pool,
+            first_index=first_index,
+            tracker=self.tracker,
+        )
+
+    def _close_extent(self) -> None:
+        self._segments.close()
+        extent = {"offset": self._extent_offset, "length": self._out.tell() - self._extent_offset}
+        if self._salt is not None:
+            extent["salt"] = self._salt.hex()
+        self._extents.append(extent)
+
+    @property
+    def position(self) -> int:
+        return self._base + self._segments.position
+
+    @property
+    def segment_size(self) -> int:
+        return self._header.segment_size
+
+    def write(self, data: bytes) -> None:
+        self._segments.write(data)
+
+    def write_from(self, f: BinaryIO) -> int:
+        return self._segments.write_from(f)
+
+    def write_manifest(self, manifest: Dict[str, Any], sync: bool = False) -> None:
+        self._close_extent()
+        manifest["extents"] = self._extents
+
+        stats = self.tracker.stats
+        since = clock()
+        manifest_bytes = encode_manifest(manifest)
+        salt = self._salt or b""
+        self._header.manifest_offset = self._out.tell()
+        self._header.manifest_length = len(salt) + len(manifest_bytes) + TAG_SIZE
+        sealed = self._cipher.encrypt(
+            self._header.manifest_generation,
+            manifest_bytes,
+            flag=SEGMENT_FLAG_MANIFEST,
+            aad=_manifest_pointer_bytes(self._header),
+        )
+        stats.record("manifest", since, len(manifest_bytes))
+        with stats.phase("write", len(salt) + len(sealed)):
+            self._out.write(salt)
+            self._out.write(sealed)
+        if sync:
+            self._out.flush()
+            os.fsync(self._out.fileno())
+
+    def commit(self, sync: bool = False) -> None:
+        # Until the pointer is patched, readers still see the previous
+        # manifest generation.
+        self._out.seek(len(self._header_bytes) - MANIFEST_POINTER_SIZE)
+        self._out.write(_manifest_pointer_bytes(self._header))
+        if sync:
+            self._out.flush()
+            os.fsync(self._out.fileno())
+
+    def finish(self, manifest: Dict[str, Any]) -> None:
+        # A new container gets its complete header last, so the keyslots
+        # can still be sealed while the payload is being written.
+        self.write_manifest(manifest)
+        self._out.seek(0)
+        self._out.write(_build_header_bytes(self._header))
+
+
+def _store_file(
+    writer: _ContainerWriter, path: Path, compression: Optional[Tuple[str, int]]
+) -> Tuple[Optional[str], int]:
+    # Returns the codec and the number of bytes read, which differs from the
+    # scanned size if the file was written to in between.
+    # Unbuffered reads land directly in the segment buffer.
+    stats = writer.tracker.stats
+    with open(path, "rb", buffering=0) as f:
+        if compression is None:
+            writer.write_from(f)
+            return None, f.tell()
+
+        codec, level = compression
+        since = clock()
+        sample = f.read(SAMPLE_SIZE)
+        stats.record("read", since, len(sample))
+        with stats.phase("compress"):
+            compressible = is_compressible(sample, codec, level)
+        if not compressible:
+            writer.write(sample)
+            writer.write_from(f)
+            return None, f.tell()
+
+        c = compressor(codec, level)
+        chunk = sample
+        while chunk:
+            with stats.phase("compress", len(chunk)):
+                data = c.compress(chunk)
+            writer.write(data)
+            since = clock()
+            chunk = f.read(DEFAULT_SEGMENT_SIZE)
+            stats.record("read", since, len(chunk), entries=0 if chunk else 1)
+        writer.write(c.flush())
+        return codec, f.tell()
+
+
+class _ChunkStore:
+    """Writes each distinct content-defined chunk to the container once."""
+
+    def __init__(
+        self,
+        writer: _ContainerWriter,
+        compression: Optional[Tuple[str, int]],
+        records: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        self._writer = writer
+        self._compression = compression
+        self._stats = writer.tracker.stats
+        # Chunks already stored in the container are reused by new files.
+        self.records: List[Dict[str, Any]] = list(records or [])
+        self._index: Dict[bytes, int] = {bytes.fromhex(r["sha256"]): i for i, r in enumerate(self.records)}
+        self._existing = len(self.records)
+        self._files = 0
+        self._references = 0
+        self._logical_bytes = 0
+        self._stored_bytes = 0
+
+    def _store(self, chunk: bytes, digest: bytes) -> Dict[str, Any]:
+        data = chunk
+        codec = None
+        if self._compression is not None:
+            with self._stats.phase("compress", len(chunk)):
+                compressed = try_compress(chunk, *self._compression)
+            if compressed is not None:
+                data = compressed
+                codec = self._compression[0]
+
+        record = {
+            "offset": self._writer.position,
+            "length": len(data),
+            "size": len(chunk),
+            "sha256": digest.hex(),
+        }
+        if codec is not None:
+            record["codec"] = codec
+        self._writer.write(data)
+        self._stored_bytes += len(data)
+        return record
+
+    def add_file(self, path: Path) -> Tuple[List[int], int]:
+        chunk_ids: List[int] = []
+        size = 0
+        stats = self._stats
+        with open(path, "rb", buffering=0) as f:
+            # Reading and finding the cut points happen inside iter_chunks();
+            # both count as "chunk".
+            since = clock()
+            for chunk in iter_chunks(f):
+                stats.record("chunk", since, len(chunk))
+                with stats.phase("hash", len(chunk)):
+                    digest = hashlib.sha256(chunk).digest()
+                chunk_id = self._index.get(digest)
+                if chunk_id is None:
+                    chunk_id = len(self.records)
+                    self._index[digest] = chunk_id
+                    self.records.append(self._store(chunk, digest))
+                chunk_ids.append(chunk_id)
+                size += len(chunk)
+                since = clock()
+
+        self._files += 1
+        self._references += len(chunk_ids)
+        self._logical_bytes += size
+        return chunk_ids, size
+
+    def report(self, seconds: float) -> DedupReport:
+        return DedupReport(
+            files=self._files,
+            logical_bytes=self._logical_bytes,
+            stored_bytes=self._stored_bytes,
+            chunks=self._references,
+            unique_chunks=len(self.records) - self._existing,
+            seconds=seconds,
+        )
+
+
+# Marks a file that was larger than scanned when read in a batch.
+_GREW = -1
+
+
+def _read_files(
+    paths: List[str],
+    sizes: List[int],
+    view: memoryview,
+    compression: Optional[Tuple[str, int]],
+    stats: OperationStats,
+) -> List[Tuple[int, Optional[bytes]]]:
+    # Reads each file into the next ``size`` bytes of ``view``. Returns the
+    # bytes read per file (_GREW if the file has more than its scanned size)
+    # and, with ``compression``, the compressed data if it is worth keeping.
+    # A small file is its own compression sample.
+    results: List[Tuple[int, Optional[bytes]]] = []
+    probe = bytearray(1)
+    pos = 0
+    since = clock()
+    # Compression time, taken out of the read time at the end.
+    compress_wall = compress_cpu = 0.0
+    for path, size in zip(paths, sizes):
+        slot = view[pos:pos + size]
+        with io.FileIO(path, "r") as f:
+            n = 0
+            while n < size:
+                got = f.readinto(slot[n:])
+                if not got:
+                    break
+                n += got
+            if n == size and f.readinto(probe):
+                n = _GREW
+        compressed = None
+        if compression is not None and n > 0:
+            started = clock()
+            compressed = try_compress(slot[:n], *compression)
+            done = clock()
+            compress_wall += done[0] - started[0]
+            compress_cpu += done[1] - started[1]
+        results.append((n, compressed))
+        pos += size
+    wall, cpu = clock()
+    nbytes = sum(n for n, _compressed in results if n > 0)
+    if compression is not None:
+        stats.add("compress", compress_wall, compress_cpu, nbytes)
+    stats.add("read", wall - since[0] - compress_wall, cpu - since[1] - compress_cpu, nbytes, len(paths))
+    return results
+
+
+class _SmallFileBatches:
+    """Reads runs of small files into preallocated buffers ahead of the writer.
+
+    Per-file ``open``/``read`` calls dominate for trees of small files. Each
+    run of files up to SMALL_FILE_SIZE is read, split over ``workers``
+    threads, straight into its slot of a batch buffer that was sized from
+    the scanned sizes; with compression the workers compress them too.
+    The next batch is read while the current one is encrypted.
+    """
+
+    def __init__(
+        self,
+        files: EntryTable,
+        compression: Optional[Tuple[str, int]],
+        stats: OperationStats,
+        workers: int,
+    ) -> None:
+        self._files = files
+        self._compression = compression
+        self._stats = stats
+        self._workers = workers
+        small = sum(size for size in files.sizes if size <= SMALL_FILE_SIZE)
+        self._buffer_size = min(small, SMALL_BATCH_SIZE)
+        self._free: List[bytearray] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="secarc-read")
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, start: int, end: int) -> Tuple[bytearray, List[Future]]:
+        """Starts reading rows ``start`` to ``end``; returns the buffer and one future per part."""
+        buffer = self._free.pop() if self._free else bytearray(self._buffer_size)
+        paths = [self._files.source_path(i) for i in range(start, end)]
+        sizes = self._files.sizes[start:end].tolist()
+        view = memoryview(buffer)
+        if self._pool is None:
+            future: Future = Future()
+            future.set_result(_read_files(paths, sizes, view, self._compression, self._stats))
+            return buffer, [future]
+
+        parts = []
+        step = -(-len(paths) // self._workers)
+        pos = 0
+        for lo in range(0, len(paths), step):
+            hi = lo + step
+            parts.append(
+                self._pool.submit(_read_files, paths[lo:hi], sizes[lo:hi], view[pos:], self._compression, self._stats)
+            )
+            pos += sum(sizes[lo:hi])
+        return buffer, parts
+
+    def release(self, buffer: bytearray) -> None:
+        self._free.append(buffer)
+
+
+def _plan_batches(sizes: Sequence[int]) -> Iterator[Tuple[int, int, bool]]:
+    # Splits the rows into (start, end, small) runs: runs of small files that
+    # fit one batch buffer, and single larger files.
+    start = total = 0
+    for i, size in enumerate(sizes):
+        if size > SMALL_FILE_SIZE:
+            if start < i:
+                yield start, i, True
+            yield i, i + 1, False
+            start, total = i + 1, 0
+            continue
+        if total + size > SMALL_BATCH_SIZE and start < i:
+            yield start, i, True
+            start, total = i, 0
+        total += size
+    if start < len(sizes):
+        yield start, len(sizes), True
+
+
+def _store_batch(
+    writer: _ContainerWriter,
+    files: EntryTable,
+    start: int,
+    buffer: bytearray,
+    parts: List[Future],
+    compression: Optional[Tuple[str, int]],
+) -> None:
+    results = [r for part in parts for r in part.result()]
+    view = memoryview(buffer)
+    if compression is None and all(n == files.sizes[start + k] for k, (n, _c) in enumerate(results)):
+        # Nothing changed since the scan: the whole run goes out in one write.
+        position = writer.position
+        writer.write(view[:sum(n for n, _c in results)])
+        for k, (n, _c) in enumerate(results):
+            files.set_stored(start + k, position, n)
+            position += n
+        writer.tracker.advance(sum(files.sizes[start:start + len(results)]), len(results))
+        return
+
+    pos = 0
+    for k, (n, compressed) in enumerate(results):
+        i = start + k
+        position = writer.position
+        scanned = files.sizes[i]
+        if n == _GREW:
+            # Written to while the tree was scanned; stored as it is now.
+            codec, n = _store_file(writer, Path(files.source_path(i)), compression)
+        elif compressed is not None:
+            writer.write(compressed)
+            codec = compression[0]
+        else:
+            writer.write(view[pos:pos + n])
+            codec = None
+        files.set_stored(i, position, writer.position - position, codec)
+        files.sizes[i] = n
+        pos += scanned
+    writer.tracker.advance(pos, len(results))
+
+
+def _scan(src: Path, include: Iterable[str] | None, exclude: Iterable[str] | None, stats: OperationStats) -> EntryTable:
+    since = clock()
+    entries = collect_entries(src, include, exclude)
+    stats.record("scan", since, entries=len(entries))
+    return entries
+
+
+def _store_entries(
+    writer: _ContainerWriter,
+    files: EntryTable,
+    compression: Optional[Tuple[str, int]],
+    store: Optional[_ChunkStore],
+    workers: int | None,
+) -> EntryTable:
+    # The scanned table is filled in with the stored ranges and becomes the
+    # manifest's entry table.
+    tracker = writer.tracker
+    tracker.start("encrypt", sum(files.sizes), len(files))
+    if store is not None:
+        # In dedup mode entries reference chunks in a shared table instead
+        # of owning a byte range of the payload.
+        for i in range(len(files)):
+            chunk_ids, size = store.add_file(files.abs_path(i))
+            files.sizes[i] = size
+            files.set_chunks(i, chunk_ids)
+            tracker.advance(size, 1)
+        return files
+
+    batches = _SmallFileBatches(files, compression, tracker.stats, _io_workers(workers))
+    try:
+        # At most one batch is read ahead, so two buffers are in use.
+        pending: Deque[Tuple[int, bytearray, List[Future]]] = deque()
+        for start, end, small in _plan_batches(files.sizes):
+            if small:
+                pending.append((start, *batches.submit(start, end)))
+                if len(pending) < 2:
+                    continue
+            while len(pending) > (1 if small else 0):
+                first, buffer, parts = pending.popleft()
+                _store_batch(writer, files, first, buffer, parts, compression)
+                batches.release(buffer)
+            if not small:
+                position = writer.position
+                scanned = files.sizes[start]
+                codec, files.sizes[start] = _store_file(writer, files.abs_path(start), compression)
+                files.set_stored(start, position, writer.position - position, codec)
+                tracker.advance(scanned, 1)
+        while pending:
+            first, buffer, parts = pending.popleft()
+            _store_batch(writer, files, first, buffer, parts, compression)
+    finally:
+        batches.close()
+    return files
+
+
+@_timed("encrypt")
 def encrypt_path(
     input_path: str,
     container_path: str,
     password: str,
-    iterations: int = 300_000,
+    iterations: int | None = None,
     overwrite: bool = False,
-) -> None:
+    segment_size: int = DEFAULT_SEGMENT_SIZE,
+    workers: int | None = None,
+    compression: str | None = None,
+    dedup: bool = False,
+    update: bool = False,
+    include: Iterable[str] | None = None,
+    exclude: Iterable[str] | None = None,
+    kdf: str | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> Optional[DedupReport]:
+    """Encrypts a file or directory tree into a new container.
+
+    ``kdf`` is ``"pbkdf2"`` (the default) or ``"scrypt"``; ``iterations`` is
+    the PBKDF2 iteration count or the scrypt N and defaults to
+    crypto.DEFAULT_ITERATIONS. crypto.calibrate_kdf() finds a cost for a
+    target latency on the current machine.
+
+    ``include``/``exclude`` glob patterns and ``.secarcignore`` files select
+    the files to archive; see fsutil.collect_entries().
+
+    ``workers`` threads encrypt segments and read files; the default is one
+    per CPU up to DEFAULT_WORKERS, ``0`` uses every CPU.
+
+    ``progress`` is called with a Progress snapshot as files are stored.
+    Cancelling through ``cancel`` raises OperationCancelledError and leaves
+    no container behind (with ``update``, the previous state).
+
+    With ``update`` an existing container is brought in line with the tree
+    in place: new and modified files (by size and mtime) are appended,
+    unchanged entries are kept as they are and deleted files are dropped.
+    The container's own KDF, segment size and dedup settings are kept.
+
+    ``stats`` (an OperationStats) is filled in with the time and volume of
+    each phase; the other engine functions take it as well.
+    """
     src = Path(input_path)
     if not src.exists():
         raise FileNotFoundError(input_path)
 
     dst = Path(container_path)
-    if dst.exists() and not overwrite:
+    if dst.exists() and not overwrite and not update:
         raise FileExistsError(container_path)
 
-    entries: List[FileEntry] = collect_entries(src)
-    if not entries:
-        raise SecureArchiveError("Input path contains no files.")
-
-    salt = generate_salt(16)
-    kdf_params = KdfParams(iterations=iterations, salt=salt)
-    key = derive_key(password, kdf_params)
-
+    if not 0 < segment_size <= MAX_SEGMENT_SIZE:
+        raise ValueError("Invalid segment size")
+    algorithm = parse_kdf(kdf)
+    if iterations is None:
+        iterations = DEFAULT_ITERATIONS[algorithm]
+    check_kdf_cost(algorithm, iterations)
+    codec_spec = parse_compression(compression)
+    tracker = _Tracker(progress, cancel, stats)
+    tracker.start("scan")
+
+    if update and dst.exists():
+        # The container is unlocked while the tree is scanned; a wrong
+        # password is reported before any file is read.
+        with _in_background(_unlock_appendable, container_path, password, stats, "update") as unlocking:
+            entries = _scan(src, include, exclude, stats)
+            target = unlocking.result()
+        if not entries:
+            raise SecureArchiveError("Input path contains no files.")
+        return _update_container(container_path, target, src, entries, workers, codec_spec, tracker)
+
+    # The payload is encrypted with a random data key; the password only
+    # wraps that key in a header keyslot. Since the data key does not
+    # depend on the password, the keyslot is sealed on a background thread
+    # while the tree is scanned and the payload written.
+    key = generate_data_key()
+    header = ContainerHeader(
+        version=VERSION,
+        salt=b"",
+        iterations=0,
+        nonce=generate_nonce_prefix(),
+        segment_size=segment_size,
+        keyslots=[_empty_keyslot() for _ in range(DEFAULT_KEYSLOTS)],
+    )
     manifest: Dict[str, Any] = {
         "version": VERSION,
         "cipher": "AES-256-GCM",
-        "kdf": {
-            "type": "PBKDF2-SHA512",
-            "iterations": iterations,
-            "salt_hex": salt.hex(),
-        },
+        "kdf": _keyslot_kdf_block(algorithm, iterations),
         "root": str(src.resolve()),
+        "segment_size": segment_size,
         "entries": [],
     }
 
-    data_chunks = bytearray()
-    current_offset = 0
+    with _in_background(_seal_keyslot, header, key, password, algorithm, iterations, stats) as sealing:
+        entries = _scan(src, include, exclude, stats)
+        if not entries:
+            raise SecureArchiveError("Input path contains no files.")
 
-    for e in entries:
-        with open(e.abs_path, "rb") as f:
-            content = f.read()
-        start = current_offset
-        data_chunks.extend(content)
-        length = len(content)
-        current_offset += length
-
-        manifest["entries"].append(
-            {
-                "path": e.rel_path,
-                "size": e.size,
-                "mtime": e.mtime,
-                "offset": start,
-                "length": length,
-            }
-        )
+        with _worker_pool(workers) as pool, _atomic_write(dst) as out:
+            writer = _ContainerWriter(out, header, key, pool, tracker=tracker)
+            store = _ChunkStore(writer, codec_spec) if dedup else None
+            started = time.perf_counter()
 
-    manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
-    payload = manifest_bytes + PAYLOAD_SEPARATOR + bytes(data_chunks)
+            manifest["entries"] = _store_entries(writer, entries, codec_spec, store, workers)
+            if store is not None:
+                manifest["chunking"] = chunking_params()
+                manifest["chunks"] = store.records
+            header.keyslots[0] = sealing.result()
+            writer.finish(manifest)
+            tracker.finish()
 
-    nonce, ciphertext = encrypt_aes_gcm(key, payload, aad=MAGIC)
-
-    header = ContainerHeader(
-        version=VERSION,
-        salt=salt,
-        iterations=iterations,
-        nonce=nonce,
-    )
-    header_bytes = _build_header_bytes(header)
-
-    with open(dst, "wb") as out:
-        out.write(header_bytes)
-        out.write(ciphertext)
+    if store is None:
+        return None
+    return store.report(time.perf_counter() - started)
 
 
-def _load_and_decrypt(container_path: str, password: str) -> Tuple[Dict[str, Any], bytes, ContainerHeader]:
+@contextmanager
+def _map_container(container_path: str) -> Iterator[memoryview]:
     p = Path(container_path)
     if not p.exists() or not p.is_file():
         raise FileNotFoundError(container_path)
 
     with open(p, "rb") as f:
-        file_data = f.read()
-
-    header, ciphertext = _parse_header_bytes(file_data)
-
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as ex:
+            raise InvalidContainerError("Header too short") from ex
+        try:
+            with memoryview(mapped) as view:
+                yield view
+        finally:
+            mapped.close()
+
+
+def _read_header(view: memoryview) -> Tuple[ContainerHeader, bytes]:
+    data = bytes(view[:MAX_HEADER_SIZE])
+    header, header_len = _parse_header_bytes(data)
+    return header, data[:header_len]
+
+
+def _decrypt_v1(
+    view: memoryview,
+    header: ContainerHeader,
+    header_len: int,
+    password: str,
+    stats: OperationStats,
+) -> Tuple[Dict[str, Any], memoryview]:
     kdf_params = KdfParams(iterations=header.iterations, salt=header.salt)
-    key = derive_key(password, kdf_params)
+    key = cached_key(password, kdf_params)
+    if key is None:
+        # The whole payload has to be read for the single GCM tag; it is
+        # paged in while the key is derived.
+        with _in_background(_derive_key, password, kdf_params, stats) as deriving:
+            _prefault(view, header_len, len(view))
+            key = deriving.result()
+
+    with view[header_len:] as ciphertext, stats.phase("decrypt", len(ciphertext) - TAG_SIZE):
+        try:
+            plaintext = decrypt_aes_gcm(key, header.nonce, ciphertext, aad=MAGIC)
+        except InvalidTag as ex:
+            raise WrongPasswordError("Decryption failed") from ex
+    remember_key(password, kdf_params, key)
+
+    split = plaintext.find(PAYLOAD_SEPARATOR)
+    if split < 0:
+        raise InvalidContainerError("Payload separator missing")
 
     try:
-        plaintext = decrypt_aes_gcm(key, header.nonce, ciphertext, aad=MAGIC)
-    except InvalidTag as ex:
-        raise WrongPasswordError("Decryption failed") from ex
+        with stats.phase("manifest", split):
+            manifest = json.loads(plaintext[:split].decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as ex:
+        raise InvalidContainerError("Manifest JSON invalid") from ex
 
-    try:
-        manifest_part, data_part = plaintext.split(PAYLOAD_SEPARATOR, 1)
-    except ValueError as ex:
-        raise InvalidContainerError("Payload separator missing") from ex
+    return manifest, memoryview(plaintext)[split + len(PAYLOAD_SEPARATOR):]
+
+
+def _load_and_decrypt(
+    container_path: str,
+    password: str,
+    stats: OperationStats,
+) -> Tuple[Dict[str, Any], memoryview, ContainerHeader]:
+    with _map_container(container_path) as view:
+        header, header_bytes = _read_header(view)
+        if header.version != VERSION_V1:
+            raise InvalidContainerError("Unsupported version")
+        manifest, data_part = _decrypt_v1(view, header, len(header_bytes), password, stats)
+    return manifest, data_part, header
+
+
+def _load_manifest_v2(
+    view: memoryview,
+    header: ContainerHeader,
+    cipher: SegmentCipher,
+    stats: OperationStats,
+) -> Dict[str, Any]:
+    end = header.manifest_offset + header.manifest_length
+    if end > len(view):
+        raise InvalidContainerError("Manifest truncated")
+
+    with stats.phase("manifest", header.manifest_length - TAG_SIZE):
+        return _decode_manifest_block(view[header.manifest_offset:end], header, cipher)
+
+
+def _decode_manifest_block(block: memoryview, header: ContainerHeader, cipher: SegmentCipher) -> Dict[str, Any]:
+    salt_size = 0
+    if header.manifest_generation > 0:
+        # Manifests written by appends start with the salt of their subkey.
+        salt_size = SUBKEY_SALT_SIZE
+        if len(block) < salt_size + TAG_SIZE:
+            raise InvalidContainerError("Manifest truncated")
+        cipher = cipher.subcipher(bytes(block[:salt_size]))
+    with block, block[salt_size:] as ciphertext:
+        try:
+            manifest_bytes = cipher.decrypt(
+                header.manifest_generation,
+                ciphertext,
+                flag=SEGMENT_FLAG_MANIFEST,
+                aad=_manifest_pointer_bytes(header),
+            )
+        except InvalidTag as ex:
+            raise InvalidContainerError("Manifest authentication failed") from ex
+
+    if is_binary_manifest(manifest_bytes):
+        try:
+            return decode_manifest(manifest_bytes)
+        except ValueError as ex:
+            raise InvalidContainerError(str(ex)) from ex
 
     try:
-        manifest = json.loads(manifest_part.decode("utf-8"))
-    except json.JSONDecodeError as ex:
+        return json.loads(manifest_bytes.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as ex:
         raise InvalidContainerError("Manifest JSON invalid") from ex
 
-    return manifest, data_part, header
+
+def _unlock_v2(
+    view: memoryview,
+    header: ContainerHeader,
+    password: str,
+    stats: OperationStats,
+) -> Tuple[bytes, SegmentCipher, Dict[str, Any]]:
+    # While the keyslots are opened, the manifest block is paged in. The
+    # payload is left alone: listing and wrong passwords never touch it.
+    with _in_background(_open_keyslots, header, password, stats) as unlocking:
+        _prefault(view, header.manifest_offset, header.manifest_offset + header.manifest_length)
+        key, _slot = unlocking.result()
+    cipher = SegmentCipher(key, header.nonce, aad=_static_header_bytes(header))
+    return key, cipher, _load_manifest_v2(view, header, cipher, stats)
+
+
+def _manifest_extents(manifest: Dict[str, Any], header: ContainerHeader, header_len: int) -> List[Dict[str, int]]:
+    extents = manifest.get("extents")
+    if extents is None:
+        # Written in one go: a single extent between header and manifest.
+        return [{"offset": header_len, "length": header.manifest_offset - header_len}]
+
+    for e in extents:
+        if e["offset"] < header_len or e["offset"] + e["length"] > header.manifest_offset:
+            raise InvalidContainerError("Extent out of range")
+    return extents
+
+
+@contextmanager
+def _open_container(
+    container_path: str,
+    password: str,
+    stats: OperationStats,
+    workers: int | None = 1,
+    pipeline: bool = False,
+    prefetch: bool = False,
+) -> Iterator[Tuple[Dict[str, Any], Any, int, ContainerHeader]]:
+    with _map_container(container_path) as view:
+        header, header_bytes = _read_header(view)
+        if header.version == VERSION_V1:
+            manifest, data_part = _decrypt_v1(view, header, len(header_bytes), password, stats)
+            yield manifest, _LegacyPayload(data_part), len(data_part), header
+            return
+
+        # Only the header and the manifest block are touched here; data
+        # segments are paged in and decrypted lazily by the reader.
+        _key, cipher, manifest = _unlock_v2(view, header, password, stats)
+        extents = _manifest_extents(manifest, header, len(header_bytes))
+        with _worker_pool(workers, background=pipeline) as pool:
+            if prefetch and pool is not None and extents:
+                # The key is verified; the start of the payload is paged in
+                # ahead of the reader.
+                start = extents[0]["offset"]
+                pool.submit(_prefault, view, start, min(start + PREFETCH_SIZE, header.manifest_offset))
+            reader = _SegmentReader(view, cipher, extents, header.segment_size, pool, stats)
+            yield manifest, reader, reader.plain_length, header
+
+
+def _check_range(record: Dict[str, Any], data_length: int) -> bool:
+    offset = record["offset"]
+    length = record["length"]
+    if offset < 0 or length < 0:
+        return False
+    if offset + length > data_length:
+        return False
+    return record.get("codec", CODECS[0]) in CODECS
 
 
-def decrypt_container(container_path: str, output_path: str, password: str) -> None:
-    manifest, data_part, _header = _load_and_decrypt(container_path, password)
+def _check_entries(entries: List[Dict[str, Any]], data_length: int, chunks: List[Dict[str, Any]]) -> bool:
+    for e in entries:
+        if "chunks" not in e:
+            if not _check_range(e, data_length):
+                return False
+            continue
+        for chunk_id in e["chunks"]:
+            if not 0 <= chunk_id < len(chunks):
+                return False
+            if not _check_range(chunks[chunk_id], data_length):
+                return False
+    return True
 
-    out_root = Path(output_path)
-    out_root.mkdir(parents=True, exist_ok=True)
 
-    for entry in manifest.get("entries", []):
-        rel_path = entry["path"]
-        offset = entry["offset"]
-        length = entry["length"]
-        chunk = data_part[offset:offset + length]
+def _check_paths(entries: Iterable[Any]) -> None:
+    # Entry paths are joined onto the output directory; an absolute path, a
+    # drive or a ".." component would place the file outside of it. Both
+    # separators are checked so a container cannot rely on the platform.
+    for e in entries:
+        path = PureWindowsPath(e["path"])
+        if not e["path"] or path.drive or path.root or ".." in path.parts:
+            raise InvalidContainerError(f"Unsafe entry path: {e['path']!r}")
 
-        target_path = out_root / rel_path
-        target_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(target_path, "wb") as f:
-            f.write(chunk)
 
+def _stored_records(entry: Dict[str, Any], chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # A plain entry is its own single stored range; a deduplicated entry
+    # is the concatenation of the chunks it references.
+    if "chunks" not in entry:
+        return [entry]
+    return [chunks[i] for i in entry["chunks"]]
 
-def list_container(container_path: str, password: str) -> List[Dict[str, Any]]:
-    manifest, _data_part, _header = _load_and_decrypt(container_path, password)
-    return manifest.get("entries", [])
+
+def _entry_offset(entry: Dict[str, Any], chunks: List[Dict[str, Any]]) -> int:
+    records = _stored_records(entry, chunks)
+    return records[0]["offset"] if records else 0
+
+
+def _preallocate(f: BinaryIO, size: int) -> None:
+    # Reserving the blocks up front keeps the file contiguous and reports a
+    # full disk before any data is written.
+    if size <= 0 or not hasattr(os, "posix_fallocate"):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError as ex:
+        if ex.errno not in (errno.EOPNOTSUPP, errno.ENOSYS, errno.EINVAL):
+            raise
+
+
+def _write_file(path: str, size: int, records: Iterable[Tuple[Optional[str], Iterable[memoryview]]]) -> None:
+    # ``records`` are the (codec, plaintext pieces) of the entry's stored
+    # ranges, in order.
+    written = 0
+    with open(path, "wb") as f:
+        _preallocate(f, size)
+        for codec, pieces in records:
+            if codec is None:
+                for piece in pieces:
+                    written += f.write(piece)
+                continue
+            try:
+                for piece in decompress_stream(codec, pieces):
+                    written += f.write(piece)
+            except ValueError as ex:
+                raise InvalidContainerError("Compressed entry corrupt") from ex
+        if written < size:
+            # The file shrank while it was archived; drop the reserved tail.
+            f.truncate(written)
+
+
+def _write_files(
+    batch: List[Tuple[str, int, List[Tuple[Optional[str], List[memoryview]]]]], stats: OperationStats
+) -> None:
+    since = clock()
+    for path, size, records in batch:
+        _write_file(path, size, records)
+    stats.record("write", since, sum(size for _path, size, _records in batch), len(batch))
+
+
+def _restore_mtimes(items: List[Tuple[str, float]], atime: float, stats: OperationStats) -> None:
+    with stats.phase("write"):
+        for path, mtime in items:
+            os.utime(path, (atime, mtime))
+
+
+class _EntryWriter:
+    """Writes extracted entries below ``out_root``.
+
+    Entries are passed in payload order by the thread that decrypts them.
+    Each directory is created once. Files are preallocated and written on
+    ``workers`` threads, so their open/write/close calls overlap instead of
+    adding up. Stored mtimes are restored in one pass in finish(), once no
+    more writes can touch them.
+    """
+
+    def __init__(self, out_root: Path, workers: int, stats: OperationStats) -> None:
+        self._root = str(out_root)
+        self._dirs = {self._root}
+        self._workers = workers
+        self._stats = stats
+        self._pool: Optional[ThreadPoolExecutor] = None
+        if workers > 1:
+            self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="secarc-write")
+        self._pending: Deque[Tuple[Future, int]] = deque()
+        self._pending_bytes = 0
+        self._batch: List[Tuple[str, int, List[Tuple[Optional[str], List[memoryview]]]]] = []
+        self._batch_bytes = 0
+        self._mtimes: List[Tuple[str, float]] = []
+
+    def _make_parent(self, path: str) -> None:
+        parent = os.path.dirname(path)
+        if parent in self._dirs:
+            return
+        os.makedirs(parent, exist_ok=True)
+        while parent not in self._dirs and parent != os.path.dirname(parent):
+            self._dirs.add(parent)
+            parent = os.path.dirname(parent)
+
+    def _drain(self, max_bytes: int, max_batches: int) -> None:
+        while self._pending and (self._pending_bytes > max_bytes or len(self._pending) > max_batches):
+            future, stored = self._pending.popleft()
+            future.result()
+            self._pending_bytes -= stored
+
+    def _submit(self) -> None:
+        # Small files go to the threads in batches; one task per file would
+        # cost more in scheduling than the file takes to write.
+        if not self._batch:
+            return
+        self._pending.append((self._pool.submit(_write_files, self._batch, self._stats), self._batch_bytes))
+        self._pending_bytes += self._batch_bytes
+        self._batch = []
+        self._batch_bytes = 0
+        self._drain(EXTRACT_WINDOW, 2 * self._workers)
+
+    def write(self, entry: Any, payload: Any, chunks: List[Dict[str, Any]]) -> str:
+        path = os.path.join(self._root, entry["path"])
+        self._make_parent(path)
+        records = _stored_records(entry, chunks)
+        stored = sum(r["length"] for r in records)
+        size = entry.get("size", 0)
+        if self._pool is None or stored > LARGE_ENTRY_SIZE:
+            # Pulling the pieces can wait on their segments, so this "write"
+            # time includes any decryption not done ahead.
+            since = clock()
+            _write_file(path, size, ((r.get("codec"), payload.iter_range(r["offset"], r["length"])) for r in records))
+            self._stats.record("write", since, size, 1)
+        else:
+            # The decrypted segments are immutable; the views stay valid
+            # until the worker is done with them.
+            data = [(r.get("codec"), list(payload.iter_range(r["offset"], r["length"]))) for r in records]
+            self._batch.append((path, size, data))
+            self._batch_bytes += stored
+            if self._batch_bytes >= EXTRACT_BATCH_SIZE or len(self._batch) >= EXTRACT_BATCH_FILES:
+                self._submit()
+        mtime = entry.get("mtime")
+        if mtime is not None:
+            self._mtimes.append((path, mtime))
+        return path
+
+    def finish(self) -> None:
+        if self._pool is not None:
+            self._submit()
+        self._drain(-1, -1)
+        atime = time.time()
+        if self._pool is None:
+            _restore_mtimes(self._mtimes, atime, self._stats)
+            return
+        step = max(1, -(-len(self._mtimes) // self._workers))
+        parts = [self._mtimes[i:i + step] for i in range(0, len(self._mtimes), step)]
+        for future in [self._pool.submit(_restore_mtimes, part, atime, self._stats) for part in parts]:
+            future.result()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+@_timed("decrypt")
+def decrypt_container(
+    container_path: str,
+    output_path: str,
+    password: str,
+    workers: int | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> None:
+    """Extracts all entries below ``output_path``.
+
+    ``progress`` and ``cancel`` work as in encrypt_path(); files already
+    written when an extraction is cancelled are kept.
+    """
+    # Segments are decrypted on background workers a bounded window ahead
+    # of the writer, so disk writes of earlier entries overlap decryption
+    # of later segments.
+    with _open_container(container_path, password, stats, workers, pipeline=True, prefetch=True) as (
+        manifest,
+        payload,
+        data_length,
+        _header,
+    ):
+        entries = manifest.get("entries", [])
+        chunks = manifest.get("chunks", [])
+        if not _check_entries(entries, data_length, chunks):
+            raise InvalidContainerError("Entry out of range")
+        _check_paths(entries)
+
+        tracker = _Tracker(progress, cancel, stats)
+        tracker.start("decrypt", sum(e["size"] for e in entries), len(entries))
+
+        out_root = Path(output_path)
+        out_root.mkdir(parents=True, exist_ok=True)
+        writer = _EntryWriter(out_root, _io_workers(workers), stats)
+        try:
+            for entry in sorted(entries, key=lambda e: _entry_offset(e, chunks)):
+                writer.write(entry, payload, chunks)
+                tracker.advance(entry["size"], 1)
+            writer.finish()
+            tracker.finish()
+        finally:
+            writer.close()
+
+
+def _find_entry(entries: Sequence[Any], entry_path: str) -> Any:
+    wanted = PurePath(entry_path).as_posix()
+    if isinstance(entries, PackedEntries):
+        # Binary manifests are sorted by path: a binary search usually hits.
+        entry = entries.find(wanted)
+        if entry is not None:
+            return entry
+    for e in entries:
+        if PurePath(e["path"]).as_posix() == wanted:
+            return e
+    raise EntryNotFoundError(entry_path)
 
 
-def verify_container(container_path: str, password: str) -> bool:
+@_timed("extract")
+def extract_entry(
+    container_path: str,
+    entry_path: str,
+    output_path: str,
+    password: str,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> Path:
+    with _open_container(container_path, password, stats, pipeline=True) as (manifest, payload, data_length, header):
+        entry = _find_entry(manifest.get("entries", []), entry_path)
+        chunks = manifest.get("chunks", [])
+        if not _check_entries([entry], data_length, chunks):
+            raise InvalidContainerError("Entry out of range")
+        _check_paths([entry])
+
+        # Only the segments listed in the entry index are read and decrypted.
+        if header.version >= VERSION_V2:
+            if "chunks" not in entry:
+                span = _segment_span(entry["offset"], entry["length"], header.segment_size)
+                # Binary manifests derive the span instead of storing it.
+                if "segments" in entry and entry["segments"] != span:
+                    raise InvalidContainerError("Entry index mismatch")
+            payload.read_ahead_end = max(
+                (sum(_segment_span(r["offset"], r["length"], header.segment_size))
+                 for r in _stored_records(entry, chunks)),
+                default=0,
+            )
+
+        tracker = _Tracker(progress, cancel, stats)
+        tracker.start("decrypt", entry["size"], 1)
+        out_root = Path(output_path)
+        out_root.mkdir(parents=True, exist_ok=True)
+        writer = _EntryWriter(out_root, workers=1, stats=stats)
+        target_path = writer.write(entry, payload, chunks)
+        writer.finish()
+        tracker.advance(entry["size"], 1)
+        tracker.finish()
+        return Path(target_path)
+
+
+@_timed("list")
+def list_container(
+    container_path: str,
+    password: str,
+    prefix: str | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> Sequence[EntryView]:
+    """Returns the container's entries, optionally only those under ``prefix``.
+
+    For binary manifests the result decodes rows lazily, sorted by path, and
+    slicing it fetches one page; JSON manifests are loaded into an
+    EntryTable. Rows support item access like the manifest dicts
+    (``e["path"]``).
+    """
+    with _open_container(container_path, password, stats) as (manifest, _payload, _data_length, _header):
+        entries = manifest.get("entries", [])
+    stats.entries = len(entries)
+    if not isinstance(entries, PackedEntries):
+        entries = EntryTable.from_records(entries)
+        if prefix is None:
+            return entries
+        return [e for e in entries if e.path.startswith(prefix)]
+    if prefix is None:
+        return entries
+    found = entries.prefix_range(prefix)
+    return entries[found.start:found.stop]
+
+
+@_timed("verify")
+def verify_container(
+    container_path: str,
+    password: str,
+    workers: int | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> bool:
+    tracker = _Tracker(progress, cancel, stats)
     try:
-        manifest, data_part, _header = _load_and_decrypt(container_path, password)
+        with _open_container(container_path, password, stats, workers) as (manifest, payload, data_length, _header):
+            payload.verify_all(tracker)
+            return _check_entries(manifest.get("entries", []), data_length, manifest.get("chunks", []))
+    except OperationCancelledError:
+        raise
     except WrongPasswordError:
         return False
     except SecureArchiveError:
         return False
 
-    entries = manifest.get("entries", [])
-    max_offset = 0
-    for e in entries:
-        offset = e["offset"]
-        length = e["length"]
-        if offset < 0 or length < 0:
-            return False
-        end = offset + length
-        if end > max_offset:
-            max_offset = end
-
-    if max_offset > len(data_part):
-        return False
 
-    return True
+def _dead_bytes(manifest: Dict[str, Any], header: ContainerHeader, header_len: int, file_size: int) -> int:
+    # Everything between the header and the current manifest that is not an
+    # extent held an earlier manifest. Inside the extents, stored bytes that
+    # no current entry references were replaced or dropped.
+    extents = _manifest_extents(manifest, header, header_len)
+    stored = 0
+    for extent in extents:
+        count, _last_len = _extent_segments(extent["length"], header.segment_size)
+        stored += extent["length"] - count * TAG_SIZE
+    chunks = manifest.get("chunks", [])
+    live = 0
+    referenced = set()
+    for e in manifest.get("entries", []):
+        if "chunks" in e:
+            referenced.update(e["chunks"])
+        else:
+            live += e["length"]
+    live += sum(chunks[i]["length"] for i in referenced)
+    gaps = header.manifest_offset - header_len - sum(extent["length"] for extent in extents)
+    tail = file_size - header.manifest_offset - header.manifest_length
+    return gaps + max(stored - live, 0) + max(tail, 0)
+
+
+@_timed("space")
+def container_space(container_path: str, password: str, *, stats: OperationStats | None = None) -> SpaceReport:
+    """Reports the space that replaced manifests, entries and chunks take up.
+
+    Version 1 containers are rewritten as a whole on every change and
+    never hold dead space.
+    """
+    with _map_container(container_path) as view:
+        header, header_bytes = _read_header(view)
+        file_size = len(view)
+        if header.version == VERSION_V1:
+            _decrypt_v1(view, header, len(header_bytes), password, stats)
+            return SpaceReport(file_size=file_size, dead_bytes=0, generations=1)
+        _key, _cipher, manifest = _unlock_v2(view, header, password, stats)
+        dead = _dead_bytes(manifest, header, len(header_bytes), file_size)
+    return SpaceReport(file_size=file_size, dead_bytes=dead, generations=header.manifest_generation + 1)
+
+
+def _collect_paths(
+    paths: Iterable[str],
+    stats: OperationStats,
+    include: Iterable[str] | None = None,
+    exclude: Iterable[str] | None = None,
+) -> EntryTable:
+    since = clock()
+    files = EntryTable()
+    for p in paths:
+        src = Path(p)
+        if not src.exists():
+            raise FileNotFoundError(p)
+        # Files are added by name, directories under their own name.
+        files.extend(collect_entries(src, include, exclude, keep_name=src.is_dir()))
+    stats.record("scan", since, entries=len(files))
+    return files
+
+
+@_timed("append")
+def append_to_container(
+    container_path: str,
+    paths: Iterable[str],
+    password: str,
+    workers: int | None = None,
+    compression: str | None = None,
+    include: Iterable[str] | None = None,
+    exclude: Iterable[str] | None = None,
+    progress: ProgressCallback | None = None,
+    cancel: CancelToken | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> Optional[DedupReport]:
+    """Adds files to a v2 container without re-encrypting the data already in it.
+
+    The new files are encrypted into a new extent at the end of the file,
+    followed by the next manifest generation; entries with the same path
+    are replaced. ``include``/``exclude`` filter the scanned files and
+    ``progress``/``cancel`` work as in encrypt_path().
+    """
+    codec_spec = parse_compression(compression)
+    tracker = _Tracker(progress, cancel, stats)
+    tracker.start("scan")
+    # The container is unlocked while the input paths are scanned; a wrong
+    # password is reported before any file is read.
+    with _in_background(_unlock_appendable, container_path, password, stats, "append to") as unlocking:
+        files = _collect_paths(paths, stats, include, exclude)
+        target = unlocking.result()
+    if not files:
+        raise SecureArchiveError("Input path contains no files.")
 
+    added = {PurePath(e.rel_path).as_posix() for e in files}
+    kept = [e for e in target.manifest.get("entries", []) if PurePath(e["path"]).as_posix() not in added]
+    return _append_generation(container_path, target, kept, files, workers, codec_spec, tracker)
 
-def change_password(
+
+@dataclass
+class _AppendTarget:
+    header: ContainerHeader
+    key: bytes
+    manifest: Dict[str, Any]
+    extents: List[Dict[str, int]]
+
+
+def _unlock_appendable(container_path: str, password: str, stats: OperationStats, operation: str) -> _AppendTarget:
+    with _map_container(container_path) as view:
+        header, header_bytes = _read_header(view)
+        if header.version < VERSION_V2:
+            raise SecureArchiveError(
+                f"Cannot {operation} a version 1 container; decrypt it and encrypt the files again "
+                "to convert it to version 2"
+            )
+        key, _cipher, manifest = _unlock_v2(view, header, password, stats)
+        extents = _manifest_extents(manifest, header, len(header_bytes))
+
+    if header.manifest_generation >= MAX_MANIFEST_GENERATION:
+        raise SecureArchiveError("Container has no manifest generations left")
+    return _AppendTarget(header=header, key=key, manifest=manifest, extents=extents)
+
+
+def _append_generation(
+    container_path: str,
+    target: _AppendTarget,
+    kept: List[Dict[str, Any]],
+    files: EntryTable,
+    workers: int | None,
+    compression: Optional[Tuple[str, int]],
+    tracker: _Tracker,
+) -> Optional[DedupReport]:
+    # Writes ``files`` as a new extent and a manifest listing ``kept`` plus
+    # the new entries. The header is switched over to the new manifest only
+    # after both are on disk, so an interrupted append leaves the previous
+    # generation intact.
+    header, manifest = target.header, target.manifest
+    header.manifest_generation += 1
+
+    dst = Path(container_path)
+    original_size = dst.stat().st_size
+    store = None
+    with _worker_pool(workers) as pool, open(dst, "r+b") as out:
+        try:
+            writer = _ContainerWriter(out, header, target.key, pool, extents=target.extents, tracker=tracker)
+            if "chunks" in manifest:
+                store = _ChunkStore(writer, compression, manifest["chunks"])
+            started = time.perf_counter()
+
+            entries = EntryTable.from_records(kept)
+            entries.extend(_store_entries(writer, files, compression, store, workers))
+            manifest["entries"] = entries
+            if store is not None:
+                manifest["chunks"] = store.records
+            writer.write_manifest(manifest, sync=True)
+            # Last cancellation point: after the commit the append is done.
+            tracker.check()
+        except BaseException:
+            out.truncate(original_size)
+            raise
+        writer.commit(sync=True)
+        tracker.finish()
+
+    if store is None:
+        return None
+    return store.report(time.perf_counter() - started)
+
+
+def _update_container(
+    container_path: str,
+    target: _AppendTarget,
+    root: Path,
+    files: EntryTable,
+    workers: int | None,
+    compression: Optional[Tuple[str, int]],
+    tracker: _Tracker,
+) -> Optional[DedupReport]:
+    # Entries whose size and mtime match the scan keep pointing at the
+    # ciphertext already in the container; their sources are not read.
+    previous = {PurePath(e["path"]).as_posix(): e for e in target.manifest.get("entries", [])}
+
+    kept: List[Dict[str, Any]] = []
+    changed: List[int] = []
+    for i, f in enumerate(files):
+        old = previous.get(PurePath(f.rel_path).as_posix())
+        if old is not None and old["size"] == f.size and old["mtime"] == f.mtime:
+            kept.append(old)
+        else:
+            changed.append(i)
+
+    # Entries missing from the scan are dropped with the new manifest.
+    if not changed and len(kept) == len(previous):
+        return None
+    target.manifest["root"] = str(root.resolve())
+    return _append_generation(container_path, target, kept, files.permute(changed), workers, compression, tracker)
+
+
+def _change_password_v1(
     container_path: str,
     old_password: str,
     new_password: str,
-    iterations: int | None = None,
+    iterations: int | None,
+    stats: OperationStats,
 ) -> None:
-    manifest, data_part, old_header = _load_and_decrypt(container_path, old_password)
+    manifest, data_part, old_header = _load_and_decrypt(container_path, old_password, stats)
 
     if iterations is None:
         iterations = old_header.iterations
 
     new_salt = generate_salt(16)
     kdf_params = KdfParams(iterations=iterations, salt=new_salt)
-    key = derive_key(new_password, kdf_params)
+    with stats.phase("kdf"):
+        key = derive_key_cached(new_password, kdf_params)
 
-    manifest["kdf"] = {
-        "type": "PBKDF2-SHA512",
-        "iterations": iterations,
-        "salt_hex": new_salt.hex(),
-    }
+    manifest["kdf"] = _kdf_block(iterations, new_salt)
 
     manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
-    payload = manifest_bytes + PAYLOAD_SEPARATOR + data_part
-
-    nonce, ciphertext = encrypt_aes_gcm(key, payload, aad=MAGIC)
 
     new_header = ContainerHeader(
-        version=VERSION,
+        version=VERSION_V1,
         salt=new_salt,
         iterations=iterations,
-        nonce=nonce,
+        nonce=os.urandom(12),
     )
     header_bytes = _build_header_bytes(new_header)
 
-    p = Path(container_path)
-    with open(p, "wb") as out:
+    # The payload is fed to GCM piece by piece and written straight to the
+    # file instead of being concatenated and encrypted as one new buffer.
+    chunk = DEFAULT_SEGMENT_SIZE
+    pieces = [manifest_bytes, PAYLOAD_SEPARATOR]
+    pieces.extend(data_part[i:i + chunk] for i in range(0, len(data_part), chunk))
+
+    # Encryption and writing are interleaved here; both count as "encrypt".
+    with _atomic_write(Path(container_path)) as out, stats.phase("encrypt", len(data_part) + len(manifest_bytes)):
         out.write(header_bytes)
-        out.write(ciphertext)
+        encrypt_aes_gcm_to(key, new_header.nonce, pieces, out, aad=MAGIC)
+
+
+def _read_v2_header(container_path: str) -> ContainerHeader:
+    with _map_container(container_path) as view:
+        header, _header_bytes = _read_header(view)
+    if header.version < VERSION_V2:
+        raise SecureArchiveError("Keyslots require a version 2 container")
+    return header
+
+
+@_timed("passwd")
+def change_password(
+    container_path: str,
+    old_password: str,
+    new_password: str,
+    iterations: int | None = None,
+    kdf: str | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> None:
+    """Replaces ``old_password`` with ``new_password``.
+
+    For v2 containers only the keyslot holding the data key is rewritten in
+    place; the payload is not touched. v1 containers are re-encrypted.
+
+    The new password uses the old one's KDF and cost unless ``kdf`` or
+    ``iterations`` say otherwise (see encrypt_path()). v1 containers only
+    support PBKDF2.
+    """
+    with _map_container(container_path) as view:
+        header, _header_bytes = _read_header(view)
+    if header.version == VERSION_V1:
+        if parse_kdf(kdf) != PBKDF2_SHA512:
+            raise SecureArchiveError("scrypt requires a version 2 container")
+        if iterations is not None:
+            check_kdf_cost(PBKDF2_SHA512, iterations)
+        _change_password_v1(container_path, old_password, new_password, iterations, stats)
+        return
+
+    # Checked before the old password costs a key derivation.
+    if kdf is not None:
+        parse_kdf(kdf)
+    data_key, index = _open_keyslots(header, old_password, stats)
+    algorithm, iterations = _keyslot_kdf(header.keyslots[index], kdf, iterations)
+    new_slot = _seal_keyslot(header, data_key, new_password, algorithm, iterations, stats)
+
+    # The new password goes into a free slot first, so an interruption
+    # leaves at least one of both passwords working.
+    free = [i for i, slot in enumerate(header.keyslots) if slot.kdf == KDF_EMPTY]
+    if free:
+        header.keyslots[free[0]] = new_slot
+        _write_keyslot(container_path, header, free[0], stats)
+        header.keyslots[index] = _empty_keyslot()
+    else:
+        header.keyslots[index] = new_slot
+    _write_keyslot(container_path, header, index, stats)
+
+
+@_timed("add_password")
+def add_password(
+    container_path: str,
+    password: str,
+    new_password: str,
+    iterations: int | None = None,
+    kdf: str | None = None,
+    *,
+    stats: OperationStats | None = None,
+) -> None:
+    """Adds ``new_password`` as a further keyslot of a v2 container.
+
+    ``kdf`` and ``iterations`` default to those of ``password``'s keyslot.
+    """
+    header = _read_v2_header(container_path)
+    if kdf is not None:
+        parse_kdf(kdf)
+    data_key, index = _open_keyslots(header, password, stats)
+    algorithm, iterations = _keyslot_kdf(header.keyslots[index], kdf, iterations)
+
+    free = [i for i, slot in enumerate(header.keyslots) if slot.kdf == KDF_EMPTY]
+    if not free:
+        raise SecureArchiveError("No free keyslot left")
+    header.keyslots[free[0]] = _seal_keyslot(header, data_key, new_password, algorithm, iterations, stats)
+    _write_keyslot(container_path, header, free[0], stats)
+
+
+@_timed("remove_password")
+def remove_password(container_path: str, password: str, *, stats: OperationStats | None = None) -> None:
+    """Clears the keyslot that ``password`` opens; the last password cannot be removed."""
+    header = _read_v2_header(container_path)
+    _data_key, index = _open_keyslots(header, password, stats)
+    if sum(slot.kdf != KDF_EMPTY for slot in header.keyslots) <= 1:
+        raise SecureArchiveError("Cannot remove the last password")
+    header.keyslots[index] = _empty_keyslot()
+    _write_keyslot(container_path, header, index, stats)
@@ -0,0 +1,304 @@
+import os
+from array import array
+from itertools import accumulate, repeat
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .compression import CODECS
+
+
+NO_ROOT = 0xFFFFFFFF
+NO_OFFSET = -1
+NO_CODEC = -1
+
+_FIELDS = ("path", "size", "mtime", "offset", "length", "codec", "chunks")
+
+
+def _encode(path: str) -> bytes:
+    # Undecodable file names survive the round trip through the pool.
+    return path.encode("utf-8", "surrogateescape")
+
+
+class EntryView:
+    """A row of an EntryTable.
+
+    Reads go straight to the table's columns. Item access (``e["path"]``,
+    ``e.get("codec")``) mirrors the manifest entry dicts, so code written
+    against those keeps working.
+    """
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "EntryTable", index: int) -> None:
+        self._table = table
+        self._index = index
+
+    @property
+    def path(self) -> str:
+        return self._table.path(self._index)
+
+    # Name used by the scanner's former FileEntry records.
+    rel_path = path
+
+    @property
+    def abs_path(self) -> Path:
+        return self._table.abs_path(self._index)
+
+    @property
+    def size(self) -> int:
+        return self._table.sizes[self._index]
+
+    @property
+    def mtime(self) -> float:
+        return self._table.mtimes[self._index]
+
+    @property
+    def offset(self) -> Optional[int]:
+        offset = self._table.offsets[self._index]
+        return None if offset == NO_OFFSET else offset
+
+    @property
+    def length(self) -> Optional[int]:
+        return None if self.offset is None else self._table.lengths[self._index]
+
+    @property
+    def codec(self) -> Optional[str]:
+        codec = self._table.codecs[self._index]
+        return None if codec == NO_CODEC else CODECS[codec]
+
+    @property
+    def chunks(self) -> Optional[List[int]]:
+        return self._table.chunks(self._index)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        getter = _GETTERS.get(key)
+        if getter is None:
+            return default
+        value = getter(self)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: v for k in _FIELDS if (v := getattr(self, k)) is not None}
+
+    def __repr__(self) -> str:
+        return f"EntryView({self.to_dict()!r})"
+
+
+# Property getters by field name; item access is on the hot path of
+# extraction and verification.
+_GETTERS = {name: getattr(EntryView, name).fget for name in _FIELDS}
+
+
+class EntryTable(Sequence[EntryView]):
+    """Column-oriented list of archive entries.
+
+    Paths live in one UTF-8 string pool, numbers in ``array`` columns, so
+    an entry costs a few dozen bytes instead of a dict or dataclass with a
+    ``Path`` object. Rows are read through ``EntryView`` objects created
+    on access. Source paths are stored as an index into a short list of
+    root directories plus the entry path below it.
+    """
+
+    def __init__(self) -> None:
+        self._pool = bytearray()
+        self._ends = array("Q")
+        self._roots: List[str] = []
+        self._root_ids = array("I")
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self.offsets = array("q")
+        self.lengths = array("q")
+        self.codecs = array("b")
+        # Chunk references of deduplicated entries; allocated on first use.
+        self._chunk_ids: Optional[array] = None
+        self._chunk_ends: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [EntryView(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return EntryView(self, index)
+
+    def __iter__(self) -> Iterator[EntryView]:
+        for i in range(len(self)):
+            yield EntryView(self, i)
+
+    def add_root(self, root: str) -> int:
+        self._roots.append(root)
+        return len(self._roots) - 1
+
+    def append(
+        self,
+        path: str,
+        size: int,
+        mtime: float,
+        root: int = NO_ROOT,
+        offset: int = NO_OFFSET,
+        length: int = 0,
+        codec: Optional[str] = None,
+        chunks: Optional[Iterable[int]] = None,
+    ) -> int:
+        index = len(self)
+        self._pool += _encode(path)
+        self._ends.append(len(self._pool))
+        self._root_ids.append(root)
+        self.sizes.append(size)
+        self.mtimes.append(mtime)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        self.codecs.append(NO_CODEC if codec is None else CODECS.index(codec))
+        if chunks is not None or self._chunk_ends is not None:
+            self._append_chunks(index, chunks or ())
+        return index
+
+    def append_listing(self, directory: str, files: Sequence[Tuple[str, int, float]], root: int = NO_ROOT) -> None:
+        """Appends the ``(name, size, mtime)`` files of one scanned directory."""
+        prefix = _encode(os.path.join(directory, "")) if directory else b""
+        pool = self._pool
+        for name, _size, _mtime in files:
+            pool += prefix
+            pool += _encode(name)
+            self._ends.append(len(pool))
+        count = len(files)
+        self._root_ids.extend(repeat(root, count))
+        self.sizes.extend([f[1] for f in files])
+        self.mtimes.extend([f[2] for f in files])
+        self.offsets.extend(repeat(NO_OFFSET, count))
+        self.lengths.extend(repeat(0, count))
+        self.codecs.extend(repeat(NO_CODEC, count))
+        if self._chunk_ends is not None:
+            self._chunk_ends.extend(repeat(len(self._chunk_ids), count))
+
+    def _append_chunks(self, index: int, chunks: Iterable[int]) -> None:
+        if self._chunk_ends is None:
+            self._chunk_ids = array("Q")
+            self._chunk_ends = array("Q", bytes(8 * index))
+        self._chunk_ids.extend(chunks)
+        self._chunk_ends.append(len(self._chunk_ids))
+
+    def append_record(self, record: Dict[str, Any]) -> int:
+        """Appends a manifest entry dict."""
+        return self.append(
+            record["path"],
+            record["size"],
+            record["mtime"],
+            offset=record.get("offset", NO_OFFSET),
+            length=record.get("length", 0),
+            codec=record.get("codec"),
+            chunks=record.get("chunks"),
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "EntryTable":
+        table = cls()
+        for record in records:
+            table.append_record(record)
+        return table
+
+    def extend(self, other: "EntryTable") -> None:
+        """Appends all rows of ``other``, keeping their source paths."""
+        root_map = {i: self.add_root(r) for i, r in enumerate(other._roots)}
+        for i in range(len(other)):
+            self.append(
+                other.path(i),
+                other.sizes[i],
+                other.mtimes[i],
+                root=root_map.get(other._root_ids[i], NO_ROOT),
+                offset=other.offsets[i],
+                length=other.lengths[i],
+                codec=other.get_codec(i),
+                chunks=other.chunks(i),
+            )
+
+    def path_bytes(self, index: int) -> bytes:
+        start = self._ends[index - 1] if index else 0
+        return bytes(self._pool[start:self._ends[index]])
+
+    def path(self, index: int) -> str:
+        return self.path_bytes(index).decode("utf-8", "surrogateescape")
+
+    def iter_paths(self, start: int = 0) -> Iterator[bytes]:
+        for i in range(start, len(self)):
+            yield self.path_bytes(i)
+
+    def source_path(self, index: int) -> str:
+        root = self._root_ids[index]
+        if root == NO_ROOT:
+            raise ValueError("Entry has no source path")
+        return os.path.join(self._roots[root], self.path(index))
+
+    def abs_path(self, index: int) -> Path:
+        return Path(self.source_path(index))
+
+    def get_codec(self, index: int) -> Optional[str]:
+        codec = self.codecs[index]
+        return None if codec == NO_CODEC else CODECS[codec]
+
+    def chunks(self, index: int) -> Optional[List[int]]:
+        if self._chunk_ends is None:
+            return None
+        start = self._chunk_ends[index - 1] if index else 0
+        end = self._chunk_ends[index]
+        if start == end and self.offsets[index] != NO_OFFSET:
+            return None
+        return self._chunk_ids[start:end].tolist()
+
+    def set_stored(self, index: int, offset: int, length: int, codec: Optional[str] = None) -> None:
+        self.offsets[index] = offset
+        self.lengths[index] = length
+        self.codecs[index] = NO_CODEC if codec is None else CODECS.index(codec)
+
+    def set_chunks(self, index: int, chunks: Iterable[int]) -> None:
+        # Chunk references can only be filled in row order, as the store
+        # writes files one after another.
+        if self._chunk_ends is None:
+            self._chunk_ids = array("Q")
+            self._chunk_ends = array("Q")
+        if len(self._chunk_ends) != index:
+            raise ValueError("Chunk references must be set in row order")
+        self._append_chunks(index, chunks)
+
+    def permute(self, order: Iterable[int]) -> "EntryTable":
+        """Returns a new table with the rows in ``order``."""
+        order = list(order)
+        table = EntryTable()
+        table._roots = list(self._roots)
+        # Gathered column by column; the scanner reorders every large tree.
+        pool = memoryview(self._pool)
+        ends = self._ends
+        paths = [pool[ends[i - 1] if i else 0:ends[i]] for i in order]
+        table._pool = bytearray().join(paths)
+        table._ends = array("Q", accumulate(len(p) for p in paths))
+        for name in ("_root_ids", "sizes", "mtimes", "offsets", "lengths", "codecs"):
+            column = getattr(self, name)
+            setattr(table, name, array(column.typecode, [column[i] for i in order]))
+        if self._chunk_ends is not None:
+            table._chunk_ids = array("Q")
+            table._chunk_ends = array("Q")
+            for i in order:
+                start = self._chunk_ends[i - 1] if i else 0
+                table._chunk_ids.extend(self._chunk_ids[start:self._chunk_ends[i]])
+                table._chunk_ends.append(len(table._chunk_ids))
+        return table
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the columns."""
+        columns = [self._ends, self._root_ids, self.sizes, self.mtimes, self.offsets, self.lengths, self.codecs]
+        if self._chunk_ends is not None:
+            columns += [self._chunk_ids, self._chunk_ends]
+        return len(self._pool) + sum(c.itemsize * len(c) for c in columns)
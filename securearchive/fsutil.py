@@ -1,44 +1,190 @@
-from pathlib import Path
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import List
+from fnmatch import translate
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
 
+from .entrytable import EntryTable
 
-@dataclass
-class FileEntry:
-    rel_path: str
-    abs_path: Path
-    size: int
-    mtime: float
 
+IGNORE_FILE = ".secarcignore"
+DEFAULT_SCAN_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class _Pattern:
+    regex: "re.Pattern[str]"
+    anchored: bool
+    dir_only: bool
+
+
+def _compile(pattern: str) -> _Pattern:
+    # gitignore-like: a trailing "/" only matches directories, a pattern
+    # containing "/" is matched against the path relative to the directory
+    # it was defined for, anything else against the name at any depth.
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    return _Pattern(re.compile(translate(pattern.lstrip("/"))), anchored, dir_only)
+
+
+def _read_ignore_file(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+# A rule set applies to the subtree below ``prefix`` (a relative POSIX
+# path ending in "/", or "" for the root).
+_RuleSet = Tuple[str, Tuple[_Pattern, ...]]
+
+
+def _matches(rules: Iterable[_RuleSet], rel: str, name: str, is_dir: bool) -> bool:
+    for prefix, patterns in rules:
+        sub = rel[len(prefix):]
+        for p in patterns:
+            if p.dir_only and not is_dir:
+                continue
+            if p.regex.match(sub if p.anchored else name):
+                return True
+    return False
+
+
+# (name, size, mtime) of the files in one directory
+_Listing = List[Tuple[str, int, float]]
+_Subdirs = List[Tuple[str, Tuple[_RuleSet, ...]]]
 
-def collect_entries(root: Path) -> List[FileEntry]:
-    root = root.resolve()
-    entries: List[FileEntry] = []
 
+class _Scanner:
+    def __init__(self, root: str, include: Tuple[_Pattern, ...], ignore_file: bool) -> None:
+        self._root = root
+        self._include = include
+        self._ignore_file = ignore_file
+
+    def scan(self, rel_dir: str, rules: Tuple[_RuleSet, ...]) -> Tuple[str, _Listing, _Subdirs]:
+        # Lists one directory. DirEntry carries the file type from the
+        # directory listing, so only regular files cost a stat() call.
+        path = os.path.join(self._root, rel_dir) if rel_dir else self._root
+        prefix = rel_dir.replace(os.sep, "/") + "/" if rel_dir else ""
+        files: _Listing = []
+        subdirs: _Subdirs = []
+
+        if self._ignore_file:
+            ignore_path = os.path.join(path, IGNORE_FILE)
+            if os.path.isfile(ignore_path):
+                patterns = tuple(_compile(p) for p in _read_ignore_file(ignore_path))
+                rules = rules + ((prefix, patterns),)
+
+        # Directories that cannot be listed and files that vanish before
+        # their stat() are skipped, as with rglob().
+        try:
+            it = os.scandir(path)
+        except OSError:
+            return rel_dir, files, subdirs
+        with it:
+            for entry in it:
+                rel = prefix + entry.name
+                # Symlinked directories are not followed, as with rglob().
+                if entry.is_dir(follow_symlinks=False):
+                    if not _matches(rules, rel, entry.name, True):
+                        subdirs.append((os.path.join(rel_dir, entry.name), rules))
+                    continue
+                if not entry.is_file() or _matches(rules, rel, entry.name, False):
+                    continue
+                if self._include and not any(p.regex.match(rel if p.anchored else entry.name) for p in self._include):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((entry.name, stat.st_size, stat.st_mtime))
+        files.sort()
+        return rel_dir, files, subdirs
+
+
+def _walk(
+    root: str,
+    include: Optional[Iterable[str]],
+    exclude: Optional[Iterable[str]],
+    workers: int,
+    ignore_file: bool,
+) -> Iterator[Tuple[str, _Listing]]:
+    # Yields (relative directory, files) per directory, in no particular
+    # order when several workers are used.
+    include_patterns = tuple(_compile(p) for p in include or ())
+    rules: Tuple[_RuleSet, ...] = ()
+    if exclude:
+        rules = (("", tuple(_compile(p) for p in exclude)),)
+    scanner = _Scanner(root, include_patterns, ignore_file)
+
+    if workers <= 1:
+        stack = [("", rules)]
+        while stack:
+            rel_dir, files, subdirs = scanner.scan(*stack.pop())
+            yield rel_dir, files
+            stack.extend(subdirs)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="secarc-scan") as pool:
+        pending: Set[Future] = {pool.submit(scanner.scan, "", rules)}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    rel_dir, files, subdirs = future.result()
+                    pending.update(pool.submit(scanner.scan, *d) for d in subdirs)
+                    yield rel_dir, files
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def collect_entries(
+    root: Path,
+    include: Optional[Iterable[str]] = None,
+    exclude: Optional[Iterable[str]] = None,
+    workers: int = DEFAULT_SCAN_WORKERS,
+    keep_name: bool = False,
+    ignore_file: bool = True,
+) -> EntryTable:
+    """Scans ``root`` into an EntryTable.
+
+    ``include`` and ``exclude`` take glob patterns; ``.secarcignore`` files
+    (one pattern per line, ``#`` for comments) add exclude patterns for
+    their own directory and everything below it. Excluded directories are
+    not descended into. Directories are listed on ``workers`` threads,
+    which pays off on network filesystems where every listing waits on a
+    round trip. Entries are ordered directory by directory, depth first,
+    and by name within a directory. With ``keep_name`` the paths of a
+    directory root start with the directory's own name.
+    """
+    root = root.resolve()
+    table = EntryTable()
     if not root.exists():
-        return entries
+        return table
 
     if root.is_file():
         stat = root.stat()
-        entries.append(
-            FileEntry(
-                rel_path=root.name,
-                abs_path=root,
-                size=stat.st_size,
-                mtime=stat.st_mtime,
-            )
-        )
-        return entries
-
-    for p in root.rglob("*"):
-        if p.is_file():
-            stat = p.stat()
-            entries.append(
-                FileEntry(
-                    rel_path=str(p.relative_to(root)),
-                    abs_path=p,
-                    size=stat.st_size,
-                    mtime=stat.st_mtime,
-                )
-            )
-    return entries
\ No newline at end of file
+        table.append(root.name, stat.st_size, stat.st_mtime, root=table.add_root(str(root.parent)))
+        return table
+
+    base = str(root.parent) if keep_name else str(root)
+    prefix = root.name if keep_name else ""
+    root_id = table.add_root(base)
+
+    blocks = []
+    for rel_dir, files in _walk(str(root), include, exclude, workers, ignore_file):
+        start = len(table)
+        directory = os.path.join(prefix, rel_dir) if rel_dir else prefix
+        table.append_listing(directory, files, root=root_id)
+        blocks.append((rel_dir.split(os.sep) if rel_dir else [], start, len(table)))
+
+    # Parallel listings arrive in completion order; the rows are put in a
+    # stable order by sorting the (few) directories, not the files.
+    blocks.sort(key=lambda b: b[0])
+    order = [i for _key, start, end in blocks for i in range(start, end)]
+    if order == list(range(len(table))):
+        return table
+    return table.permute(order)
@@ -18,15 +18,35 @@ I18N: Dict[str, Dict[str, str]] = {
         "encrypt.success": "Encryption completed successfully.",
         "encrypt.overwrite_blocked": "Output file already exists. Use --force to overwrite.",
         "encrypt.source_missing": "Input path does not exist.",
+        "encrypt.dedup_report": (
+            "Deduplication: {ratio:.2f}x ({logical:.1f} MiB -> {stored:.1f} MiB), "
+            "{unique} of {chunks} chunks unique, {throughput:.1f} MiB/s"
+        ),
+        "stats.summary": (
+            "Stats: {operation} {wall:.3f} s wall, {cpu:.3f} s CPU, {mib:.1f} MiB, "
+            "{entries} entries, {rate:.1f} MiB/s"
+        ),
+        "stats.phase": "  {phase:<9} {wall:9.3f} s wall {cpu:9.3f} s CPU {mib:10.1f} MiB {rate:9.1f} MiB/s",
+        "stats.peak_memory": "Peak Python memory: {mib:.1f} MiB",
+        "add.start": "Adding files to container...",
+        "add.success": "Files added successfully.",
         "decrypt.start": "Starting decryption...",
         "decrypt.success": "Decryption completed successfully.",
+        "decrypt.entry_missing": "Entry not found in container: {path}",
         "list.start": "Reading container...",
         "list.header": "Container contents:",
         "list.entry": "{path} ({size} bytes)",
         "verify.start": "Verifying container integrity...",
         "verify.success": "Container integrity verified successfully.",
         "verify.failure": "Container integrity check failed.",
+        "space.dead": "Dead space: {dead} of {size} bytes ({percent:.1f}%); encrypt the files into a new container to reclaim it.",
         "passwd.success": "Password changed successfully.",
+        "passwd.added": "Password added successfully.",
+        "passwd.removed": "Password removed successfully.",
+        "calibrate.start": "Measuring the key derivation on this machine...",
+        "calibrate.pbkdf2": "PBKDF2-SHA512: {ms:.0f} ms with --kdf pbkdf2 --iterations {iterations}",
+        "calibrate.scrypt": "scrypt: {ms:.0f} ms, {mib:.0f} MiB with --kdf scrypt --iterations {iterations}",
+        "calibrate.minimum": "  (minimum cost; slower than the target on this machine)",
         "error.invalid_container": "Invalid or unsupported container format.",
         "error.wrong_password": "Decryption failed – possibly wrong password or corrupted data.",
         "error.io": "I/O error occurred.",
@@ -35,16 +55,41 @@ I18N: Dict[str, Dict[str, str]] = {
         "cli.description": "SecureArchive Engine – encrypt and decrypt files and directories.",
         "cli.lang_help": "Language for CLI messages (en/de).",
         "cli.cmd.encrypt": "Encrypt files and directories / Dateien und Verzeichnisse verschlüsseln.",
+        "cli.cmd.add": "Add files to a container / Dateien zu einem Container hinzufügen.",
         "cli.cmd.decrypt": "Decrypt a container / Container entschlüsseln.",
         "cli.cmd.list": "List container contents / Container-Inhalt anzeigen.",
         "cli.cmd.verify": "Verify container integrity / Container-Integrität prüfen.",
         "cli.cmd.passwd": "Change container password / Container-Passwort ändern.",
+        "cli.cmd.calibrate": "Measure the key derivation and suggest parameters / Schlüsselableitung messen.",
         "cli.arg.input": "Input file or directory / Eingabedatei oder Verzeichnis.",
         "cli.arg.output": "Output container file / Ausgabedatei (Container).",
+        "cli.arg.paths": "Files or directories to add / Hinzuzufügende Dateien oder Verzeichnisse.",
         "cli.arg.container": "Container file / Container-Datei.",
         "cli.arg.output_dir": "Output directory / Ausgabe-Verzeichnis.",
+        "cli.arg.only": "Extract only this entry / Nur diesen Eintrag extrahieren.",
         "cli.arg.force": "Overwrite existing output file / Bestehende Ausgabedatei überschreiben.",
-        "cli.arg.iterations": "PBKDF2 iterations for key derivation.",
+        "cli.arg.iterations": "PBKDF2 iterations or scrypt N for key derivation (default: 300000 / 131072).",
+        "cli.arg.kdf": "Key derivation function: pbkdf2 (default) or scrypt.",
+        "cli.arg.target_ms": "Target time of one key derivation in milliseconds (default: 250).",
+        "cli.arg.max_memory": "Memory limit for scrypt in MiB (default: 256).",
+        "cli.arg.jobs": "Worker threads for encryption/decryption (default: one per core, at most 4; 0 = all cores).",
+        "cli.arg.compression": "Compress entries with zlib, lzma or bz2, e.g. 'zlib:6' (default: none).",
+        "cli.arg.dedup": "Store identical content-defined chunks only once.",
+        "cli.arg.update": "Update an existing container in place: add new and modified files, drop deleted ones.",
+        "cli.arg.include": "Only archive files matching this glob pattern (repeatable).",
+        "cli.arg.exclude": (
+            "Skip files and directories matching this glob pattern "
+            "(repeatable); see also .secarcignore."
+        ),
+        "cli.arg.prefix": "Only list entries whose path starts with this prefix.",
+        "cli.arg.offset": "Skip the first N listed entries.",
+        "cli.arg.limit": "List at most N entries.",
+        "cli.arg.add_password": "Add the new password as an additional keyslot instead of replacing the current one.",
+        "cli.arg.remove_password": "Remove the entered password's keyslot (not the last one).",
+        "cli.arg.stats": "Print wall/CPU time, bytes and entries per phase to stderr.",
+        "cli.arg.stats_format": "Format of the --stats output: text or json (one line).",
+        "cli.arg.profile": "Run under cProfile and print the slowest functions to stderr.",
+        "cli.arg.trace_memory": "Track Python allocations with tracemalloc and report the peak (slow).",
 
         "gui.title": "SecureArchive – File & Folder Encryption",
         "gui.lang.de": "Deutsch",
@@ -53,6 +98,15 @@ I18N: Dict[str, Dict[str, str]] = {
         "gui.status.running": "Operation running...",
         "gui.status.done": "Operation finished.",
         "gui.status.error": "Operation failed.",
+        "gui.status.cancelling": "Cancelling...",
+        "gui.status.cancelled": "Operation cancelled.",
+        "gui.progress.scanning": "Scanning input...",
+        "gui.progress.files": (
+            "{done} / {total} files, {mib_done:.1f} / "
+            "{mib_total:.1f} MiB, {rate:.1f} MiB/s, ETA {eta}"
+        ),
+        "gui.progress.bytes": "{mib_done:.1f} / {mib_total:.1f} MiB, {rate:.1f} MiB/s, ETA {eta}",
+        "gui.button.cancel": "Cancel",
         "gui.button.browse_file": "Browse file...",
         "gui.button.browse_folder": "Browse folder...",
         "gui.button.browse_container": "Select container...",
@@ -80,6 +134,12 @@ I18N: Dict[str, Dict[str, str]] = {
         "gui.list.container_label": "Container file:",
         "gui.list.password_label": "Password:",
         "gui.list.button": "List contents",
+        "gui.list.filter_label": "Filter:",
+        "gui.list.filter_placeholder": "Part of a path",
+        "gui.list.count": "{shown} of {total} entries",
+        "gui.list.column.path": "Path",
+        "gui.list.column.size": "Size (bytes)",
+        "gui.list.column.mtime": "Modified",
 
         "gui.verify.container_label": "Container file:",
         "gui.verify.password_label": "Password:",
@@ -135,15 +195,35 @@ I18N: Dict[str, Dict[str, str]] = {
         "encrypt.success": "Verschlüsselung erfolgreich abgeschlossen.",
         "encrypt.overwrite_blocked": "Ausgabedatei existiert bereits. Verwenden Sie --force zum Überschreiben.",
         "encrypt.source_missing": "Eingabepfad existiert nicht.",
+        "encrypt.dedup_report": (
+            "Deduplizierung: {ratio:.2f}x ({logical:.1f} MiB -> {stored:.1f} MiB), "
+            "{unique} von {chunks} Chunks eindeutig, {throughput:.1f} MiB/s"
+        ),
+        "stats.summary": (
+            "Statistik: {operation} {wall:.3f} s Laufzeit, {cpu:.3f} s CPU, {mib:.1f} MiB, "
+            "{entries} Einträge, {rate:.1f} MiB/s"
+        ),
+        "stats.phase": "  {phase:<9} {wall:9.3f} s Laufzeit {cpu:9.3f} s CPU {mib:10.1f} MiB {rate:9.1f} MiB/s",
+        "stats.peak_memory": "Spitzenwert Python-Speicher: {mib:.1f} MiB",
+        "add.start": "Dateien werden zum Container hinzugefügt...",
+        "add.success": "Dateien erfolgreich hinzugefügt.",
         "decrypt.start": "Entschlüsselung wird gestartet...",
         "decrypt.success": "Entschlüsselung erfolgreich abgeschlossen.",
+        "decrypt.entry_missing": "Eintrag nicht im Container gefunden: {path}",
         "list.start": "Container wird gelesen...",
         "list.header": "Container-Inhalt:",
         "list.entry": "{path} ({size} Bytes)",
         "verify.start": "Container-Integrität wird geprüft...",
         "verify.success": "Container-Integrität erfolgreich verifiziert.",
         "verify.failure": "Integritätsprüfung des Containers fehlgeschlagen.",
+        "space.dead": "Ungenutzter Platz: {dead} von {size} Bytes ({percent:.1f} %); die Dateien in einen neuen Container verschlüsseln, um ihn freizugeben.",
         "passwd.success": "Passwort erfolgreich geändert.",
+        "passwd.added": "Passwort erfolgreich hinzugefügt.",
+        "passwd.removed": "Passwort erfolgreich entfernt.",
+        "calibrate.start": "Schlüsselableitung wird auf diesem Rechner gemessen...",
+        "calibrate.pbkdf2": "PBKDF2-SHA512: {ms:.0f} ms mit --kdf pbkdf2 --iterations {iterations}",
+        "calibrate.scrypt": "scrypt: {ms:.0f} ms, {mib:.0f} MiB mit --kdf scrypt --iterations {iterations}",
+        "calibrate.minimum": "  (Mindestaufwand; auf diesem Rechner langsamer als das Ziel)",
         "error.invalid_container": "Ungültiges oder nicht unterstütztes Containerformat.",
         "error.wrong_password": "Entschlüsselung fehlgeschlagen – falsches Passwort oder beschädigte Daten.",
         "error.io": "Ein Ein-/Ausgabefehler ist aufgetreten.",
@@ -152,16 +232,47 @@ I18N: Dict[str, Dict[str, str]] = {
         "cli.description": "SecureArchive Engine – Dateien und Verzeichnisse sicher ver- und entschlüsseln.",
         "cli.lang_help": "Sprache für CLI-Ausgaben (en/de).",
         "cli.cmd.encrypt": "Dateien und Verzeichnisse verschlüsseln / Encrypt files and directories.",
+        "cli.cmd.add": "Dateien zu einem Container hinzufügen / Add files to a container.",
         "cli.cmd.decrypt": "Container entschlüsseln / Decrypt a container.",
         "cli.cmd.list": "Container-Inhalt anzeigen / List container contents.",
         "cli.cmd.verify": "Container-Integrität prüfen / Verify container integrity.",
         "cli.cmd.passwd": "Container-Passwort ändern / Change container password.",
+        "cli.cmd.calibrate": "Schlüsselableitung messen und Parameter vorschlagen / Measure the key derivation.",
         "cli.arg.input": "Eingabedatei oder Verzeichnis / Input file or directory.",
         "cli.arg.output": "Ausgabedatei (Container) / Output container file.",
+        "cli.arg.paths": "Hinzuzufügende Dateien oder Verzeichnisse / Files or directories to add.",
         "cli.arg.container": "Container-Datei / Container file.",
         "cli.arg.output_dir": "Ausgabe-Verzeichnis / Output directory.",
+        "cli.arg.only": "Nur diesen Eintrag extrahieren / Extract only this entry.",
         "cli.arg.force": "Bestehende Ausgabedatei überschreiben / Overwrite existing output file.",
-        "cli.arg.iterations": "PBKDF2-Iterationen für die Schlüsselableitung.",
+        "cli.arg.iterations": (
+            "PBKDF2-Iterationen oder scrypt-N für die "
+            "Schlüsselableitung (Standard: 300000 / 131072)."
+        ),
+        "cli.arg.kdf": "Schlüsselableitung: pbkdf2 (Standard) oder scrypt.",
+        "cli.arg.target_ms": "Zieldauer einer Schlüsselableitung in Millisekunden (Standard: 250).",
+        "cli.arg.max_memory": "Speichergrenze für scrypt in MiB (Standard: 256).",
+        "cli.arg.jobs": "Worker-Threads für Ver-/Entschlüsselung (Standard: einer pro Kern, höchstens 4; 0 = alle Kerne).",
+        "cli.arg.compression": "Einträge mit zlib, lzma oder bz2 komprimieren, z. B. 'zlib:6' (Standard: keine).",
+        "cli.arg.dedup": "Identische inhaltsdefinierte Chunks nur einmal speichern.",
+        "cli.arg.update": (
+            "Bestehenden Container aktualisieren: neue und geänderte "
+            "Dateien hinzufügen, gelöschte entfernen."
+        ),
+        "cli.arg.include": "Nur Dateien archivieren, die auf dieses Glob-Muster passen (mehrfach möglich).",
+        "cli.arg.exclude": (
+            "Passende Dateien und Verzeichnisse überspringen "
+            "(mehrfach möglich); siehe auch .secarcignore."
+        ),
+        "cli.arg.prefix": "Nur Einträge auflisten, deren Pfad mit diesem Präfix beginnt.",
+        "cli.arg.offset": "Die ersten N Einträge überspringen.",
+        "cli.arg.limit": "Höchstens N Einträge auflisten.",
+        "cli.arg.add_password": "Neues Passwort als zusätzlichen Keyslot hinzufügen, statt das aktuelle zu ersetzen.",
+        "cli.arg.remove_password": "Keyslot des eingegebenen Passworts entfernen (nicht den letzten).",
+        "cli.arg.stats": "Laufzeit, CPU-Zeit, Bytes und Einträge je Phase auf stderr ausgeben.",
+        "cli.arg.stats_format": "Format der --stats-Ausgabe: text oder json (eine Zeile).",
+        "cli.arg.profile": "Unter cProfile ausführen und die langsamsten Funktionen auf stderr ausgeben.",
+        "cli.arg.trace_memory": "Python-Allokationen mit tracemalloc verfolgen und den Spitzenwert melden (langsam).",
 
         "gui.title": "SecureArchive – Datei- & Ordner-Verschlüsselung",
         "gui.lang.de": "Deutsch",
@@ -170,6 +281,15 @@ I18N: Dict[str, Dict[str, str]] = {
         "gui.status.running": "Vorgang läuft...",
         "gui.status.done": "Vorgang abgeschlossen.",
         "gui.status.error": "Vorgang fehlgeschlagen.",
+        "gui.status.cancelling": "Wird abgebrochen...",
+        "gui.status.cancelled": "Vorgang abgebrochen.",
+        "gui.progress.scanning": "Eingabe wird durchsucht...",
+        "gui.progress.files": (
+            "{done} / {total} Dateien, {mib_done:.1f} / "
+            "{mib_total:.1f} MiB, {rate:.1f} MiB/s, Rest {eta}"
+        ),
+        "gui.progress.bytes": "{mib_done:.1f} / {mib_total:.1f} MiB, {rate:.1f} MiB/s, Rest {eta}",
+        "gui.button.cancel": "Abbrechen",
         "gui.button.browse_file": "Datei wählen...",
         "gui.button.browse_folder": "Ordner wählen...",
         "gui.button.browse_container": "Container wählen...",
@@ -197,6 +317,12 @@ I18N: Dict[str, Dict[str, str]] = {
         "gui.list.container_label": "Container-Datei:",
         "gui.list.password_label": "Passwort:",
         "gui.list.button": "Inhalt anzeigen",
+        "gui.list.filter_label": "Filter:",
+        "gui.list.filter_placeholder": "Teil eines Pfads",
+        "gui.list.count": "{shown} von {total} Einträgen",
+        "gui.list.column.path": "Pfad",
+        "gui.list.column.size": "Größe (Bytes)",
+        "gui.list.column.mtime": "Geändert",
 
         "gui.verify.container_label": "Container-Datei:",
         "gui.verify.password_label": "Passwort:",
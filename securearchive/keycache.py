@@ -0,0 +1,131 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .crypto import KdfParams, derive_key
+
+
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_ENTRIES = 16
+
+_CacheKey = Tuple[str, bytes, int, int, int, bytes]
+
+
+class KeyCache:
+    """In-memory cache of password-derived keys.
+
+    Entries are keyed by the KDF parameters and a password fingerprint. The
+    fingerprint is an HMAC of the password under a random per-cache secret,
+    so the cache never holds the password itself and the fingerprints are
+    useless outside this process. Entries expire ``ttl`` seconds after they
+    were stored; beyond ``max_entries`` the least recently used one is
+    evicted. Dropped keys are overwritten in place.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if ttl <= 0 or max_entries <= 0:
+            raise ValueError("Key cache TTL and size must be positive")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._secret = os.urandom(32)
+        self._entries: "OrderedDict[_CacheKey, Tuple[float, bytearray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, password: str, params: KdfParams) -> _CacheKey:
+        fingerprint = hmac.new(self._secret, password.encode("utf-8"), hashlib.sha256).digest()
+        return params.algorithm, bytes(params.salt), params.iterations, params.r, params.p, fingerprint
+
+    def get(self, password: str, params: KdfParams) -> Optional[bytes]:
+        k = self._key(password, params)
+        with self._lock:
+            entry = self._entries.get(k)
+            if entry is None:
+                return None
+            expires, key = entry
+            if expires <= time.monotonic():
+                self._drop(k)
+                return None
+            self._entries.move_to_end(k)
+            return bytes(key)
+
+    def put(self, password: str, params: KdfParams, key: bytes) -> None:
+        k = self._key(password, params)
+        with self._lock:
+            if k in self._entries:
+                self._drop(k)
+            self._entries[k] = (time.monotonic() + self.ttl, bytearray(key))
+            self._expire()
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def wipe(self) -> None:
+        with self._lock:
+            for k in list(self._entries):
+                self._drop(k)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for k in [k for k, (expires, _key) in self._entries.items() if expires <= now]:
+            self._drop(k)
+
+    def _drop(self, k: _CacheKey) -> None:
+        _expires, key = self._entries.pop(k)
+        key[:] = bytes(len(key))
+
+
+_cache: Optional[KeyCache] = None
+
+
+def enable_key_cache(ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES) -> KeyCache:
+    """Turns on the process-wide key cache consulted by the engine (off by default).
+
+    Calling it again replaces the cache; the old entries are wiped.
+    """
+    global _cache
+    previous, _cache = _cache, KeyCache(ttl, max_entries)
+    if previous is not None:
+        previous.wipe()
+    return _cache
+
+
+def disable_key_cache() -> None:
+    """Wipes and turns off the process-wide key cache."""
+    global _cache
+    previous, _cache = _cache, None
+    if previous is not None:
+        previous.wipe()
+
+
+def wipe_key_cache() -> None:
+    """Drops every cached key but leaves the cache enabled."""
+    if _cache is not None:
+        _cache.wipe()
+
+
+def cached_key(password: str, params: KdfParams) -> Optional[bytes]:
+    if _cache is None:
+        return None
+    return _cache.get(password, params)
+
+
+def remember_key(password: str, params: KdfParams, key: bytes) -> None:
+    if _cache is not None:
+        _cache.put(password, params, key)
+
+
+def derive_key_cached(password: str, params: KdfParams) -> bytes:
+    """``derive_key()`` that stores its result in, and reuses it from, the enabled cache."""
+    key = cached_key(password, params)
+    if key is None:
+        key = derive_key(password, params)
+        remember_key(password, params, key)
+    return key
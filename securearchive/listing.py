@@ -0,0 +1,131 @@
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import compress
+from typing import Dict, Optional, Sequence
+
+from .engine import OperationCancelledError
+from .entrytable import EntryTable, EntryView
+from .manifest import PackedEntries
+from .progress import CancelToken
+
+
+SORT_KEYS = ("path", "size", "mtime")
+CANCEL_CHECK_INTERVAL = 1 << 16
+
+
+class EntryListing:
+    """Sorted and filtered row order over the result of ``list_container()``.
+
+    Only entry indices are kept: ``index(row)`` maps a visible row to a row
+    of ``entries``, which the caller decodes on access. The order of each
+    sort key is computed once and reused in both directions; ties are
+    ordered by path. The filter is an ASCII case-insensitive substring
+    match over one lowered copy of all paths, built on first use.
+    """
+
+    def __init__(self, entries: EntryTable | PackedEntries) -> None:
+        self.entries = entries
+        self.sort_key = "path"
+        self.descending = False
+        self.filter_text = ""
+        self._orders: Dict[str, Sequence[int]] = {}
+        self._paths: Optional[bytes] = None
+        self._ends: Optional[array] = None
+        self._lock = threading.Lock()
+        # One byte per entry, set where the path matches; None unfiltered.
+        self._mask: Optional[bytearray] = None
+        self._visible = self._order("path")
+
+    def __len__(self) -> int:
+        return len(self._visible)
+
+    def index(self, row: int) -> int:
+        return self._visible[row]
+
+    def entry(self, row: int) -> EntryView:
+        return self.entries[self._visible[row]]
+
+    def sort(self, key: str, descending: bool = False) -> None:
+        if key not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {key}")
+        self.sort_key = key
+        self.descending = descending
+        self._update()
+
+    def set_filter(self, text: str, mask: Optional[bytearray] = None) -> None:
+        """Shows only the entries whose path contains ``text``.
+
+        ``mask`` is a result of ``match(text)`` computed beforehand, for
+        example on a worker thread.
+        """
+        self.filter_text = text
+        self._mask = mask if mask is not None or not text else self.match(text)
+        self._update()
+
+    def match(self, text: str, cancel: Optional[CancelToken] = None) -> Optional[bytearray]:
+        """Returns the filter mask for ``text``, None for the empty filter.
+
+        Does not change the visible rows, so it can run on another thread
+        while they are read. Raises OperationCancelledError when ``cancel``
+        is set.
+        """
+        if not text:
+            return None
+        key = text.encode("utf-8", "surrogateescape").lower()
+        mask = bytearray(len(self.entries))
+        if b"\n" in key:
+            return mask
+        with self._lock:
+            if self._paths is None:
+                self._index_paths(cancel)
+        paths, ends = self._paths, self._ends
+        pos = paths.find(key)
+        found = 0
+        while pos >= 0:
+            # ends[i] is the newline after path i; a match never spans one.
+            i = bisect_right(ends, pos)
+            mask[i] = 1
+            found += 1
+            if not found % CANCEL_CHECK_INTERVAL and cancel is not None and cancel.cancelled:
+                raise OperationCancelledError("Filter cancelled")
+            pos = paths.find(key, ends[i] + 1)
+        return mask
+
+    def _update(self) -> None:
+        order = self._order(self.sort_key)
+        if self._mask is not None:
+            if isinstance(order, range):
+                order = array("I", compress(order, self._mask))
+            else:
+                order = array("I", compress(order, map(self._mask.__getitem__, order)))
+        self._visible = order[::-1] if self.descending else order
+
+    def _order(self, key: str) -> Sequence[int]:
+        order = self._orders.get(key)
+        if order is not None:
+            return order
+        entries = self.entries
+        if key == "path":
+            if isinstance(entries, PackedEntries):
+                # Binary manifests are stored sorted by path.
+                order = range(len(entries))
+            else:
+                order = array("I", sorted(range(len(entries)), key=entries.path_bytes))
+        else:
+            column = entries.sizes if key == "size" else entries.mtimes
+            order = array("I", sorted(self._order("path"), key=column.__getitem__))
+        self._orders[key] = order
+        return order
+
+    def _index_paths(self, cancel: Optional[CancelToken]) -> None:
+        paths = bytearray()
+        ends = array("Q")
+        for path in self.entries.iter_paths():
+            paths += path
+            ends.append(len(paths))
+            paths += b"\n"
+            if not len(ends) % CANCEL_CHECK_INTERVAL and cancel is not None and cancel.cancelled:
+                raise OperationCancelledError("Filter cancelled")
+        self._paths = bytes(paths.lower())
+        self._ends = ends
@@ -0,0 +1,386 @@
+import json
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from .compression import CODECS
+from .entrytable import NO_CODEC, NO_OFFSET, EntryTable, EntryView
+
+
+MAGIC = b"SAMF"
+FORMAT_VERSION = 1
+RESTART_INTERVAL = 16
+MAX_PATH_BYTES = 0xFFFF
+
+# MAGIC, FORMAT_VERSION, HEAD_LENGTH, SECTION_COUNT
+_PREAMBLE = struct.Struct("<4sB3xII")
+_SECTION = struct.Struct("<QQ")
+_PATH_RECORD = struct.Struct("<HH")
+
+(
+    PATHS,
+    RESTARTS,
+    SIZES,
+    MTIMES,
+    OFFSETS,
+    LENGTHS,
+    CODEC_IDS,
+    CHUNK_ENDS,
+    CHUNK_REFS,
+    CHUNK_OFFSETS,
+    CHUNK_LENGTHS,
+    CHUNK_SIZES,
+    CHUNK_CODEC_IDS,
+    CHUNK_HASHES,
+) = range(14)
+SECTION_COUNT = 14
+
+_HASH_SIZE = 32
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _column(fmt: str, values: Any) -> bytes:
+    column = array(fmt, values)
+    if not _LITTLE_ENDIAN:
+        column.byteswap()
+    return column.tobytes()
+
+
+def _pad8(data: bytearray) -> None:
+    data += bytes(-len(data) % 8)
+
+
+def _front_code(paths: Iterator[bytes]) -> tuple:
+    # Each path is stored as (bytes shared with the previous path, suffix
+    # length, suffix). Every RESTART_INTERVAL-th path is stored in full so
+    # that lookups can start decoding there.
+    out = bytearray()
+    restarts = array("Q")
+    previous = b""
+    for i, path in enumerate(paths):
+        if len(path) > MAX_PATH_BYTES:
+            raise ValueError("Entry path too long")
+        if i % RESTART_INTERVAL == 0:
+            restarts.append(len(out))
+            shared = 0
+        else:
+            # Longest common prefix by bisection on slice comparisons.
+            shared, high = 0, min(len(path), len(previous))
+            while shared < high:
+                mid = (shared + high + 1) // 2
+                if path[:mid] == previous[:mid]:
+                    shared = mid
+                else:
+                    high = mid - 1
+        suffix = path[shared:]
+        out += _PATH_RECORD.pack(shared, len(suffix))
+        out += suffix
+        previous = path
+    return bytes(out), restarts
+
+
+def encode_manifest(manifest: Dict[str, Any]) -> bytes:
+    """Encodes a v2 manifest whose ``"entries"`` is an EntryTable.
+
+    Everything except entries and chunks goes into a small JSON head.
+    Entries are sorted by path, paths are front-coded and all numbers are
+    fixed-width little-endian columns, so a reader can look up and list
+    entries without decoding the whole manifest.
+    """
+    table: EntryTable = manifest["entries"]
+    chunks: Optional[List[Dict[str, Any]]] = manifest.get("chunks")
+    head = {k: v for k, v in manifest.items() if k not in ("entries", "chunks")}
+    head["entry_count"] = len(table)
+    if chunks is not None:
+        head["chunk_count"] = len(chunks)
+
+    order = sorted(range(len(table)), key=table.path_bytes)
+    paths, restarts = _front_code(table.path_bytes(i) for i in order)
+
+    sections: List[bytes] = [b""] * SECTION_COUNT
+    sections[PATHS] = paths
+    sections[RESTARTS] = _column("Q", restarts)
+    sections[SIZES] = _column("Q", (table.sizes[i] for i in order))
+    sections[MTIMES] = _column("d", (table.mtimes[i] for i in order))
+    sections[OFFSETS] = _column("q", (table.offsets[i] for i in order))
+    sections[LENGTHS] = _column("Q", (table.lengths[i] for i in order))
+    sections[CODEC_IDS] = _column("b", (table.codecs[i] for i in order))
+    if chunks is not None:
+        refs = array("Q")
+        ends = array("Q")
+        for i in order:
+            refs.extend(table.chunks(i) or ())
+            ends.append(len(refs))
+        sections[CHUNK_ENDS] = _column("Q", ends)
+        sections[CHUNK_REFS] = _column("Q", refs)
+        sections[CHUNK_OFFSETS] = _column("Q", (c["offset"] for c in chunks))
+        sections[CHUNK_LENGTHS] = _column("Q", (c["length"] for c in chunks))
+        sections[CHUNK_SIZES] = _column("Q", (c["size"] for c in chunks))
+        sections[CHUNK_CODEC_IDS] = _column(
+            "b", (CODECS.index(c["codec"]) if "codec" in c else NO_CODEC for c in chunks)
+        )
+        sections[CHUNK_HASHES] = b"".join(bytes.fromhex(c["sha256"]) for c in chunks)
+
+    head_bytes = json.dumps(head, ensure_ascii=False).encode("utf-8")
+    out = bytearray(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(head_bytes), SECTION_COUNT))
+    out += head_bytes
+    _pad8(out)
+    table_at = len(out)
+    out += bytes(_SECTION.size * SECTION_COUNT)
+    for index, data in enumerate(sections):
+        _pad8(out)
+        _SECTION.pack_into(out, table_at + index * _SECTION.size, len(out), len(data))
+        out += data
+    return bytes(out)
+
+
+def is_binary_manifest(data: bytes) -> bool:
+    return data[:len(MAGIC)] == MAGIC
+
+
+def _cast(view: memoryview, fmt: str) -> Sequence:
+    if _LITTLE_ENDIAN:
+        return view.cast(fmt)
+    column = array(fmt, view.tobytes())
+    column.byteswap()
+    return column
+
+
+class PackedEntries(Sequence[EntryView]):
+    """Read-only entries of a binary manifest, decoded on access.
+
+    Rows are sorted by path. ``find()`` and ``prefix_range()`` use binary
+    search over the front-coding restart points; iteration decodes the
+    paths front to back. Rows are EntryView objects, as with EntryTable.
+    """
+
+    def __init__(self, paths: memoryview, restarts: Sequence, count: int, columns: Dict[int, Sequence]) -> None:
+        self._paths = paths
+        self._restarts = restarts
+        self._count = count
+        self.sizes = columns[SIZES]
+        self.mtimes = columns[MTIMES]
+        self.offsets = columns[OFFSETS]
+        self.lengths = columns[LENGTHS]
+        self.codecs = columns[CODEC_IDS]
+        self._chunk_ends = columns[CHUNK_ENDS]
+        self._chunk_refs = columns[CHUNK_REFS]
+        # (index, path, position after it) of the last decoded row
+        self._cursor = (-1, b"", 0)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [EntryView(self, i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return EntryView(self, index)
+
+    def __iter__(self) -> Iterator[EntryView]:
+        for i in range(self._count):
+            yield EntryView(self, i)
+
+    def _decode(self, pos: int, previous: bytes) -> tuple:
+        shared, length = _PATH_RECORD.unpack_from(self._paths, pos)
+        pos += _PATH_RECORD.size
+        end = pos + length
+        if shared > len(previous) or end > len(self._paths):
+            raise ValueError("Manifest path index corrupt")
+        return previous[:shared] + bytes(self._paths[pos:end]), end
+
+    def iter_paths(self, start: int = 0) -> Iterator[bytes]:
+        block = start // RESTART_INTERVAL
+        if block >= len(self._restarts):
+            return
+        pos = self._restarts[block]
+        path = b""
+        for i in range(block * RESTART_INTERVAL, self._count):
+            path, pos = self._decode(pos, path)
+            if i >= start:
+                yield path
+
+    def path_bytes(self, index: int) -> bytes:
+        # Rows are mostly read in ascending order: decoding continues from
+        # the previous row when it lies in the same block.
+        cursor, path, pos = self._cursor
+        if not cursor < index < (cursor // RESTART_INTERVAL + 1) * RESTART_INTERVAL:
+            block = index // RESTART_INTERVAL
+            if block >= len(self._restarts):
+                raise IndexError(index)
+            cursor, path, pos = block * RESTART_INTERVAL - 1, b"", self._restarts[block]
+        while cursor < index:
+            path, pos = self._decode(pos, path)
+            cursor += 1
+        self._cursor = (cursor, path, pos)
+        return path
+
+    def path(self, index: int) -> str:
+        return self.path_bytes(index).decode("utf-8", "surrogateescape")
+
+    def abs_path(self, index: int) -> Path:
+        raise ValueError("Entry has no source path")
+
+    def get_codec(self, index: int) -> Optional[str]:
+        codec = self.codecs[index]
+        return None if codec == NO_CODEC else CODECS[codec]
+
+    def chunks(self, index: int) -> Optional[List[int]]:
+        if not len(self._chunk_ends) or self.offsets[index] != NO_OFFSET:
+            return None
+        start = self._chunk_ends[index - 1] if index else 0
+        return list(self._chunk_refs[start:self._chunk_ends[index]])
+
+    def _lower_bound(self, key: bytes) -> int:
+        # Index of the first path >= key: binary search over the full paths
+        # at the restart points, then a scan of at most one block.
+        restarts = self._restarts
+        first_keys = _RestartKeys(self)
+        block = max(bisect_right(first_keys, key) - 1, 0)
+        i = block * RESTART_INTERVAL
+        if block < len(restarts):
+            for path in self.iter_paths(i):
+                if path >= key or i >= (block + 1) * RESTART_INTERVAL:
+                    break
+                i += 1
+        return min(i, self._count)
+
+    def find(self, path: str) -> Optional[EntryView]:
+        key = path.encode("utf-8", "surrogateescape")
+        i = self._lower_bound(key)
+        if i < self._count and self.path_bytes(i) == key:
+            return EntryView(self, i)
+        return None
+
+    def prefix_range(self, prefix: str) -> range:
+        """Indices of the rows whose path starts with ``prefix``."""
+        key = prefix.encode("utf-8", "surrogateescape")
+        start = self._lower_bound(key)
+        end = start
+        for path in self.iter_paths(start):
+            if not path.startswith(key):
+                break
+            end += 1
+        return range(start, end)
+
+
+class _RestartKeys(Sequence[bytes]):
+    # The full path stored at each restart point, for bisect.
+    def __init__(self, entries: PackedEntries) -> None:
+        self._entries = entries
+
+    def __len__(self) -> int:
+        return len(self._entries._restarts)
+
+    def __getitem__(self, block: Any) -> Any:
+        path, _end = self._entries._decode(self._entries._restarts[block], b"")
+        return path
+
+
+class PackedChunks(Sequence[Dict[str, Any]]):
+    """Chunk records of a binary manifest as dicts, built on access."""
+
+    def __init__(self, count: int, columns: Dict[int, Any]) -> None:
+        self._count = count
+        self._offsets = columns[CHUNK_OFFSETS]
+        self._lengths = columns[CHUNK_LENGTHS]
+        self._sizes = columns[CHUNK_SIZES]
+        self._codecs = columns[CHUNK_CODEC_IDS]
+        self._hashes = columns[CHUNK_HASHES]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        record = {
+            "offset": self._offsets[index],
+            "length": self._lengths[index],
+            "size": self._sizes[index],
+            "sha256": bytes(self._hashes[index * _HASH_SIZE:(index + 1) * _HASH_SIZE]).hex(),
+        }
+        codec = self._codecs[index]
+        if codec != NO_CODEC:
+            record["codec"] = CODECS[codec]
+        return record
+
+
+_COLUMN_FORMATS = {
+    RESTARTS: "Q",
+    SIZES: "Q",
+    MTIMES: "d",
+    OFFSETS: "q",
+    LENGTHS: "Q",
+    CODEC_IDS: "b",
+    CHUNK_ENDS: "Q",
+    CHUNK_REFS: "Q",
+    CHUNK_OFFSETS: "Q",
+    CHUNK_LENGTHS: "Q",
+    CHUNK_SIZES: "Q",
+    CHUNK_CODEC_IDS: "b",
+}
+
+
+def decode_manifest(data: bytes) -> Dict[str, Any]:
+    """Decodes a binary manifest; entries and chunks stay packed in ``data``.
+
+    Raises ``ValueError`` if the layout is inconsistent.
+    """
+    view = memoryview(data)
+    if len(view) < _PREAMBLE.size:
+        raise ValueError("Manifest truncated")
+    magic, version, head_length, section_count = _PREAMBLE.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION or section_count < SECTION_COUNT:
+        raise ValueError("Unsupported manifest encoding")
+
+    head_end = _PREAMBLE.size + head_length
+    try:
+        head = json.loads(bytes(view[_PREAMBLE.size:head_end]).decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as ex:
+        raise ValueError("Manifest head invalid") from ex
+
+    table_at = head_end + (-head_end % 8)
+    if table_at + section_count * _SECTION.size > len(view):
+        raise ValueError("Manifest truncated")
+    sections: Dict[int, Any] = {}
+    for index in range(SECTION_COUNT):
+        offset, length = _SECTION.unpack_from(view, table_at + index * _SECTION.size)
+        if offset + length > len(view):
+            raise ValueError("Manifest section out of range")
+        section = view[offset:offset + length]
+        fmt = _COLUMN_FORMATS.get(index)
+        if fmt is not None:
+            if length % array(fmt).itemsize:
+                raise ValueError("Manifest section corrupt")
+            section = _cast(section, fmt)
+        sections[index] = section
+
+    count = head.pop("entry_count", 0)
+    restarts_needed = -(-count // RESTART_INTERVAL)
+    if len(sections[RESTARTS]) != restarts_needed or any(
+        len(sections[i]) != count for i in (SIZES, MTIMES, OFFSETS, LENGTHS, CODEC_IDS)
+    ):
+        raise ValueError("Manifest entry columns inconsistent")
+    if len(sections[CHUNK_ENDS]) not in (0, count):
+        raise ValueError("Manifest entry columns inconsistent")
+
+    manifest = dict(head)
+    manifest["entries"] = PackedEntries(sections[PATHS], sections[RESTARTS], count, sections)
+    if "chunk_count" in head:
+        chunk_count = manifest.pop("chunk_count")
+        if any(len(sections[i]) != chunk_count for i in (CHUNK_OFFSETS, CHUNK_LENGTHS, CHUNK_SIZES, CHUNK_CODEC_IDS)) \
+                or len(sections[CHUNK_HASHES]) != chunk_count * _HASH_SIZE:
+            raise ValueError("Manifest chunk columns inconsistent")
+        manifest["chunks"] = PackedChunks(chunk_count, sections)
+    return manifest
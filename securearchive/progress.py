@@ -0,0 +1,55 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+@dataclass(frozen=True)
+class Progress:
+    """A snapshot of a running operation, passed to progress callbacks.
+
+    ``phase`` is ``"scan"``, ``"encrypt"``, ``"decrypt"`` or ``"verify"``.
+    Totals are 0 while they are not known yet (during the scan).
+    """
+
+    phase: str
+    bytes_done: int
+    bytes_total: int
+    entries_done: int
+    entries_total: int
+    elapsed: float
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.bytes_total:
+            return None
+        return min(self.bytes_done / self.bytes_total, 1.0)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds left, from the throughput so far."""
+        if not self.bytes_total or not self.bytes_done:
+            return None
+        return self.elapsed * (self.bytes_total - self.bytes_done) / self.bytes_done
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class CancelToken:
+    """Cancels a running operation from another thread.
+
+    The engine checks the token between files and segments and stops with
+    ``OperationCancelledError``. Output that was not finished is removed
+    where the operation can do so: an encryption leaves no container, an
+    append leaves the previous generation.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
@@ -0,0 +1,176 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+# Order in which phases are reported; phases an operation does not have
+# are left out.
+PHASES = ("scan", "kdf", "manifest", "read", "chunk", "hash", "compress", "encrypt", "decrypt", "write")
+PROFILE_LINES = 30
+
+Clock = Tuple[float, float]
+
+
+def clock() -> Clock:
+    """Wall and CPU time of the calling thread, for OperationStats.record()."""
+    return time.perf_counter(), time.thread_time()
+
+
+@dataclass
+class PhaseStats:
+    """Time and volume of one phase of an operation.
+
+    ``wall`` and ``cpu`` are summed over the threads that ran the phase, so
+    with workers they can exceed the operation's own wall time.
+    """
+
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    entries: int = 0
+    calls: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second of wall time."""
+        return self.bytes / self.wall if self.wall > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "bytes": self.bytes,
+            "entries": self.entries,
+            "calls": self.calls,
+            "throughput": self.throughput,
+        }
+
+
+@dataclass
+class OperationStats:
+    """Timings of one engine operation, filled in while it runs.
+
+    Pass an instance as ``stats=`` to an engine function and read it after
+    the call returns (or raises). ``wall`` and ``cpu`` cover the whole
+    operation, ``cpu`` including all threads of the process; ``phases``
+    breaks the work down by kind. With ``profile`` the calling thread runs
+    under cProfile and ``profile_report`` holds the top functions by
+    cumulative time; with ``trace_memory`` tracemalloc records the peak of
+    Python allocations in ``peak_memory``. Both slow the operation down.
+    """
+
+    operation: str = ""
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    entries: int = 0
+    error: Optional[str] = None
+    phases: Dict[str, PhaseStats] = field(default_factory=dict)
+    profile: bool = False
+    trace_memory: bool = False
+    profile_report: Optional[str] = None
+    peak_memory: Optional[int] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def record(self, phase: str, since: Clock, nbytes: int = 0, entries: int = 0) -> None:
+        """Adds the time since ``since`` (a clock() reading) to ``phase``."""
+        wall, cpu = clock()
+        self.add(phase, wall - since[0], cpu - since[1], nbytes, entries)
+
+    def add(self, phase: str, wall: float, cpu: float, nbytes: int = 0, entries: int = 0) -> None:
+        # Called from worker threads as well.
+        with self._lock:
+            p = self.phases.get(phase)
+            if p is None:
+                p = self.phases[phase] = PhaseStats()
+            p.wall += wall
+            p.cpu += cpu
+            p.bytes += nbytes
+            p.entries += entries
+            p.calls += 1
+
+    @contextmanager
+    def phase(self, phase: str, nbytes: int = 0, entries: int = 0) -> Iterator[None]:
+        since = clock()
+        try:
+            yield
+        finally:
+            self.record(phase, since, nbytes, entries)
+
+    @contextmanager
+    def measure(self, operation: str) -> Iterator["OperationStats"]:
+        """Times ``operation`` as a whole and hands the result to the stats hook."""
+        self.operation = operation
+        profiler = cProfile.Profile() if self.profile else None
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield self
+        except BaseException as ex:
+            self.error = type(ex).__name__
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self.wall = time.perf_counter() - wall
+            self.cpu = time.process_time() - cpu
+            if self.trace_memory:
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+            if profiler is not None:
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+                self.profile_report = out.getvalue()
+            hook = _hook
+            if hook is not None:
+                hook(self)
+
+    @property
+    def throughput(self) -> float:
+        return self.bytes / self.wall if self.wall > 0 else 0.0
+
+    def ordered_phases(self) -> Iterator[Tuple[str, PhaseStats]]:
+        known = [(name, self.phases[name]) for name in PHASES if name in self.phases]
+        other = [(name, p) for name, p in self.phases.items() if name not in PHASES]
+        return iter(known + other)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "operation": self.operation,
+            "wall": self.wall,
+            "cpu": self.cpu,
+            "bytes": self.bytes,
+            "entries": self.entries,
+            "throughput": self.throughput,
+            "error": self.error,
+            "phases": {name: p.to_dict() for name, p in self.ordered_phases()},
+        }
+        if self.peak_memory is not None:
+            data["peak_memory"] = self.peak_memory
+        return data
+
+
+StatsHook = Callable[[OperationStats], None]
+
+_hook: Optional[StatsHook] = None
+
+
+def set_stats_hook(hook: Optional[StatsHook]) -> None:
+    """Calls ``hook`` with the OperationStats of every engine operation in this process.
+
+    The hook runs on the thread that called the engine, after the operation
+    has finished or failed. ``None`` removes it.
+    """
+    global _hook
+    _hook = hook
@@ -1,8 +1,9 @@
 import sys
 import webbrowser
+from datetime import datetime
 from pathlib import Path
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, Qt, Signal
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -20,6 +21,8 @@ from PySide6.QtWidgets import (
     QMessageBox,
     QCheckBox,
     QSpinBox,
+    QTableView,
+    QHeaderView,
 )
 
 from securearchive.engine import (
@@ -31,8 +34,148 @@ from securearchive.engine import (
     SecureArchiveError,
     InvalidContainerError,
     WrongPasswordError,
+    OperationCancelledError,
 )
 from securearchive.i18n import tr
+from securearchive.keycache import disable_key_cache, enable_key_cache
+from securearchive.listing import EntryListing
+from securearchive.progress import CancelToken, Progress
+
+
+class WorkerSignals(QObject):
+    progress = Signal(object)
+    finished = Signal(object)
+    failed = Signal(object)
+
+
+class EngineWorker(QRunnable):
+    """Runs one engine call on a QThreadPool thread.
+
+    Results, exceptions and Progress snapshots are delivered through
+    ``signals``, which Qt queues to the UI thread.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as ex:
+            self.signals.failed.emit(ex)
+        else:
+            self.signals.finished.emit(result)
+
+
+def _load_listing(container_path: str, password: str) -> EntryListing:
+    # The listing sorts JSON manifests by path, so it is built off the UI thread.
+    return EntryListing(list_container(container_path, password))
+
+
+def _format_eta(seconds: float | None) -> str:
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class EntryListModel(QAbstractTableModel):
+    """Table model over an EntryListing.
+
+    Rows are handed to the view in pages of FETCH_SIZE through
+    canFetchMore()/fetchMore(), and data() decodes only the rows the view
+    paints, so the model stays cheap for containers with millions of
+    entries. Sorting and filtering replace the row order and reset the
+    fetched page count.
+    """
+
+    COLUMNS = ("path", "size", "mtime")
+    FETCH_SIZE = 1000
+
+    def __init__(self, lang: str, parent=None):
+        super().__init__(parent)
+        self.lang = lang
+        self.listing: EntryListing | None = None
+        self._fetched = 0
+
+    def set_listing(self, listing: EntryListing | None):
+        self.beginResetModel()
+        self.listing = listing
+        self._fetched = 0
+        self.endResetModel()
+
+    def set_filter(self, text: str, mask):
+        if self.listing is None:
+            return
+        self.beginResetModel()
+        self.listing.set_filter(text, mask)
+        self._fetched = 0
+        self.endResetModel()
+
+    def set_lang(self, lang: str):
+        self.lang = lang
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self.COLUMNS) - 1)
+
+    def total(self) -> int:
+        return len(self.listing.entries) if self.listing is not None else 0
+
+    def shown(self) -> int:
+        return len(self.listing) if self.listing is not None else 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._fetched < self.shown()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.FETCH_SIZE, self.shown() - self._fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._fetched, self._fetched + count - 1)
+        self._fetched += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.listing is None:
+            return None
+        column = self.COLUMNS[index.column()]
+        if role == Qt.TextAlignmentRole:
+            if column == "path":
+                return int(Qt.AlignLeft | Qt.AlignVCenter)
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role != Qt.DisplayRole:
+            return None
+        i = self.listing.index(index.row())
+        entries = self.listing.entries
+        if column == "path":
+            return entries.path(i)
+        if column == "size":
+            return str(entries.sizes[i])
+        return datetime.fromtimestamp(entries.mtimes[i]).strftime("%Y-%m-%d %H:%M:%S")
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal or role != Qt.DisplayRole:
+            return None
+        return tr(self.lang, f"gui.list.column.{self.COLUMNS[section]}")
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if self.listing is None:
+            return
+        self.beginResetModel()
+        self.listing.sort(self.COLUMNS[column], order == Qt.DescendingOrder)
+        self._fetched = 0
+        self.endResetModel()
 
 
 class SecureArchiveWindow(QMainWindow):
@@ -40,6 +183,26 @@ class SecureArchiveWindow(QMainWindow):
         super().__init__()
         self.lang = "de"
 
+        # Listing, verifying and decrypting the same container in one
+        # session derive the key only once; the keys are wiped on close.
+        enable_key_cache()
+
+        # Engine calls run here, one at a time, so the window stays
+        # responsive during key derivation and long transfers.
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._cancel_token: CancelToken | None = None
+        self._on_done = None
+        self._on_failed = None
+        self._worker: EngineWorker | None = None
+
+        # Filter matching for the listing runs on its own thread, so that
+        # typing in the filter box never waits for it.
+        self.filter_pool = QThreadPool(self)
+        self.filter_pool.setMaxThreadCount(1)
+        self._filter_token: CancelToken | None = None
+        self._filter_worker: EngineWorker | None = None
+
         self.setWindowTitle(tr(self.lang, "gui.title"))
         self.resize(900, 600)
 
@@ -75,14 +238,22 @@ class SecureArchiveWindow(QMainWindow):
         main_layout.addWidget(self.tabs, 1)
 
         bottom_layout = QVBoxLayout()
+        progress_row = QHBoxLayout()
         self.progress = QProgressBar()
         self.progress.setRange(0, 100)
         self.progress.setValue(0)
+        self.progress_label = QLabel()
+        self.cancel_btn = QPushButton()
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.on_cancel_clicked)
+        progress_row.addWidget(self.progress, 1)
+        progress_row.addWidget(self.progress_label)
+        progress_row.addWidget(self.cancel_btn)
 
         self.log = QTextEdit()
         self.log.setReadOnly(True)
 
-        bottom_layout.addWidget(self.progress)
+        bottom_layout.addLayout(progress_row)
         bottom_layout.addWidget(self.log, 1)
         main_layout.addLayout(bottom_layout)
 
@@ -96,24 +267,131 @@ class SecureArchiveWindow(QMainWindow):
 
         self.append_log(tr(self.lang, "gui.status.ready"))
 
+    def closeEvent(self, event):
+        if self._cancel_token is not None:
+            self._cancel_token.cancel()
+        if self._filter_token is not None:
+            self._filter_token.cancel()
+        self.pool.waitForDone()
+        self.filter_pool.waitForDone()
+        disable_key_cache()
+        super().closeEvent(event)
+
     def append_log(self, text: str):
         self.log.append(text)
 
     def set_status_running(self):
-        self.progress.setValue(10)
+        # Busy indicator until the engine reports totals.
+        self.progress.setRange(0, 0)
+        self.progress_label.clear()
         self.append_log(tr(self.lang, "gui.status.running"))
 
     def set_status_done(self, msg_key: str | None = None):
+        self.progress.setRange(0, 100)
         self.progress.setValue(100)
         if msg_key:
             self.append_log(tr(self.lang, msg_key))
         self.append_log(tr(self.lang, "gui.status.done"))
 
     def set_status_error(self, text: str):
+        self.progress.setRange(0, 100)
         self.progress.setValue(0)
         self.append_log(tr(self.lang, "gui.status.error"))
         self.append_log(text)
 
+    def set_status_cancelled(self):
+        self.progress.setRange(0, 100)
+        self.progress.setValue(0)
+        self.progress_label.clear()
+        self.append_log(tr(self.lang, "gui.status.cancelled"))
+
+    def _set_busy(self, busy: bool, cancellable: bool = False):
+        for button in (self.enc_button, self.dec_button, self.list_button, self.ver_button, self.pw_button):
+            button.setEnabled(not busy)
+        self.cancel_btn.setEnabled(busy and cancellable)
+
+    def run_in_background(self, fn, *args, on_done, on_failed=None, cancellable=True, **kwargs):
+        """Runs an engine call on the thread pool.
+
+        ``on_done(result)`` runs on the UI thread when the call returns,
+        ``on_failed(exception)`` when it raises; the default reports the
+        error. Cancellable calls get ``progress`` and ``cancel`` arguments.
+        """
+        self._on_done = on_done
+        self._on_failed = on_failed or self._report_error
+        self._cancel_token = CancelToken() if cancellable else None
+        worker = EngineWorker(fn, *args, **kwargs)
+        if cancellable:
+            worker.kwargs["progress"] = worker.signals.progress.emit
+            worker.kwargs["cancel"] = self._cancel_token
+        worker.signals.progress.connect(self.on_progress)
+        worker.signals.finished.connect(self.on_worker_finished)
+        worker.signals.failed.connect(self.on_worker_failed)
+        self._set_busy(True, cancellable)
+        self.set_status_running()
+        # Held until the next call: the pool drops the runnable after run(),
+        # and its signals must outlive the queued deliveries.
+        self._worker = worker
+        self.pool.start(worker)
+
+    def on_progress(self, p: Progress):
+        if p.fraction is None:
+            self.progress.setRange(0, 0)
+            if p.phase == "scan":
+                self.progress_label.setText(tr(self.lang, "gui.progress.scanning"))
+            return
+        self.progress.setRange(0, 1000)
+        self.progress.setValue(int(p.fraction * 1000))
+        values = {
+            "done": p.entries_done,
+            "total": p.entries_total,
+            "mib_done": p.bytes_done / (1 << 20),
+            "mib_total": p.bytes_total / (1 << 20),
+            "rate": p.bytes_done / (1 << 20) / p.elapsed if p.elapsed else 0.0,
+            "eta": _format_eta(p.eta),
+        }
+        key = "gui.progress.files" if p.entries_total else "gui.progress.bytes"
+        self.progress_label.setText(tr(self.lang, key, **values))
+
+    def on_worker_finished(self, result):
+        self._set_busy(False)
+        self._cancel_token = None
+        self._on_done(result)
+
+    def on_worker_failed(self, ex: Exception):
+        self._set_busy(False)
+        self._cancel_token = None
+        if isinstance(ex, OperationCancelledError):
+            self.set_status_cancelled()
+            return
+        self._on_failed(ex)
+
+    def on_cancel_clicked(self):
+        if self._cancel_token is not None:
+            self._cancel_token.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.append_log(tr(self.lang, "gui.status.cancelling"))
+
+    def _error_message(self, ex: Exception) -> str:
+        if isinstance(ex, FileExistsError):
+            return tr(self.lang, "encrypt.overwrite_blocked")
+        if isinstance(ex, FileNotFoundError):
+            return tr(self.lang, "encrypt.source_missing")
+        if isinstance(ex, InvalidContainerError):
+            return tr(self.lang, "error.invalid_container")
+        if isinstance(ex, WrongPasswordError):
+            return tr(self.lang, "error.wrong_password")
+        if isinstance(ex, SecureArchiveError):
+            return f"{tr(self.lang, 'common.error')}: {ex}"
+        if isinstance(ex, OSError):
+            return tr(self.lang, "error.io")
+        return f"{tr(self.lang, 'error.generic')}: {ex}"
+
+    def _report_error(self, ex: Exception):
+        msg = self._error_message(ex)
+        self.set_status_error(msg)
+        self.show_error_box(msg)
+
     def show_error_box(self, message: str, title: str | None = None):
         if title is None:
             title = tr(self.lang, "common.error")
@@ -138,6 +416,7 @@ class SecureArchiveWindow(QMainWindow):
 
         self.github_btn.setText(tr(self.lang, "gui.button.github"))
         self.info_btn.setText(tr(self.lang, "gui.button.info"))
+        self.cancel_btn.setText(tr(self.lang, "gui.button.cancel"))
 
         self.enc_input_label.setText(tr(self.lang, "gui.encrypt.input_label"))
         self.enc_output_label.setText(tr(self.lang, "gui.encrypt.output_label"))
@@ -161,6 +440,10 @@ class SecureArchiveWindow(QMainWindow):
         self.list_password_label.setText(tr(self.lang, "gui.list.password_label"))
         self.list_browse_container_btn.setText(tr(self.lang, "gui.button.browse_container"))
         self.list_button.setText(tr(self.lang, "gui.list.button"))
+        self.list_filter_label.setText(tr(self.lang, "gui.list.filter_label"))
+        self.list_filter_edit.setPlaceholderText(tr(self.lang, "gui.list.filter_placeholder"))
+        self.list_model.set_lang(self.lang)
+        self.update_list_count()
 
         self.ver_container_label.setText(tr(self.lang, "gui.verify.container_label"))
         self.ver_password_label.setText(tr(self.lang, "gui.verify.password_label"))
@@ -315,7 +598,40 @@ class SecureArchiveWindow(QMainWindow):
         row_btn.addWidget(self.list_button)
         layout.addLayout(row_btn)
 
-        layout.addStretch()
+        row_filter = QHBoxLayout()
+        self.list_filter_label = QLabel()
+        self.list_filter_edit = QLineEdit()
+        self.list_filter_edit.setClearButtonEnabled(True)
+        self.list_filter_edit.textChanged.connect(self.on_list_filter_changed)
+        self.list_count_label = QLabel()
+        row_filter.addWidget(self.list_filter_label)
+        row_filter.addWidget(self.list_filter_edit, 1)
+        row_filter.addWidget(self.list_count_label)
+        layout.addLayout(row_filter)
+
+        # Typing restarts the timer; the filter runs once input pauses.
+        self.list_filter_timer = QTimer(self)
+        self.list_filter_timer.setSingleShot(True)
+        self.list_filter_timer.setInterval(150)
+        self.list_filter_timer.timeout.connect(self.apply_list_filter)
+
+        self.list_model = EntryListModel(self.lang, self)
+        self.list_view = QTableView()
+        self.list_view.setModel(self.list_model)
+        self.list_view.setSortingEnabled(True)
+        self.list_view.sortByColumn(0, Qt.AscendingOrder)
+        self.list_view.setSelectionBehavior(QTableView.SelectRows)
+        self.list_view.setWordWrap(False)
+        # Fixed row heights and no per-row header keep the view from
+        # measuring every fetched row.
+        self.list_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.list_view.verticalHeader().hide()
+        header = self.list_view.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.Interactive)
+        header.setSectionResizeMode(2, QHeaderView.Interactive)
+        layout.addWidget(self.list_view, 1)
+
         self.tabs.addTab(tab, "List")
 
     def _build_verify_tab(self):
@@ -508,32 +824,15 @@ class SecureArchiveWindow(QMainWindow):
             self.show_error_box(msg)
             return
 
-        self.set_status_running()
-
-        try:
-            encrypt_path(str(src), output_path, password, iterations=iterations, overwrite=overwrite)
-        except FileExistsError:
-            msg = tr(self.lang, "encrypt.overwrite_blocked")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except FileNotFoundError:
-            msg = tr(self.lang, "encrypt.source_missing")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except SecureArchiveError as ex:
-            msg = f"{tr(self.lang, 'common.error')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except OSError:
-            msg = tr(self.lang, "error.io")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except Exception as ex:
-            msg = f"{tr(self.lang, 'error.generic')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        else:
-            self.set_status_done("gui.msg.encrypt.success")
+        self.run_in_background(
+            encrypt_path,
+            str(src),
+            output_path,
+            password,
+            iterations=iterations,
+            overwrite=overwrite,
+            on_done=lambda _report: self.set_status_done("gui.msg.encrypt.success"),
+        )
 
     def on_decrypt_clicked(self):
         container_path = self.dec_container_edit.text().strip()
@@ -554,32 +853,13 @@ class SecureArchiveWindow(QMainWindow):
             return
 
         out_dir = Path(output_dir)
-        self.set_status_running()
-
-        try:
-            decrypt_container(str(cont), str(out_dir), password)
-        except InvalidContainerError:
-            msg = tr(self.lang, "error.invalid_container")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except WrongPasswordError:
-            msg = tr(self.lang, "error.wrong_password")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except SecureArchiveError as ex:
-            msg = f"{tr(self.lang, 'common.error')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except OSError:
-            msg = tr(self.lang, "error.io")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except Exception as ex:
-            msg = f"{tr(self.lang, 'error.generic')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        else:
-            self.set_status_done("gui.msg.decrypt.success")
+        self.run_in_background(
+            decrypt_container,
+            str(cont),
+            str(out_dir),
+            password,
+            on_done=lambda _result: self.set_status_done("gui.msg.decrypt.success"),
+        )
 
     def on_list_clicked(self):
         container_path = self.list_container_edit.text().strip()
@@ -598,37 +878,49 @@ class SecureArchiveWindow(QMainWindow):
             self.show_error_box(msg)
             return
 
-        self.set_status_running()
+        self.run_in_background(_load_listing, str(cont), password, on_done=self._show_entries, cancellable=False)
 
-        try:
-            entries = list_container(str(cont), password)
-        except InvalidContainerError:
-            msg = tr(self.lang, "error.invalid_container")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-            return
-        except WrongPasswordError:
-            msg = tr(self.lang, "error.wrong_password")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
+    def _show_entries(self, listing):
+        self.list_model.set_listing(listing)
+        header = self.list_view.horizontalHeader()
+        self.list_model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())
+        self.apply_list_filter()
+        self.set_status_done("gui.msg.list.success")
+
+    def update_list_count(self):
+        self.list_count_label.setText(
+            tr(self.lang, "gui.list.count", shown=self.list_model.shown(), total=self.list_model.total())
+        )
+
+    def on_list_filter_changed(self, _text: str):
+        self.list_filter_timer.start()
+
+    def apply_list_filter(self):
+        listing = self.list_model.listing
+        if listing is None:
             return
-        except SecureArchiveError as ex:
-            msg = f"{tr(self.lang, 'common.error')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
+        text = self.list_filter_edit.text()
+        if self._filter_token is not None:
+            self._filter_token.cancel()
+            self._filter_token = None
+        if not text:
+            self.list_model.set_filter(text, None)
+            self.update_list_count()
             return
-        except Exception as ex:
-            msg = f"{tr(self.lang, 'error.generic')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
+        self._filter_token = token = CancelToken()
+        worker = EngineWorker(listing.match, text, token)
+        worker.signals.finished.connect(lambda mask: self._show_filtered(listing, text, token, mask))
+        # Cancelled matches are superseded by a newer filter; nothing to report.
+        worker.signals.failed.connect(lambda _ex: None)
+        self._filter_worker = worker
+        self.filter_pool.start(worker)
+
+    def _show_filtered(self, listing, text, token, mask):
+        if token is not self._filter_token or listing is not self.list_model.listing:
             return
-
-        self.append_log(tr(self.lang, "list.header"))
-        for e in entries:
-            line = tr(self.lang, "list.entry", path=e["path"], size=e["size"])
-            self.append_log(f" - {line}")
-
-        self.set_status_done("gui.msg.list.success")
+        self._filter_token = None
+        self.list_model.set_filter(text, mask)
+        self.update_list_count()
 
     def on_verify_clicked(self):
         container_path = self.ver_container_edit.text().strip()
@@ -647,13 +939,15 @@ class SecureArchiveWindow(QMainWindow):
             self.show_error_box(msg)
             return
 
-        self.set_status_running()
-
-        try:
-            ok = verify_container(str(cont), password)
-        except Exception:
-            ok = False
+        self.run_in_background(
+            verify_container,
+            str(cont),
+            password,
+            on_done=self._show_verify_result,
+            on_failed=lambda _ex: self._show_verify_result(False),
+        )
 
+    def _show_verify_result(self, ok: bool):
         if ok:
             self.set_status_done("gui.msg.verify.success")
         else:
@@ -689,28 +983,15 @@ class SecureArchiveWindow(QMainWindow):
             self.show_error_box(msg)
             return
 
-        self.set_status_running()
-
-        try:
-            change_password(str(cont), current_pw, new_pw, iterations=iterations)
-        except InvalidContainerError:
-            msg = tr(self.lang, "error.invalid_container")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except WrongPasswordError:
-            msg = tr(self.lang, "error.wrong_password")
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except SecureArchiveError as ex:
-            msg = f"{tr(self.lang, 'common.error')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        except Exception as ex:
-            msg = f"{tr(self.lang, 'error.generic')}: {ex}"
-            self.set_status_error(msg)
-            self.show_error_box(msg)
-        else:
-            self.set_status_done("gui.msg.passwd.success")
+        self.run_in_background(
+            change_password,
+            str(cont),
+            current_pw,
+            new_pw,
+            iterations=iterations,
+            on_done=lambda _result: self.set_status_done("gui.msg.passwd.success"),
+            cancellable=False,
+        )
 
     def on_github_clicked(self):
         webbrowser.open("https://github.com/bylickilabs")
@@ -0,0 +1,64 @@
+import json
+import random
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+from securearchive.crypto import KdfParams, derive_key, encrypt_aes_gcm, generate_salt
+from securearchive.engine import MAGIC, PAYLOAD_SEPARATOR, VERSION_V1, ContainerHeader, _build_header_bytes
+
+
+PASSWORD = "correct horse battery staple"
+# Keeps the key derivation out of the test run time.
+ITERATIONS = 1000
+SEGMENT_SIZE = 4096
+
+
+def write_tree(root: Path, files: Dict[str, bytes]) -> Path:
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return root
+
+
+def read_tree(root: Path) -> Dict[str, bytes]:
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob("*") if p.is_file()}
+
+
+def write_v1_container(path: Path, files: Dict[str, bytes], password: str = PASSWORD) -> None:
+    """Writes a version 1 container the way releases up to 1.0.0 did."""
+    salt = generate_salt(16)
+    key = derive_key(password, KdfParams(iterations=ITERATIONS, salt=salt))
+    entries = []
+    data = bytearray()
+    for rel, content in files.items():
+        entries.append({"path": rel, "size": len(content), "mtime": 1_700_000_000.0,
+                        "offset": len(data), "length": len(content)})
+        data += content
+    manifest = {
+        "version": VERSION_V1,
+        "cipher": "AES-256-GCM",
+        "kdf": {"type": "PBKDF2-SHA512", "iterations": ITERATIONS, "salt_hex": salt.hex()},
+        "root": "/original",
+        "entries": entries,
+    }
+    payload = json.dumps(manifest).encode("utf-8") + PAYLOAD_SEPARATOR + bytes(data)
+    nonce, ciphertext = encrypt_aes_gcm(key, payload, aad=MAGIC)
+    header = ContainerHeader(version=VERSION_V1, salt=salt, iterations=ITERATIONS, nonce=nonce)
+    path.write_bytes(_build_header_bytes(header) + ciphertext)
+
+
+@pytest.fixture
+def files() -> Dict[str, bytes]:
+    rng = random.Random(1)
+    tree = {f"dir_{i % 3}/file_{i:02d}.bin": rng.randbytes(rng.choice([0, 1, 100, 4095, 4096, 4097, 20000]))
+            for i in range(20)}
+    tree["text.txt"] = b"hello world\n" * 2000
+    return tree
+
+
+@pytest.fixture
+def source(tmp_path: Path, files: Dict[str, bytes]) -> Path:
+    return write_tree(tmp_path / "src", files)
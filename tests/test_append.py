@@ -0,0 +1,151 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from securearchive import engine
+from securearchive.engine import (
+    SecureArchiveError,
+    append_to_container,
+    container_space,
+    decrypt_container,
+    encrypt_path,
+    verify_container,
+)
+from securearchive.stats import OperationStats
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree, write_tree, write_v1_container
+
+
+def _extents(container: Path):
+    with engine._open_container(str(container), PASSWORD, OperationStats()) as (manifest, _payload, _n, _header):
+        return manifest["extents"]
+
+
+def _add(mode: str, container: Path, source: Path, extra: Path) -> None:
+    if mode == "append":
+        append_to_container(str(container), [str(extra)], PASSWORD)
+    else:
+        encrypt_path(str(source), str(container), PASSWORD, update=True)
+
+
+def test_append_and_update_round_trip(tmp_path, source, files):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    extra = write_tree(tmp_path / "extra", {"new.txt": b"appended"})
+    append_to_container(str(container), [str(extra)], PASSWORD)
+    (source / "text.txt").write_bytes(b"changed")
+    encrypt_path(str(source), str(container), PASSWORD, update=True)
+
+    assert verify_container(str(container), PASSWORD)
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert read_tree(tmp_path / "out") == {**files, "text.txt": b"changed"}
+    assert len(_extents(container)) == 3
+
+
+@pytest.mark.parametrize("mode", ["append", "update"])
+def test_interrupted_generation_does_not_reuse_nonces(tmp_path, source, monkeypatch, mode):
+    # A crash between writing a generation and committing its pointer
+    # leaves the extent in the file; the next generation starts from the
+    # same segment counter and must not produce the same keystream.
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    first, second = os.urandom(3 * SEGMENT_SIZE), os.urandom(3 * SEGMENT_SIZE)
+    extra = tmp_path / "extra" if mode == "append" else source
+
+    write_tree(extra, {"new.bin": first})
+    orphan_offset = container.stat().st_size
+    with monkeypatch.context() as m:
+        m.setattr(engine._ContainerWriter, "commit", lambda self, sync=False: None)
+        _add(mode, container, source, extra)
+    assert container.stat().st_size > orphan_offset
+    assert len(_extents(container)) == 1
+
+    write_tree(extra, {"new.bin": second})
+    _add(mode, container, source, extra)
+    extent = _extents(container)[-1]
+    assert extent["offset"] > orphan_offset
+
+    data = container.read_bytes()
+    n = SEGMENT_SIZE
+    orphan = data[orphan_offset:orphan_offset + n]
+    committed = data[extent["offset"]:extent["offset"] + n]
+    assert bytes(a ^ b for a, b in zip(orphan, committed)) != bytes(a ^ b for a, b in zip(first[:n], second[:n]))
+    assert "salt" in extent
+
+    assert verify_container(str(container), PASSWORD)
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert second in read_tree(tmp_path / "out").values()
+
+
+def test_failed_append_truncates(tmp_path, source, monkeypatch):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    before = container.read_bytes()
+    extra = write_tree(tmp_path / "extra", {"new.txt": b"appended"})
+
+    def fail(self, manifest, sync=False):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(engine._ContainerWriter, "write_manifest", fail)
+    with pytest.raises(OSError):
+        append_to_container(str(container), [str(extra)], PASSWORD)
+    assert container.read_bytes() == before
+
+
+def test_dead_space(tmp_path, source, files):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    space = container_space(str(container), PASSWORD)
+    assert (space.dead_bytes, space.generations) == (0, 1)
+    assert space.file_size == container.stat().st_size
+
+    # Adding a new path only leaves the old manifest behind.
+    extra = write_tree(tmp_path / "extra", {"new.txt": b"appended"})
+    append_to_container(str(container), [str(extra)], PASSWORD)
+    appended = container_space(str(container), PASSWORD)
+    assert 0 < appended.dead_bytes < len(files["text.txt"])
+    assert appended.generations == 2
+
+    # Replacing an entry leaves its old data behind as well.
+    (source / "text.txt").write_bytes(b"changed")
+    encrypt_path(str(source), str(container), PASSWORD, update=True)
+    updated = container_space(str(container), PASSWORD)
+    assert updated.dead_bytes >= appended.dead_bytes + len(files["text.txt"])
+    assert updated.live_bytes + updated.dead_bytes == container.stat().st_size
+    assert 0 < updated.dead_fraction < 1
+
+    # A full encrypt writes a compact container again.
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE,
+                 overwrite=True)
+    assert container_space(str(container), PASSWORD).dead_bytes == 0
+
+
+def test_dead_space_of_dropped_chunks(tmp_path):
+    data = os.urandom(200 << 10)
+    source = write_tree(tmp_path / "src", {"a.bin": data, "b.bin": data})
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE, dedup=True)
+    assert container_space(str(container), PASSWORD).dead_bytes == 0
+
+    # The chunks are still referenced by b.bin.
+    (source / "a.bin").unlink()
+    encrypt_path(str(source), str(container), PASSWORD, update=True)
+    kept = container_space(str(container), PASSWORD).dead_bytes
+    assert kept < len(data)
+
+    (source / "b.bin").write_bytes(b"small")
+    encrypt_path(str(source), str(container), PASSWORD, update=True)
+    assert container_space(str(container), PASSWORD).dead_bytes >= kept + len(data)
+
+
+@pytest.mark.parametrize("mode, operation", [("append", "append to"), ("update", "update")])
+def test_v1_container_cannot_grow(tmp_path, files, mode, operation):
+    container = tmp_path / "v1.secarc"
+    write_v1_container(container, files)
+    before = container.read_bytes()
+    source = write_tree(tmp_path / "src", files)
+    with pytest.raises(SecureArchiveError, match=f"Cannot {operation} a version 1 container; decrypt it"):
+        _add(mode, container, source, source)
+    assert container.read_bytes() == before
+    assert container_space(str(container), PASSWORD).dead_bytes == 0
@@ -0,0 +1,77 @@
+import pytest
+
+from securearchive import engine
+from securearchive.engine import SMALL_FILE_SIZE, _plan_batches, decrypt_container, encrypt_path, list_container
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree, write_tree
+
+TEXT = b"compressible line of text\n" * 4000
+
+
+def _files():
+    files = {f"small/file_{i:03d}.txt": TEXT[:100 + 97 * i] for i in range(40)}
+    files["large/one.bin"] = TEXT * 2
+    files["large/two.bin"] = TEXT * 3
+    return files
+
+
+def _after_scan(monkeypatch, change):
+    # Runs ``change`` between the scan and the first read.
+    scan = engine._scan
+
+    def scan_then_change(*args):
+        entries = scan(*args)
+        change()
+        return entries
+
+    monkeypatch.setattr(engine, "_scan", scan_then_change)
+
+
+def test_plan_batches(monkeypatch):
+    monkeypatch.setattr(engine, "SMALL_BATCH_SIZE", 100)
+    big = SMALL_FILE_SIZE + 1
+    sizes = [10, 20, big, 60, 50, 0, 40, big, big, 100, 5]
+    assert list(_plan_batches(sizes)) == [
+        (0, 2, True), (2, 3, False), (3, 4, True), (4, 7, True),
+        (7, 8, False), (8, 9, False), (9, 10, True), (10, 11, True),
+    ]
+    assert list(_plan_batches([])) == []
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_files_changed_after_scan(monkeypatch, tmp_path, workers, compression):
+    # Several batches, so that one is read while the previous is stored.
+    monkeypatch.setattr(engine, "SMALL_BATCH_SIZE", 16 << 10)
+    files = _files()
+    source = write_tree(tmp_path / "src", files)
+    changed = dict(files)
+    changed["small/file_003.txt"] = b"shrunk"
+    changed["small/file_010.txt"] = b""
+    changed["small/file_020.txt"] = files["small/file_020.txt"] + b"grown"
+    # Grows past SMALL_FILE_SIZE, beyond the slot of its batch buffer.
+    changed["small/file_030.txt"] = TEXT * 3
+    changed["large/one.bin"] = TEXT[:1000]
+    changed["large/two.bin"] = TEXT * 4
+    _after_scan(monkeypatch, lambda: write_tree(source, changed))
+
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE,
+                 workers=workers, compression=compression)
+
+    # The archive holds the files as they were read, and says so.
+    sizes = {e.path: e.size for e in list_container(str(container), PASSWORD)}
+    assert sizes == {path: len(data) for path, data in changed.items()}
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD, workers=workers)
+    assert read_tree(tmp_path / "out") == changed
+
+
+@pytest.mark.parametrize("victim", ["small/file_005.txt", "large/one.bin"])
+def test_file_removed_after_scan(monkeypatch, tmp_path, victim):
+    source = write_tree(tmp_path / "src", _files())
+    _after_scan(monkeypatch, (source / victim).unlink)
+
+    container = tmp_path / "c.secarc"
+    with pytest.raises(FileNotFoundError):
+        encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["src"]
@@ -0,0 +1,78 @@
+import os
+import random
+
+import pytest
+
+from securearchive import chunking
+from securearchive.chunking import AVG_CHUNK_SIZE, MAX_CHUNK_SIZE, MIN_CHUNK_SIZE, cut_point, iter_chunks
+from securearchive.engine import decrypt_container, encrypt_path
+
+from conftest import ITERATIONS, PASSWORD, read_tree, write_tree
+
+
+def _python_cuts(data: bytes):
+    cuts = []
+    with memoryview(data) as view:
+        while view:
+            n = len(view)
+            if n <= MIN_CHUNK_SIZE:
+                cut = n
+            else:
+                end = min(n, MAX_CHUNK_SIZE)
+                cut = chunking._cut_point_python(view, min(AVG_CHUNK_SIZE, end), end)
+            cuts.append(cut)
+            view = view[cut:]
+    return cuts
+
+
+def _numpy_cuts(data: bytes):
+    cuts = []
+    with memoryview(data) as view:
+        while view:
+            cut = cut_point(view)
+            cuts.append(cut)
+            view = view[cut:]
+    return cuts
+
+
+@pytest.mark.parametrize("kind", ["random", "zeros", "low_entropy", "short"])
+def test_numpy_and_python_cut_at_the_same_points(kind):
+    pytest.importorskip("numpy")
+    rng = random.Random(2)
+    data = {
+        "random": lambda: os.urandom(2 * 1024 * 1024),
+        "zeros": lambda: bytes(600 * 1024),
+        "low_entropy": lambda: bytes(rng.choice(b"ab") for _ in range(400 * 1024)),
+        "short": lambda: os.urandom(MIN_CHUNK_SIZE + 100),
+    }[kind]()
+    cuts = _numpy_cuts(data)
+    assert cuts == _python_cuts(data)
+    assert sum(cuts) == len(data)
+    assert all(c <= MAX_CHUNK_SIZE for c in cuts)
+
+
+def test_iter_chunks_reassembles(tmp_path):
+    data = os.urandom(1024 * 1024)
+    path = tmp_path / "f.bin"
+    path.write_bytes(data)
+    with open(path, "rb") as f:
+        assert b"".join(iter_chunks(f)) == data
+
+
+def test_dedup_round_trip(tmp_path):
+    image = os.urandom(1024 * 1024)
+    files = {"a.img": image, "b.img": image, "nested/c.img": image[:300 * 1024] + b"changed" + image[300 * 1024:]}
+    source = write_tree(tmp_path / "src", files)
+    sizes = {}
+    for dedup in (False, True):
+        container = tmp_path / f"dedup_{dedup}.secarc"
+        report = encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, dedup=dedup)
+        sizes[dedup] = container.stat().st_size
+        decrypt_container(str(container), str(tmp_path / f"out_{dedup}"), PASSWORD)
+        assert read_tree(tmp_path / f"out_{dedup}") == files
+
+    assert report.files == 3
+    assert report.unique_chunks < report.chunks
+    # One copy of the image plus the chunks around the edit.
+    assert sizes[True] < len(image) + 2 * MAX_CHUNK_SIZE
+    assert sizes[True] < sizes[False] / 2
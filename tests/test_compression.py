@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from securearchive.compression import CODECS, decompress_stream, parse_compression, try_compress
+from securearchive.engine import (
+    InvalidContainerError,
+    _parse_header_bytes,
+    decrypt_container,
+    encrypt_path,
+    extract_entry,
+    list_container,
+    verify_container,
+)
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree, write_tree
+
+TEXT = b"".join(b"line %d of a compressible file\n" % i for i in range(20000))
+FILES = {
+    # Below and above SMALL_FILE_SIZE: batched and streamed entries.
+    "small.txt": TEXT[:10000],
+    "large.txt": TEXT,
+    "random.bin": os.urandom(200000),
+    "empty": b"",
+}
+
+
+def _encrypt(tmp_path, files, compression):
+    source = write_tree(tmp_path / "src", files)
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE,
+                 compression=compression)
+    return container
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_round_trip(tmp_path, codec):
+    container = _encrypt(tmp_path, FILES, codec)
+    entries = {e["path"]: e for e in list_container(str(container), PASSWORD)}
+
+    for name in ("small.txt", "large.txt"):
+        assert entries[name].get("codec") == codec
+        assert entries[name]["length"] < len(FILES[name]) / 4
+    assert container.stat().st_size < sum(len(data) for data in FILES.values()) / 2
+
+    assert verify_container(str(container), PASSWORD)
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert read_tree(tmp_path / "out") == FILES
+    target = extract_entry(str(container), "large.txt", str(tmp_path / "one"), PASSWORD)
+    assert target.read_bytes() == TEXT
+
+
+def test_incompressible_entry_is_stored_raw(tmp_path):
+    container = _encrypt(tmp_path, FILES, "zlib:9")
+    entries = {e["path"]: e for e in list_container(str(container), PASSWORD)}
+    assert entries["random.bin"].get("codec") is None
+    assert entries["random.bin"]["length"] == len(FILES["random.bin"])
+    assert entries["empty"].get("codec") is None
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_corrupted_compressed_extent(tmp_path, codec):
+    container = _encrypt(tmp_path, {"large.txt": TEXT}, codec)
+    data = bytearray(container.read_bytes())
+    # The only entry is compressed and starts in the first data segment,
+    # right behind the header.
+    _header, header_len = _parse_header_bytes(bytes(data))
+    data[header_len + 100] ^= 1
+    container.write_bytes(data)
+
+    # Authentication fails before any ciphertext reaches the decompressor.
+    with pytest.raises(InvalidContainerError, match="Segment authentication"):
+        decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    with pytest.raises(InvalidContainerError, match="Segment authentication"):
+        extract_entry(str(container), "large.txt", str(tmp_path / "one"), PASSWORD)
+    assert not verify_container(str(container), PASSWORD)
+
+
+def test_decompress_stream_errors():
+    compressed = try_compress(TEXT, "zlib", 6)
+    with pytest.raises(ValueError, match="Corrupt zlib"):
+        list(decompress_stream("zlib", [b"garbage" + compressed]))
+    with pytest.raises(ValueError, match="truncated"):
+        list(decompress_stream("zlib", [compressed[:len(compressed) // 2]]))
+    assert b"".join(decompress_stream("zlib", [compressed[i:i + 100] for i in range(0, len(compressed), 100)])) == TEXT
+
+
+def test_parse_compression():
+    assert parse_compression(None) is None
+    assert parse_compression("none") is None
+    assert parse_compression("LZMA") == ("lzma", 6)
+    assert parse_compression("bz2:1") == ("bz2", 1)
+    for spec in ("gzip", "zlib:x", "zlib:10", "bz2:0"):
+        with pytest.raises(ValueError):
+            parse_compression(spec)
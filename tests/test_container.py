@@ -0,0 +1,243 @@
+from pathlib import Path
+
+import pytest
+
+from securearchive import engine
+from securearchive.engine import (
+    TAG_SIZE,
+    VERSION_V1,
+    VERSION_V2,
+    EntryNotFoundError,
+    InvalidContainerError,
+    WrongPasswordError,
+    _build_header_bytes,
+    _parse_header_bytes,
+    append_to_container,
+    change_password,
+    decrypt_container,
+    encrypt_path,
+    extract_entry,
+    list_container,
+    verify_container,
+)
+from securearchive.stats import OperationStats
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree, write_tree, write_v1_container
+
+
+@pytest.fixture
+def container(tmp_path: Path, source: Path) -> Path:
+    path = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(path), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    return path
+
+
+def _header(path: Path):
+    data = path.read_bytes()
+    header, header_len = _parse_header_bytes(data)
+    return header, header_len, bytearray(data)
+
+
+def _patch_pointer(path: Path, **fields) -> None:
+    header, header_len, data = _header(path)
+    for name, value in fields.items():
+        setattr(header, f"manifest_{name}", value)
+    data[:header_len] = _build_header_bytes(header)
+    path.write_bytes(data)
+
+
+def _first_extent(path: Path):
+    with engine._open_container(str(path), PASSWORD, OperationStats()) as (manifest, _payload, _n, _header):
+        return dict(manifest["extents"][0])
+
+
+def _verify_extents(path: Path, data: bytes, extents) -> None:
+    # Reads every segment of ``extents`` in ``data`` with the key of the
+    # container at ``path``.
+    with memoryview(path.read_bytes()) as view:
+        header, _header_bytes = engine._read_header(view)
+        _key, cipher, _manifest = engine._unlock_v2(view, header, PASSWORD, OperationStats())
+    with memoryview(data) as view:
+        reader = engine._SegmentReader(view, cipher, extents, header.segment_size)
+        reader.verify_all(engine._Tracker())
+
+
+def test_round_trip(tmp_path, container, files):
+    header, _len, _data = _header(container)
+    assert header.version == VERSION_V2
+    assert verify_container(str(container), PASSWORD)
+    assert sorted(e["path"] for e in list_container(str(container), PASSWORD)) == sorted(files)
+
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD, workers=4)
+    assert read_tree(tmp_path / "out") == files
+
+    target = extract_entry(str(container), "text.txt", str(tmp_path / "one"), PASSWORD)
+    assert target.read_bytes() == files["text.txt"]
+
+
+@pytest.mark.parametrize("cpus, expected", [(1, 1), (2, 2), (64, engine.DEFAULT_WORKERS)])
+def test_default_workers(monkeypatch, cpus, expected):
+    monkeypatch.setattr(engine.os, "cpu_count", lambda: cpus)
+    assert engine._resolve_workers(None) == expected
+    assert engine._resolve_workers(0) == cpus
+    assert engine._resolve_workers(3) == 3
+
+
+def test_empty_and_segment_sized_files(tmp_path):
+    files = {"empty": b"", "one": b"x" * SEGMENT_SIZE, "two": b"y" * (2 * SEGMENT_SIZE)}
+    source = write_tree(tmp_path / "src", files)
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert read_tree(tmp_path / "out") == files
+
+
+def test_v1_container_is_readable(tmp_path, files):
+    container = tmp_path / "v1.secarc"
+    write_v1_container(container, files)
+
+    assert verify_container(str(container), PASSWORD)
+    assert len(list_container(str(container), PASSWORD)) == len(files)
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert read_tree(tmp_path / "out") == files
+
+    change_password(str(container), PASSWORD, "new", iterations=ITERATIONS)
+    assert _header(container)[0].version == VERSION_V1
+    assert verify_container(str(container), "new")
+    assert not verify_container(str(container), PASSWORD)
+
+
+def test_extract_entry(tmp_path, container, files):
+    target = extract_entry(str(container), "dir_1/file_01.bin", str(tmp_path / "one"), PASSWORD)
+    assert target == tmp_path / "one" / "dir_1" / "file_01.bin"
+    assert read_tree(tmp_path / "one") == {"dir_1/file_01.bin": files["dir_1/file_01.bin"]}
+
+    with pytest.raises(EntryNotFoundError):
+        extract_entry(str(container), "dir_1/missing.bin", str(tmp_path / "none"), PASSWORD)
+    assert not (tmp_path / "none").exists()
+
+
+@pytest.mark.parametrize("name", ["../escaped.txt", "dir/../../escaped.txt", "/tmp/escaped.txt", "..\\escaped.txt"])
+def test_path_traversal_is_rejected(tmp_path, name):
+    container = tmp_path / "evil.secarc"
+    write_v1_container(container, {"fine.txt": b"fine", name: b"escaped"})
+    out = tmp_path / "a" / "out"
+
+    with pytest.raises(InvalidContainerError, match="Unsafe entry path"):
+        extract_entry(str(container), name, str(out), PASSWORD)
+    with pytest.raises(InvalidContainerError, match="Unsafe entry path"):
+        decrypt_container(str(container), str(out), PASSWORD)
+    assert not (tmp_path / "a").exists()
+    assert not Path("/tmp/escaped.txt").exists()
+
+
+def test_wrong_password(tmp_path, container, files):
+    assert not verify_container(str(container), "wrong")
+    with pytest.raises(WrongPasswordError):
+        list_container(str(container), "wrong")
+    with pytest.raises(WrongPasswordError):
+        decrypt_container(str(container), str(tmp_path / "out"), "wrong")
+
+    v1 = tmp_path / "v1.secarc"
+    write_v1_container(v1, files)
+    assert not verify_container(str(v1), "wrong")
+    with pytest.raises(WrongPasswordError):
+        list_container(str(v1), "wrong")
+
+
+def test_v2_change_password(tmp_path, container, files):
+    change_password(str(container), PASSWORD, "new", iterations=ITERATIONS)
+    assert not verify_container(str(container), PASSWORD)
+    decrypt_container(str(container), str(tmp_path / "out"), "new")
+    assert read_tree(tmp_path / "out") == files
+
+
+def test_tampered_data_segment(tmp_path, container):
+    _h, header_len, data = _header(container)
+    data[header_len + 10] ^= 1
+    container.write_bytes(data)
+
+    # The manifest is intact, so listing still works; the data does not.
+    assert list_container(str(container), PASSWORD)
+    assert not verify_container(str(container), PASSWORD)
+    with pytest.raises(InvalidContainerError):
+        decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+
+
+def test_tampered_manifest(container):
+    header, _len, data = _header(container)
+    data[header.manifest_offset + 5] ^= 1
+    container.write_bytes(data)
+
+    assert not verify_container(str(container), PASSWORD)
+    with pytest.raises(InvalidContainerError):
+        list_container(str(container), PASSWORD)
+
+
+@pytest.mark.parametrize("field", ["offset", "length", "generation"])
+def test_tampered_manifest_pointer(container, field):
+    header, _len, _data = _header(container)
+    _patch_pointer(container, **{field: getattr(header, f"manifest_{field}") + 1})
+
+    assert not verify_container(str(container), PASSWORD)
+    with pytest.raises(InvalidContainerError):
+        list_container(str(container), PASSWORD)
+
+
+def test_tampered_static_header(container):
+    # The segment size is part of the header every segment authenticates.
+    header, header_len, data = _header(container)
+    header.segment_size *= 2
+    data[:header_len] = _build_header_bytes(header)
+    container.write_bytes(data)
+    assert not verify_container(str(container), PASSWORD)
+
+
+def test_truncated_container(container):
+    data = container.read_bytes()
+    for cut in (1, TAG_SIZE, len(data) // 2):
+        container.write_bytes(data[:-cut])
+        assert not verify_container(str(container), PASSWORD)
+
+
+def test_dropped_last_segment(container):
+    header, _len, data = _header(container)
+    extent = _first_extent(container)
+    count, last_len = engine._extent_segments(extent["length"], header.segment_size)
+    assert count > 1
+    # The segment before the dropped one was sealed as a data segment, not
+    # as the final one.
+    shortened = [{"offset": extent["offset"], "length": extent["length"] - last_len}]
+    with pytest.raises(InvalidContainerError, match="Segment authentication"):
+        _verify_extents(container, bytes(data), shortened)
+    _verify_extents(container, bytes(data), [extent])
+
+
+def test_appended_trailing_segment(container):
+    header, _len, data = _header(container)
+    extent = _first_extent(container)
+    end = extent["offset"] + extent["length"]
+    full = header.segment_size + TAG_SIZE
+    # A copy of the first segment after the final one.
+    extended = bytes(data[:end] + data[extent["offset"]:extent["offset"] + full] + data[end:])
+    with pytest.raises(InvalidContainerError, match="Segment authentication"):
+        _verify_extents(container, extended, [{"offset": extent["offset"], "length": extent["length"] + full}])
+
+
+def test_manifest_generation_rollback(tmp_path, container):
+    first, _len, _data = _header(container)
+    extra = write_tree(tmp_path / "extra", {"new.txt": b"appended"})
+    append_to_container(str(container), [str(extra)], PASSWORD)
+    second, _len, _data = _header(container)
+    assert second.manifest_generation == first.manifest_generation + 1
+
+    # The new manifest under the old generation number, and the old one
+    # under the new number, both fail authentication.
+    for offset, length, generation in [
+        (second.manifest_offset, second.manifest_length, first.manifest_generation),
+        (first.manifest_offset, first.manifest_length, second.manifest_generation),
+    ]:
+        _patch_pointer(container, offset=offset, length=length, generation=generation)
+        assert not verify_container(str(container), PASSWORD)
+        with pytest.raises(InvalidContainerError):
+            list_container(str(container), PASSWORD)
@@ -0,0 +1,107 @@
+import json
+import os
+
+import pytest
+
+from securearchive.entrytable import EntryTable
+
+RECORDS = [
+    {"path": "a.txt", "size": 5, "mtime": 1_700_000_000.25, "offset": 0, "length": 5},
+    {"path": "dir/b.bin", "size": 4096, "mtime": 1_700_000_001.0, "offset": 5, "length": 1200, "codec": "zlib"},
+    {"path": "dir/empty", "size": 0, "mtime": 1_700_000_002.0, "offset": 1205, "length": 0},
+    {"path": "dedup/c.img", "size": 70000, "mtime": 1_700_000_003.0, "chunks": [0, 1, 0]},
+    {"path": "ünïcode/名前.txt", "size": 3, "mtime": 1_700_000_004.0, "offset": 1205, "length": 3, "codec": "lzma"},
+]
+
+
+@pytest.fixture
+def table():
+    return EntryTable.from_records(RECORDS)
+
+
+def test_round_trip_against_dicts(table):
+    assert [e.to_dict() for e in table] == RECORDS
+    # Manifests written from a table decode to the same dicts.
+    assert json.loads(json.dumps([e.to_dict() for e in table])) == RECORDS
+    assert [e.to_dict() for e in EntryTable.from_records(e.to_dict() for e in table)] == RECORDS
+
+
+def test_item_access_mirrors_dicts(table):
+    for entry, record in zip(table, RECORDS):
+        for key in ("path", "size", "mtime", "offset", "length", "codec", "chunks"):
+            assert entry.get(key) == record.get(key)
+            assert (key in entry) == (key in record)
+            if key in record:
+                assert entry[key] == record[key]
+            else:
+                with pytest.raises(KeyError):
+                    entry[key]
+        assert entry.get("unknown", "default") == "default"
+    assert table[1].codec == "zlib"
+    assert table[3].offset is None and table[3].length is None
+    assert table[3].chunks == [0, 1, 0]
+    assert table[0].chunks is None
+
+
+def test_len_indexing_and_slicing(table):
+    assert len(table) == len(RECORDS)
+    assert table[0].path == "a.txt"
+    assert table[-1].path == RECORDS[-1]["path"]
+    for index in (len(RECORDS), -len(RECORDS) - 1):
+        with pytest.raises(IndexError):
+            table[index]
+    assert [e.path for e in table[1:3]] == ["dir/b.bin", "dir/empty"]
+    assert [e.path for e in table[::-2]] == [r["path"] for r in RECORDS[::-2]]
+    assert table[10:] == []
+    assert [table.path(i) for i in range(len(table))] == [r["path"] for r in RECORDS]
+    assert list(table.iter_paths(3)) == [r["path"].encode() for r in RECORDS[3:]]
+
+
+def test_listing_and_source_paths(tmp_path):
+    table = EntryTable()
+    root = table.add_root(str(tmp_path))
+    table.append_listing("", [("top.txt", 1, 1.0)], root=root)
+    table.append_listing("sub", [("a", 2, 2.0), ("b", 3, 3.0)], root=root)
+    table.append("loose", 4, 4.0)
+
+    assert [e.path for e in table] == ["top.txt", os.path.join("sub", "a"), os.path.join("sub", "b"), "loose"]
+    assert table[1].abs_path == tmp_path / "sub" / "a"
+    assert table.sizes.tolist() == [1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        table[3].abs_path
+
+
+def test_set_stored_and_permute(tmp_path):
+    table = EntryTable()
+    root = table.add_root(str(tmp_path))
+    table.append_listing("", [("x", 10, 1.0), ("y", 20, 2.0), ("z", 30, 3.0)], root=root)
+    table.set_stored(0, 0, 8, "bz2")
+    table.set_stored(1, 8, 20)
+    table.set_stored(2, 28, 30)
+
+    permuted = table.permute([2, 0, 1])
+    assert [e.to_dict() for e in permuted] == [
+        {"path": "z", "size": 30, "mtime": 3.0, "offset": 28, "length": 30},
+        {"path": "x", "size": 10, "mtime": 1.0, "offset": 0, "length": 8, "codec": "bz2"},
+        {"path": "y", "size": 20, "mtime": 2.0, "offset": 8, "length": 20},
+    ]
+    assert permuted[1].abs_path == tmp_path / "x"
+
+    other = EntryTable()
+    other.extend(permuted)
+    assert [e.to_dict() for e in other] == [e.to_dict() for e in permuted]
+    assert other[0].abs_path == tmp_path / "z"
+    assert other.nbytes() > 0
+
+
+def test_set_chunks(tmp_path):
+    table = EntryTable()
+    table.append_listing("", [("x", 10, 1.0), ("y", 0, 2.0), ("z", 30, 3.0)], root=table.add_root(str(tmp_path)))
+    with pytest.raises(ValueError):
+        table.set_chunks(1, [1])
+    table.set_chunks(0, [4, 5])
+    table.set_chunks(1, [])
+    table.set_chunks(2, [5, 4, 5])
+
+    assert [e.chunks for e in table] == [[4, 5], [], [5, 4, 5]]
+    assert [e.chunks for e in table.permute([2, 1, 0])] == [[5, 4, 5], [], [4, 5]]
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from securearchive import engine
+from securearchive.engine import decrypt_container, encrypt_path, extract_entry
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree, write_tree
+
+MTIME = 1_600_000_000.0
+
+
+@pytest.fixture
+def threaded(monkeypatch):
+    # Writer threads are capped at the CPU count; pretend there are enough,
+    # and make the limits small enough for a test tree.
+    monkeypatch.setattr(engine.os, "cpu_count", lambda: 4)
+    monkeypatch.setattr(engine, "LARGE_ENTRY_SIZE", 32 << 10)
+    monkeypatch.setattr(engine, "EXTRACT_BATCH_SIZE", 16 << 10)
+    monkeypatch.setattr(engine, "EXTRACT_BATCH_FILES", 8)
+    monkeypatch.setattr(engine, "EXTRACT_WINDOW", 64 << 10)
+
+
+def _source(tmp_path):
+    files = {f"d{i % 5}/sub/f{i:03d}.bin": os.urandom(i * 37 % 5000) for i in range(60)}
+    files["large/big.bin"] = os.urandom(200 << 10)
+    files["large/text.txt"] = b"a line of text\n" * 10000
+    source = write_tree(tmp_path / "src", files)
+    for i, path in enumerate(sorted(files)):
+        os.utime(source / path, (MTIME, MTIME + i))
+    return files, source
+
+
+def _mtimes(root):
+    return {p.relative_to(root).as_posix(): p.stat().st_mtime for p in root.rglob("*") if p.is_file()}
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+@pytest.mark.parametrize("workers", [2, 4])
+def test_parallel_extraction(tmp_path, threaded, workers, compression):
+    files, source = _source(tmp_path)
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE,
+                 workers=workers, compression=compression)
+    assert os.path.getsize(source / "large" / "big.bin") > engine.LARGE_ENTRY_SIZE
+
+    out = tmp_path / "out"
+    decrypt_container(str(container), str(out), PASSWORD, workers=workers)
+    assert read_tree(out) == files
+    assert _mtimes(out) == _mtimes(source)
+
+    target = extract_entry(str(container), "large/big.bin", str(tmp_path / "one"), PASSWORD)
+    assert target.read_bytes() == files["large/big.bin"]
+    assert target.stat().st_mtime == (source / "large" / "big.bin").stat().st_mtime
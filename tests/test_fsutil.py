@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from securearchive import fsutil
+from securearchive.engine import decrypt_container, encrypt_path
+from securearchive.fsutil import IGNORE_FILE, _walk, collect_entries
+
+from conftest import ITERATIONS, PASSWORD, read_tree, write_tree
+
+TREE = {
+    "a.txt": b"a",
+    "a.log": b"log",
+    "docs/readme.md": b"readme",
+    "docs/a.log": b"log",
+    "docs/build/out.txt": b"out",
+    "src/main.py": b"main",
+    "src/build/gen.py": b"gen",
+    "src/lib/util.py": b"util",
+    "src/lib/util.pyc": b"pyc",
+    "build": b"a file named build",
+}
+
+
+@pytest.fixture
+def tree(tmp_path):
+    return write_tree(tmp_path / "tree", TREE)
+
+
+def _paths(root, include=None, exclude=None, workers=1, ignore_file=True):
+    return sorted(
+        os.path.join(rel_dir, name).replace(os.sep, "/")
+        for rel_dir, files in _walk(str(root), include, exclude, workers, ignore_file)
+        for name, _size, _mtime in files
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_walk_lists_every_file(tree, workers):
+    assert _paths(tree, workers=workers) == sorted(TREE)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize(
+    "include, exclude, expected",
+    [
+        # Unanchored patterns match the name at any depth.
+        (None, ["*.log"], sorted(set(TREE) - {"a.log", "docs/a.log"})),
+        (["*.py"], None, ["src/build/gen.py", "src/lib/util.py", "src/main.py"]),
+        (["*.py", "*.md"], ["util.*"], ["docs/readme.md", "src/build/gen.py", "src/main.py"]),
+        # A trailing "/" only matches directories; the file named build stays.
+        (None, ["build/"], sorted(set(TREE) - {"docs/build/out.txt", "src/build/gen.py"})),
+        # Patterns with a "/" are anchored at the root.
+        (None, ["src/build"], sorted(set(TREE) - {"src/build/gen.py"})),
+        (None, ["/a.*"], sorted(set(TREE) - {"a.txt", "a.log"})),
+        (["src/main.*"], None, ["src/main.py"]),
+        (["src/*/*.py"], ["src/build/"], ["src/lib/util.py"]),
+    ],
+)
+def test_walk_filters(tree, workers, include, exclude, expected):
+    assert _paths(tree, include, exclude, workers) == expected
+
+
+def test_nested_ignore_files(tree):
+    (tree / IGNORE_FILE).write_text("# comment\n\n*.log\n")
+    # Anchored at src/, so docs/build is kept.
+    (tree / "src" / IGNORE_FILE).write_text("build/\nlib/*.pyc\n")
+    (tree / "src" / "lib" / IGNORE_FILE).write_text("util.py\n")
+
+    expected = ["a.txt", "build", "docs/build/out.txt", "docs/readme.md", "src/main.py"]
+    files = _paths(tree)
+    assert [f for f in files if not f.endswith(IGNORE_FILE)] == expected
+    assert _paths(tree, workers=4) == files
+    assert len(_paths(tree, ignore_file=False)) == len(TREE) + 3
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_unreadable_directory_is_skipped(monkeypatch, tree, workers):
+    scandir = os.scandir
+    denied = str(tree / "src" / "lib")
+
+    def guarded(path):
+        if path == denied:
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(fsutil.os, "scandir", guarded)
+    assert _paths(tree, workers=workers) == sorted(set(TREE) - {"src/lib/util.py", "src/lib/util.pyc"})
+
+    table = collect_entries(tree, workers=workers)
+    assert "src/main.py" in {e.path for e in table}
+
+
+def test_collect_entries_order(tree):
+    paths = [e.path.replace(os.sep, "/") for e in collect_entries(tree, keep_name=True)]
+    assert paths[:3] == ["tree/a.log", "tree/a.txt", "tree/build"]
+    assert sorted(paths) == sorted("tree/" + p for p in TREE)
+    assert [e.path for e in collect_entries(tree, workers=1)] == [e.path for e in collect_entries(tree, workers=8)]
+
+
+def test_encrypt_with_filters(tmp_path, tree):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(tree), str(container), PASSWORD, iterations=ITERATIONS,
+                 include=["*.py", "*.txt"], exclude=["build/"])
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    expected = {p: TREE[p] for p in ["a.txt", "src/main.py", "src/lib/util.py"]}
+    assert read_tree(tmp_path / "out") == expected
@@ -0,0 +1,101 @@
+import pytest
+
+from securearchive import crypto, engine
+from securearchive.crypto import (
+    MAX_KDF_MEMORY,
+    MIN_ITERATIONS,
+    PBKDF2_SHA512,
+    SCRYPT,
+    SCRYPT_P,
+    SCRYPT_R,
+    calibrate_kdf,
+    check_kdf_cost,
+)
+from securearchive.engine import (
+    InvalidContainerError,
+    add_password,
+    decrypt_container,
+    encrypt_path,
+    list_container,
+    verify_container,
+)
+
+from conftest import ITERATIONS, PASSWORD, read_tree
+
+SCRYPT_N = 1 << 10
+
+
+def _slot_offset(container) -> int:
+    header, _len = engine._parse_header_bytes(container.read_bytes()[:engine.MAX_HEADER_SIZE])
+    return len(engine._static_header_bytes(header))
+
+
+def test_scrypt_round_trip(tmp_path, source, files):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=SCRYPT_N, kdf="scrypt")
+    add_password(str(container), PASSWORD, "second", iterations=ITERATIONS, kdf="pbkdf2")
+
+    assert verify_container(str(container), "second")
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert read_tree(tmp_path / "out") == files
+
+
+@pytest.mark.parametrize("cost", [bytes((30, 255, 0, 1)), bytes((20, 8, 0, 17)), bytes((14, 0, 0, 1))])
+def test_oversized_scrypt_slot_is_rejected(tmp_path, source, cost):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=SCRYPT_N, kdf="scrypt")
+    data = bytearray(container.read_bytes())
+    offset = _slot_offset(container)
+    data[offset + 1:offset + 5] = cost
+    container.write_bytes(data)
+
+    assert not verify_container(str(container), PASSWORD)
+    with pytest.raises(InvalidContainerError):
+        list_container(str(container), PASSWORD)
+
+
+def test_check_kdf_cost():
+    check_kdf_cost(PBKDF2_SHA512, 300_000)
+    check_kdf_cost(SCRYPT, 1 << 17)
+    for iterations, r, p in [(3 << 10, 8, 1), (MAX_KDF_MEMORY // (128 * 8) * 2, 8, 1), (1 << 14, 8, 17), (0, 8, 1)]:
+        with pytest.raises(ValueError):
+            check_kdf_cost(SCRYPT, iterations, r, p)
+
+
+def _fake_timer(monkeypatch, seconds_per_unit: float) -> list:
+    # Derivations take time proportional to their cost, without running them.
+    calls = []
+
+    def time_kdf(algorithm, cost):
+        calls.append((algorithm, cost))
+        return cost * seconds_per_unit
+
+    monkeypatch.setattr(crypto, "_time_kdf", time_kdf)
+    return calls
+
+
+@pytest.mark.parametrize("seconds_per_unit, expected", [(1e-6, 250_000), (1e-3, MIN_ITERATIONS[PBKDF2_SHA512])])
+def test_calibrate_pbkdf2(monkeypatch, seconds_per_unit, expected):
+    calls = _fake_timer(monkeypatch, seconds_per_unit)
+    iterations, elapsed = calibrate_kdf(PBKDF2_SHA512, target=0.25)
+    assert iterations == expected
+    assert elapsed == pytest.approx(expected * seconds_per_unit)
+    assert all(algorithm == PBKDF2_SHA512 for algorithm, _cost in calls)
+
+
+@pytest.mark.parametrize(
+    "seconds_per_unit, max_memory, expected",
+    [
+        (1e-6, 1 << 30, 1 << 17),
+        (1e-9, 1 << 30, MAX_KDF_MEMORY // (128 * SCRYPT_R * SCRYPT_P)),
+        (1e-9, 64 << 20, (64 << 20) // (128 * SCRYPT_R * SCRYPT_P)),
+        (1e-3, 1 << 30, MIN_ITERATIONS[SCRYPT]),
+    ],
+)
+def test_calibrate_scrypt(monkeypatch, seconds_per_unit, max_memory, expected):
+    calls = _fake_timer(monkeypatch, seconds_per_unit)
+    n, _elapsed = calibrate_kdf(SCRYPT, target=0.25, max_memory=max_memory)
+    assert n == expected
+    assert n & (n - 1) == 0
+    assert all(cost & (cost - 1) == 0 and cost >= MIN_ITERATIONS[SCRYPT] for _algorithm, cost in calls)
+    check_kdf_cost(SCRYPT, n)
@@ -0,0 +1,119 @@
+import pytest
+
+from securearchive import engine, keycache
+from securearchive.crypto import KdfParams
+from securearchive.engine import WrongPasswordError, encrypt_path, list_container, verify_container
+from securearchive.keycache import KeyCache, disable_key_cache, enable_key_cache
+
+from conftest import ITERATIONS, PASSWORD
+
+PARAMS = KdfParams(iterations=ITERATIONS, salt=b"s" * 16)
+KEY = b"k" * 32
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(keycache.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def derivations(monkeypatch):
+    # Key derivations that actually ran, by password.
+    calls = []
+
+    def counting(derive):
+        def run(password, params):
+            calls.append(password)
+            return derive(password, params)
+        return run
+
+    monkeypatch.setattr(engine, "derive_key", counting(engine.derive_key))
+    monkeypatch.setattr(keycache, "derive_key", counting(keycache.derive_key))
+    yield calls
+    disable_key_cache()
+
+
+def test_ttl(clock):
+    cache = KeyCache(ttl=10)
+    cache.put(PASSWORD, PARAMS, KEY)
+    clock[0] += 9.9
+    assert cache.get(PASSWORD, PARAMS) == KEY
+    # A hit does not extend the lifetime.
+    clock[0] += 0.1
+    assert cache.get(PASSWORD, PARAMS) is None
+    assert len(cache) == 0
+
+    cache.put(PASSWORD, PARAMS, KEY)
+    clock[0] += 10
+    assert len(cache) == 0
+
+
+def test_lru_eviction(clock):
+    cache = KeyCache(max_entries=2)
+    cache.put("a", PARAMS, b"a" * 32)
+    cache.put("b", PARAMS, b"b" * 32)
+    assert cache.get("a", PARAMS) == b"a" * 32
+    cache.put("c", PARAMS, b"c" * 32)
+
+    assert len(cache) == 2
+    assert cache.get("b", PARAMS) is None
+    assert cache.get("a", PARAMS) == b"a" * 32
+    assert cache.get("c", PARAMS) == b"c" * 32
+
+
+def test_entries_are_keyed_by_params():
+    cache = KeyCache()
+    cache.put(PASSWORD, PARAMS, KEY)
+    assert cache.get(PASSWORD, KdfParams(iterations=ITERATIONS + 1, salt=PARAMS.salt)) is None
+    assert cache.get(PASSWORD, KdfParams(iterations=ITERATIONS, salt=b"t" * 16)) is None
+    assert cache.get(PASSWORD + " ", PARAMS) is None
+    with pytest.raises(ValueError):
+        KeyCache(ttl=0)
+
+
+def test_wipe_overwrites_keys():
+    cache = KeyCache()
+    cache.put(PASSWORD, PARAMS, KEY)
+    (_expires, stored), = cache._entries.values()
+    # The cache holds a fingerprint, never the password.
+    *_params, fingerprint = next(iter(cache._entries))
+    assert PASSWORD.encode() not in fingerprint
+
+    cache.wipe()
+    assert stored == bytes(len(KEY))
+    assert len(cache) == 0
+    assert cache.get(PASSWORD, PARAMS) is None
+
+
+def test_engine_uses_the_cache(tmp_path, source, derivations):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS)
+    enable_key_cache()
+    del derivations[:]
+
+    assert verify_container(str(container), PASSWORD)
+    assert derivations == [PASSWORD]
+    list_container(str(container), PASSWORD)
+    assert derivations == [PASSWORD]
+
+
+def test_wrong_password_is_not_cached(tmp_path, source, derivations):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS)
+    cache = enable_key_cache()
+    assert verify_container(str(container), PASSWORD)
+    del derivations[:]
+
+    for _ in range(2):
+        assert not verify_container(str(container), "wrong")
+        with pytest.raises(WrongPasswordError):
+            list_container(str(container), "wrong")
+    assert derivations == ["wrong"] * 4
+    assert len(cache) == 1
+
+    disable_key_cache()
+    assert len(cache) == 0
+    assert verify_container(str(container), PASSWORD)
+    assert derivations[-1] == PASSWORD
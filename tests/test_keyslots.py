@@ -0,0 +1,78 @@
+import pytest
+
+from securearchive.engine import (
+    DEFAULT_KEYSLOTS,
+    KDF_EMPTY,
+    SecureArchiveError,
+    WrongPasswordError,
+    _read_v2_header,
+    add_password,
+    change_password,
+    decrypt_container,
+    encrypt_path,
+    list_container,
+    remove_password,
+    verify_container,
+)
+
+from conftest import ITERATIONS, PASSWORD, read_tree
+
+
+@pytest.fixture
+def container(tmp_path, source):
+    path = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(path), PASSWORD, iterations=ITERATIONS)
+    return path
+
+
+def _used_slots(path) -> int:
+    return sum(slot.kdf != KDF_EMPTY for slot in _read_v2_header(str(path)).keyslots)
+
+
+def test_remove_password(tmp_path, container, files):
+    add_password(str(container), PASSWORD, "second")
+    remove_password(str(container), PASSWORD)
+
+    assert _used_slots(container) == 1
+    assert not verify_container(str(container), PASSWORD)
+    with pytest.raises(WrongPasswordError):
+        list_container(str(container), PASSWORD)
+    decrypt_container(str(container), str(tmp_path / "out"), "second")
+    assert read_tree(tmp_path / "out") == files
+
+
+def test_last_password_cannot_be_removed(container):
+    with pytest.raises(SecureArchiveError, match="last password"):
+        remove_password(str(container), PASSWORD)
+    assert verify_container(str(container), PASSWORD)
+
+    with pytest.raises(WrongPasswordError):
+        remove_password(str(container), "wrong")
+
+
+def test_keyslots_full(container):
+    for i in range(1, DEFAULT_KEYSLOTS):
+        add_password(str(container), PASSWORD, f"password {i}")
+    assert _used_slots(container) == DEFAULT_KEYSLOTS
+
+    before = container.read_bytes()
+    with pytest.raises(SecureArchiveError, match="No free keyslot"):
+        add_password(str(container), PASSWORD, "one too many")
+    assert container.read_bytes() == before
+    assert not verify_container(str(container), "one too many")
+
+    # Removing one frees a slot again.
+    remove_password(str(container), "password 3")
+    add_password(str(container), "password 5", "one too many")
+    assert verify_container(str(container), "one too many")
+
+
+def test_change_password_keeps_other_slots(tmp_path, container, files):
+    add_password(str(container), PASSWORD, "second")
+    change_password(str(container), PASSWORD, "new", iterations=ITERATIONS)
+
+    assert not verify_container(str(container), PASSWORD)
+    assert verify_container(str(container), "second")
+    assert _used_slots(container) == 2
+    decrypt_container(str(container), str(tmp_path / "out"), "new")
+    assert read_tree(tmp_path / "out") == files
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from securearchive import listing
+from securearchive.engine import OperationCancelledError
+from securearchive.entrytable import EntryTable
+from securearchive.listing import EntryListing
+from securearchive.manifest import decode_manifest, encode_manifest
+from securearchive.progress import CancelToken
+
+
+def _records():
+    rng = random.Random(5)
+    names = ["Report.PDF", "report.txt", "notes.md", "Über.txt", "photo.JPG", "data.bin"]
+    records = []
+    for i in range(300):
+        path = f"dir_{rng.randrange(10)}/{rng.choice(['a', 'B', 'c'])}{i}_{rng.choice(names)}"
+        # Few distinct sizes and mtimes, so that ties are common.
+        records.append({"path": path, "size": rng.choice([0, 10, 4096, 1 << 20]),
+                        "mtime": 1_700_000_000.0 + rng.randrange(5), "offset": 0, "length": 0})
+    return records
+
+
+@pytest.fixture(params=["table", "packed"])
+def entries(request):
+    table = EntryTable.from_records(_records())
+    if request.param == "table":
+        return table
+    return decode_manifest(encode_manifest({"entries": table}))["entries"]
+
+
+def _rows(view):
+    return [view.entry(row).path for row in range(len(view))]
+
+
+def _expected(key, descending=False, text=""):
+    records = [r for r in _records() if text.encode().lower() in r["path"].encode().lower()]
+    order = sorted(records, key=lambda r: (r[key], r["path"].encode()) if key != "path" else r["path"].encode())
+    paths = [r["path"] for r in order]
+    return paths[::-1] if descending else paths
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("key", ["path", "size", "mtime"])
+def test_sort(entries, key, descending):
+    view = EntryListing(entries)
+    assert _rows(view) == _expected("path")
+    view.sort(key, descending)
+    assert (view.sort_key, view.descending) == (key, descending)
+    assert _rows(view) == _expected(key, descending)
+    assert [entries[view.index(row)].path for row in range(len(view))] == _expected(key, descending)
+
+
+def test_unknown_sort_key(entries):
+    with pytest.raises(ValueError):
+        EntryListing(entries).sort("name")
+
+
+@pytest.mark.parametrize("text", ["report", "REPORT", ".txt", "dir_3/b", "Über", "nothing here", "_"])
+def test_filter(entries, text):
+    view = EntryListing(entries)
+    view.set_filter(text)
+    assert _rows(view) == _expected("path", text=text)
+
+    # The filter stays applied across sorts, and sorts across filters.
+    view.sort("size", descending=True)
+    assert _rows(view) == _expected("size", True, text)
+    view.set_filter("")
+    assert _rows(view) == _expected("size", True)
+
+
+def test_filter_is_ascii_case_insensitive(entries):
+    view = EntryListing(entries)
+    view.set_filter("ÜBER.TXT")
+    assert _rows(view) == _expected("path", text="Über.txt")
+    assert len(view) > 0
+    # Only ASCII letters are folded.
+    view.set_filter("über")
+    assert len(view) == 0
+
+
+def test_precomputed_mask(entries):
+    view = EntryListing(entries)
+    mask = view.match("photo")
+    assert sum(mask) == len(_expected("path", text="photo"))
+    assert view.match("") is None
+    assert not any(view.match("a\nb"))
+
+    view.set_filter("photo", mask)
+    assert _rows(view) == _expected("path", text="photo")
+
+
+def test_cancelled_match(monkeypatch, entries):
+    monkeypatch.setattr(listing, "CANCEL_CHECK_INTERVAL", 1)
+    view = EntryListing(entries)
+    token = CancelToken()
+    token.cancel()
+    with pytest.raises(OperationCancelledError):
+        view.match("report", token)
+
+    # Nothing was changed; the next match builds the index from scratch.
+    assert _rows(view) == _expected("path")
+    view.set_filter("report")
+    assert _rows(view) == _expected("path", text="report")
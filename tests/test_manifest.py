@@ -0,0 +1,141 @@
+import json
+import random
+
+import pytest
+
+from securearchive import engine
+from securearchive.engine import (
+    EntryNotFoundError,
+    _find_entry,
+    append_to_container,
+    decrypt_container,
+    encrypt_path,
+    extract_entry,
+    list_container,
+    verify_container,
+)
+from securearchive.entrytable import EntryTable
+from securearchive.manifest import RESTART_INTERVAL, PackedEntries, decode_manifest, encode_manifest
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree, write_tree
+
+
+def _records(count: int):
+    # Deep shared prefixes, names that sort differently from their numbers
+    # and a few non-ASCII paths.
+    rng = random.Random(count)
+    records = []
+    for i in range(count):
+        path = f"projects/alpha/src/module_{i % 7}/file_{i}.py"
+        if i % 11 == 0:
+            path = f"projects/alpha/docs/kapitel_{i}_übersicht.md"
+        record = {"path": path, "size": rng.randrange(1 << 20), "mtime": 1_700_000_000.5 + i,
+                  "offset": i * 4096, "length": rng.randrange(1 << 20)}
+        if i % 3 == 0:
+            record["codec"] = "zlib"
+        records.append(record)
+    return records
+
+
+def _packed(records) -> PackedEntries:
+    manifest = decode_manifest(encode_manifest({"version": 2, "entries": EntryTable.from_records(records)}))
+    assert manifest["version"] == 2
+    return manifest["entries"]
+
+
+@pytest.mark.parametrize("count", [0, 1, RESTART_INTERVAL, RESTART_INTERVAL + 1, 200])
+def test_packed_entries_round_trip(count):
+    records = _records(count)
+    entries = _packed(records)
+    expected = sorted(records, key=lambda r: r["path"].encode())
+
+    assert len(entries) == count
+    assert [e.to_dict() for e in entries] == expected
+    assert [p.decode() for p in entries.iter_paths()] == [r["path"] for r in expected]
+    # Random access, backwards and across restart points.
+    for i in reversed(range(count)):
+        assert entries[i].path == expected[i]["path"]
+    if count:
+        assert entries[-1].path == expected[-1]["path"]
+    with pytest.raises(IndexError):
+        entries[count]
+
+
+def test_packed_entries_find():
+    records = _records(200)
+    entries = _packed(records)
+    paths = sorted(r["path"] for r in records)
+
+    for path in paths:
+        assert entries.find(path).path == path
+    for missing in ["", "a", "projects/alpha/src", paths[0] + "x", paths[17][:-1], "zzz"]:
+        assert entries.find(missing) is None
+
+
+def test_packed_entries_prefix_and_pages():
+    records = _records(200)
+    entries = _packed(records)
+    paths = sorted(r["path"] for r in records)
+
+    for prefix in ["projects/alpha/docs/", "projects/alpha/src/module_3/", "projects/", "nothing/", ""]:
+        found = entries.prefix_range(prefix)
+        assert [entries[i].path for i in found] == [p for p in paths if p.startswith(prefix)]
+
+    pages = [entries[start:start + 25] for start in range(0, len(entries), 25)]
+    assert [e.path for page in pages for e in page] == paths
+    assert [e.path for e in entries[::-1]] == paths[::-1]
+
+
+def test_find_entry_binary_search_and_fallback(monkeypatch):
+    records = _records(100) + [{"path": "odd//name.txt", "size": 1, "mtime": 0.0, "offset": 0, "length": 1}]
+    entries = _packed(records)
+
+    # A hit is found by binary search alone.
+    def no_scan(self):
+        raise AssertionError("linear scan")
+    with monkeypatch.context() as m:
+        m.setattr(PackedEntries, "__iter__", no_scan)
+        assert _find_entry(entries, "projects/alpha/src/module_2/file_9.py").size == records[9]["size"]
+
+    # A stored path that is not normalized is only found by the scan.
+    assert _find_entry(entries, "odd/name.txt").path == "odd//name.txt"
+    with pytest.raises(EntryNotFoundError):
+        _find_entry(entries, "projects/alpha/src/module_2/file_10.py")
+
+
+def _json_manifest(manifest):
+    # How containers were written before manifests became binary.
+    head = {k: v for k, v in manifest.items() if k != "entries"}
+    head["entries"] = []
+    for e in manifest["entries"]:
+        record = e.to_dict()
+        if "offset" in record:
+            record["segments"] = engine._segment_span(record["offset"], record["length"], SEGMENT_SIZE)
+        head["entries"].append(record)
+    return json.dumps(head, ensure_ascii=False).encode("utf-8")
+
+
+def test_json_manifest_container(monkeypatch, tmp_path, files):
+    source = write_tree(tmp_path / "src", files)
+    container = tmp_path / "c.secarc"
+    with monkeypatch.context() as m:
+        m.setattr(engine, "encode_manifest", _json_manifest)
+        encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+
+    entries = list_container(str(container), PASSWORD)
+    assert not isinstance(entries, PackedEntries)
+    assert sorted(e.path for e in entries) == sorted(files)
+    assert sorted(e.path for e in list_container(str(container), PASSWORD, prefix="dir_1/")) == sorted(
+        p for p in files if p.startswith("dir_1/"))
+    assert verify_container(str(container), PASSWORD)
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD)
+    assert read_tree(tmp_path / "out") == files
+    target = extract_entry(str(container), "dir_2/file_05.bin", str(tmp_path / "one"), PASSWORD)
+    assert target.read_bytes() == files["dir_2/file_05.bin"]
+
+    # The next generation is written with a binary manifest.
+    added = write_tree(tmp_path / "more", {"added.txt": b"added"})
+    append_to_container(str(container), [str(added / "added.txt")], PASSWORD)
+    assert isinstance(list_container(str(container), PASSWORD), PackedEntries)
+    decrypt_container(str(container), str(tmp_path / "out2"), PASSWORD)
+    assert read_tree(tmp_path / "out2") == dict(files, **{"added.txt": b"added"})
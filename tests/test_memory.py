@@ -0,0 +1,58 @@
+import os
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from securearchive import engine
+from securearchive.engine import change_password, decrypt_container, encrypt_path
+
+from conftest import ITERATIONS, PASSWORD, read_tree, write_tree, write_v1_container
+
+MIB = 1 << 20
+# Two files large enough to be streamed on extraction instead of being
+# batched for the writer threads.
+FILE_SIZE = engine.LARGE_ENTRY_SIZE + MIB
+PAYLOAD = 2 * FILE_SIZE
+# The v2 paths keep a few segments in memory, whatever the payload size.
+STREAMING_LIMIT = 8 * MIB
+
+
+def _traced_peak(fn, *args, **kwargs) -> int:
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture(scope="module")
+def large_files():
+    return {"a.bin": os.urandom(FILE_SIZE), "b.bin": os.urandom(FILE_SIZE)}
+
+
+def test_encrypt_and_decrypt_stream(tmp_path: Path, large_files):
+    source = write_tree(tmp_path / "src", large_files)
+    container = tmp_path / "c.secarc"
+
+    peak = _traced_peak(encrypt_path, str(source), str(container), PASSWORD, iterations=ITERATIONS)
+    assert peak < STREAMING_LIMIT
+
+    peak = _traced_peak(decrypt_container, str(container), str(tmp_path / "out"), PASSWORD)
+    assert peak < STREAMING_LIMIT
+    assert read_tree(tmp_path / "out") == large_files
+
+
+def test_v1_change_password_does_not_copy_payload(tmp_path: Path, large_files):
+    # A v1 payload is authenticated by one GCM tag, so its plaintext is held
+    # once; re-encryption streams it to the file instead of building the
+    # new payload and ciphertext next to it.
+    container = tmp_path / "v1.secarc"
+    write_v1_container(container, large_files)
+
+    peak = _traced_peak(change_password, str(container), PASSWORD, "new", iterations=ITERATIONS)
+    assert peak < PAYLOAD + PAYLOAD // 4
+
+    decrypt_container(str(container), str(tmp_path / "out"), "new")
+    assert read_tree(tmp_path / "out") == large_files
@@ -0,0 +1,108 @@
+import pytest
+
+from securearchive import engine
+from securearchive.engine import (
+    OperationCancelledError,
+    decrypt_container,
+    encrypt_path,
+    extract_entry,
+    verify_container,
+)
+from securearchive.progress import CancelToken
+
+from conftest import ITERATIONS, PASSWORD, SEGMENT_SIZE, read_tree
+
+
+@pytest.fixture
+def container(tmp_path, source):
+    path = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(path), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE)
+    return path
+
+
+@pytest.fixture
+def reports(monkeypatch):
+    # Every report reaches the callback instead of one per PROGRESS_INTERVAL.
+    monkeypatch.setattr(engine, "PROGRESS_INTERVAL", 0)
+    return []
+
+
+def _cancel_after(reports, count: int = 1):
+    token = CancelToken()
+
+    def progress(p):
+        reports.append(p)
+        if len(reports) >= count:
+            token.cancel()
+
+    return progress, token
+
+
+def _check_phases(reports, phases):
+    # Within a phase the counters only grow; the last report of each phase
+    # has reached its totals.
+    assert list(dict.fromkeys(p.phase for p in reports)) == phases
+    for phase in phases:
+        seen = [p for p in reports if p.phase == phase]
+        assert seen
+        for before, after in zip(seen, seen[1:]):
+            assert after.bytes_done >= before.bytes_done
+            assert after.entries_done >= before.entries_done
+            assert after.elapsed >= before.elapsed
+        assert seen[-1].bytes_done == seen[-1].bytes_total
+        assert seen[-1].entries_done == seen[-1].entries_total
+
+
+@pytest.mark.parametrize("count", [1, 3])
+def test_cancel_encrypt(tmp_path, source, reports, count):
+    progress, token = _cancel_after(reports, count)
+    path = tmp_path / "c.secarc"
+    with pytest.raises(OperationCancelledError):
+        encrypt_path(str(source), str(path), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE,
+                     progress=progress, cancel=token)
+    assert len(reports) == count
+    assert not path.exists()
+    assert list(tmp_path.iterdir()) == [source]
+
+
+def test_cancel_decrypt(tmp_path, container, reports):
+    progress, token = _cancel_after(reports)
+    out = tmp_path / "out"
+    with pytest.raises(OperationCancelledError):
+        decrypt_container(str(container), str(out), PASSWORD, progress=progress, cancel=token)
+    assert len(reports) == 1
+    assert not out.exists()
+
+    progress, token = _cancel_after(reports)
+    with pytest.raises(OperationCancelledError):
+        extract_entry(str(container), "text.txt", str(out), PASSWORD, progress=progress, cancel=token)
+    assert not out.exists()
+
+
+def test_cancel_verify(container, reports):
+    progress, token = _cancel_after(reports)
+    with pytest.raises(OperationCancelledError):
+        verify_container(str(container), PASSWORD, progress=progress, cancel=token)
+    assert [p.phase for p in reports] == ["verify"]
+    assert reports[0].bytes_done == 0
+
+
+def test_progress_is_monotonic(tmp_path, source, files, reports):
+    total = sum(len(data) for data in files.values())
+    path = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(path), PASSWORD, iterations=ITERATIONS, segment_size=SEGMENT_SIZE,
+                 progress=reports.append)
+    _check_phases(reports, ["scan", "encrypt"])
+    assert (reports[-1].bytes_total, reports[-1].entries_total) == (total, len(files))
+    assert reports[-1].fraction == 1.0
+
+    del reports[:]
+    decrypt_container(str(path), str(tmp_path / "out"), PASSWORD, progress=reports.append)
+    _check_phases(reports, ["decrypt"])
+    assert (reports[-1].bytes_done, reports[-1].entries_done) == (total, len(files))
+    assert read_tree(tmp_path / "out") == files
+
+    del reports[:]
+    assert verify_container(str(path), PASSWORD, progress=reports.append)
+    _check_phases(reports, ["verify"])
+    assert len(reports) > 2
@@ -0,0 +1,78 @@
+import pytest
+
+from securearchive import engine
+from securearchive.engine import (
+    WrongPasswordError,
+    decrypt_container,
+    encrypt_path,
+    list_container,
+    verify_container,
+)
+from securearchive.stats import OperationStats, set_stats_hook
+
+from conftest import ITERATIONS, PASSWORD
+
+
+@pytest.fixture
+def hooked():
+    seen = []
+    set_stats_hook(seen.append)
+    try:
+        yield seen
+    finally:
+        set_stats_hook(None)
+
+
+def test_phases_are_recorded(tmp_path, source, files):
+    total = sum(len(data) for data in files.values())
+    container = tmp_path / "c.secarc"
+
+    stats = OperationStats()
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, stats=stats)
+    assert stats.operation == "encrypt"
+    assert stats.error is None
+    assert (stats.bytes, stats.entries) == (total, len(files))
+    assert {"scan", "kdf", "read", "encrypt", "write", "manifest"} <= set(stats.phases)
+    assert stats.phases["encrypt"].bytes == total
+    assert stats.wall > 0
+
+    stats = OperationStats()
+    decrypt_container(str(container), str(tmp_path / "out"), PASSWORD, stats=stats)
+    assert stats.operation == "decrypt"
+    assert stats.phases["decrypt"].bytes == total
+    assert stats.phases["write"].entries == len(files)
+    assert [name for name, _phase in stats.ordered_phases()] == ["kdf", "manifest", "decrypt", "write"]
+
+
+def test_stats_hook(tmp_path, source, hooked):
+    container = tmp_path / "c.secarc"
+    stats = OperationStats()
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS, stats=stats)
+    # Without stats= the hook still gets a filled-in object of its own.
+    list_container(str(container), PASSWORD)
+    assert verify_container(str(container), PASSWORD)
+
+    assert hooked[0] is stats
+    assert [s.operation for s in hooked] == ["encrypt", "list", "verify"]
+    assert all(s.error is None and "kdf" in s.phases for s in hooked)
+
+
+def test_stats_hook_on_error(tmp_path, source, hooked):
+    container = tmp_path / "c.secarc"
+    encrypt_path(str(source), str(container), PASSWORD, iterations=ITERATIONS)
+    stats = OperationStats()
+    with pytest.raises(WrongPasswordError):
+        decrypt_container(str(container), str(tmp_path / "out"), "wrong", stats=stats)
+
+    assert hooked[-1] is stats
+    assert stats.operation == "decrypt"
+    assert stats.error == "WrongPasswordError"
+    assert "kdf" in stats.phases
+    assert "decrypt" not in stats.phases
+
+
+def test_stats_is_keyword_only(tmp_path):
+    with pytest.raises(TypeError):
+        list_container(str(tmp_path / "c.secarc"), PASSWORD, None, OperationStats())
+    with pytest.raises(TypeError, match="keyword-only"):
+        engine._timed("test")(lambda stats=None: None)